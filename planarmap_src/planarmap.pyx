@@ -1,7 +1,10 @@
 #cython: language_level=3
 
-from libc.stdlib cimport malloc, free
+from libc.stdlib cimport malloc, free, calloc
+from libc.stdint cimport uint64_t
 import random
+import threading
+import numpy as np
 
 cdef extern from 'PMdef.h':
     ctypedef struct pmSize:
@@ -42,15 +45,20 @@ cdef extern from 'PMdef.h':
         long e, v, f, i
 
     void set_pmRandom_callback(long (*function)(long))
+    void pmSetRandomState(uint64_t *state)
+    uint64_t pmNextRandom(uint64_t *s) nogil
+    long pmRandom(long n) nogil
+    int pmKeepMemory
+    void pmReleaseMemory() nogil
 
 cdef extern from 'PMplanmap.h':
-    extern int pmMemoryInit(pmSize *S, pmMethod *Meth, pmMemory *M)
+    extern int pmMemoryInit(pmSize *S, pmMethod *Meth, pmMemory *M) nogil
     extern int pmPlanMap(pmSize *S, pmMethod *Meth,
-                         pmMemory *M, pmMap *Map)
-    extern int pmFreeMap(pmMap *Map)
+                         pmMemory *M, pmMap *Map) nogil
+    extern int pmFreeMap(pmMap *Map) nogil
 
 cdef extern from 'stats.h':
-    extern long pmStatGauss(pmMap *Map)
+    extern long pmStatGauss(pmMap *Map) nogil
 
 # We want Planarmap to use the same pseudo-random number generator as Python.
 
@@ -59,11 +67,63 @@ cdef long randrange_callback(long n):
 
 set_pmRandom_callback(randrange_callback)
 
+# Planarmap keeps the map being built in global variables, so only one
+# map can be generated at a time.
+
+_planarmap_lock = threading.Lock()
+
+cdef uint64_t splitmix64(uint64_t *x):
+    cdef uint64_t z
+    x[0] += 0x9e3779b97f4a7c15ULL
+    z = x[0]
+    z = (z ^ (z >> 30)) * 0xbf58476d1ce4e5b9ULL
+    z = (z ^ (z >> 27)) * 0x94d049bb133111ebULL
+    return z ^ (z >> 31)
+
+
+cdef class RandomGenerator:
+    """
+    A xoshiro256** pseudo-random number generator for use by random_map,
+    which draws from it entirely in C.  The seed can be any integer;
+    if none is given, one is taken from Python's generator.
+
+    >>> G, H = RandomGenerator(1), RandomGenerator(1)
+    >>> random_map(20, rng=G) == random_map(20, rng=H)
+    True
+    >>> [G.randrange(10) for i in range(5)] == [H.randrange(10) for i in range(5)]
+    True
+    >>> random_map(20, rng=G) == random_map(20, rng=1)
+    False
+    """
+    cdef uint64_t state[4]
+
+    def __init__(self, seed=None):
+        cdef uint64_t x
+        cdef int i
+        if seed is None:
+            seed = random.getrandbits(64)
+        x = seed % 2**64
+        for i in range(4):
+            self.state[i] = splitmix64(&x)
+
+    def randrange(self, long n):
+        """
+        A random integer in range(n).
+        """
+        if n <= 0:
+            raise ValueError('empty range for randrange()')
+        with _planarmap_lock:
+            pmSetRandomState(self.state)
+            ans = pmRandom(n) - 1
+            pmSetRandomState(NULL)
+        return ans
+
 
 # The main function
 
 def random_map(num_vertices, int edge_connectivity=4,
-               int num_link_comps=0, int max_tries=100):
+               int num_link_comps=0, long max_tries=100, rng=None,
+               stats=None, output='adjacencies'):
     """
     Use Gilles Schaeffer's "Planarmap program" to generate
     a random 4-valent planar graph with the given number
@@ -76,15 +136,63 @@ def random_map(num_vertices, int edge_connectivity=4,
     being connected.  In particular, a 2-connected graph can
     (and frequently do) have looped edges.
 
-    Under the hood, it uses Python's pseudo-random number
-    generator.
+    If num_link_comps is positive, maps are sampled until the
+    associated link has that many components, giving up after
+    max_tries retries and returning None.  The retries happen in C,
+    reusing the memory of the previous map.  If stats is a Counter, the
+    number of components of every map sampled is added to it, from
+    which the acceptance rate can be read off.
+
+    >>> from collections import Counter
+    >>> stats = Counter()
+    >>> M = random_map(30, num_link_comps=2, max_tries=1000, rng=2, stats=stats)
+    >>> len(M), stats[2]
+    (30, 1)
+    >>> random_map(30, num_link_comps=30, max_tries=5, rng=2) is None
+    True
+
+    Reusing the memory gives the same map as sampling afresh each time:
+
+    >>> G, H = RandomGenerator(5), RandomGenerator(5)
+    >>> M = random_map(20, num_link_comps=3, max_tries=1000, rng=G)
+    >>> tries = 0
+    >>> while True:
+    ...     stats, tries = Counter(), tries + 1
+    ...     N = random_map(20, rng=H, stats=stats)
+    ...     if stats[3]:
+    ...         break
+    >>> M == N, tries > 1
+    (True, True)
+
+    By default, it uses Python's pseudo-random number generator.
+    Alternatively, rng can be a RandomGenerator or an integer seed for
+    one, in which case the random numbers are drawn in C and the map is
+    generated with the GIL released.
+
+    The map is returned as a list of pairs (vertex label, labels of the
+    edges around it), where the two ends of an edge are labeled e and -e.
+    With output='gluings', it is instead an array of shape
+    (num_vertices, 4) whose entry [v, i] is 4*w + j when the ith edge at
+    the vth vertex is the jth edge at the wth vertex, with the vertices
+    and edges at each in the same order as before.
+
+    >>> A = random_map(10, rng=3)
+    >>> G = random_map(10, rng=3, output='gluings')
+    >>> where = {e: (v, i) for v, (_, edges) in enumerate(A)
+    ...                    for i, e in enumerate(edges)}
+    >>> all(divmod(G[v, i], 4) == where[-e] for v, (_, edges) in enumerate(A)
+    ...                                     for i, e in enumerate(edges))
+    True
     """
     cdef pmSize size
     cdef pmMethod method
     cdef pmMemory memory
     cdef pmMap the_map
-    cdef pm_edge *edge
-    cdef pm_vertex *vert
+    cdef RandomGenerator generator = None
+    cdef long *counts = NULL
+    cdef long max_count = 0
+    cdef bint found
+    global pmKeepMemory
 
     if edge_connectivity==2:
         size.m, size.b = 4, 4
@@ -94,6 +202,8 @@ def random_map(num_vertices, int edge_connectivity=4,
         size.m, size.b = 6, 5
     else:
         raise ValueError("Invalid edge_connectivity parameter")
+    if output not in ('adjacencies', 'gluings'):
+        raise ValueError("Output must be 'adjacencies' or 'gluings'")
 
     size.v = num_vertices
     size.e, size.f, size.r, size.g, size.d = 0, 0, 0, 0, 0
@@ -102,18 +212,73 @@ def random_map(num_vertices, int edge_connectivity=4,
 
     method.core, method.pic = 0, 0
     method.verbose = 0
-    pmMemoryInit(&size, &method, &memory)
-    pmPlanMap(&size, &method, &memory, &the_map)
-    if num_link_comps > 0:
-        tries = 0
-        while pmStatGauss(&the_map) != num_link_comps and tries < max_tries:
-            pmFreeMap(&the_map)
-            pmPlanMap(&size, &method, &memory, &the_map)
-            tries += 1
-
-        if tries==max_tries:
-            return 
+    if rng is not None:
+        generator = rng if isinstance(rng, RandomGenerator) else RandomGenerator(rng)
+    if stats is not None:
+        # A map has 2*num_vertices edges, hence at most that many components.
+        max_count = 2 * num_vertices
+        counts = <long *>calloc(max_count + 1, sizeof(long))
+        if counts == NULL:
+            raise MemoryError
 
+    try:
+        with _planarmap_lock:
+            pmKeepMemory = num_link_comps > 0
+            if generator is None:
+                found = _generate(&size, &method, &memory, &the_map,
+                                  num_link_comps, max_tries, counts, max_count)
+            else:
+                pmSetRandomState(generator.state)
+                with nogil:
+                    found = _generate(&size, &method, &memory, &the_map,
+                                      num_link_comps, max_tries,
+                                      counts, max_count)
+                pmSetRandomState(NULL)
+            if not found:
+                ans = None
+            elif output == 'gluings':
+                ans = _read_gluings(&the_map)
+            else:
+                ans = _read_map(&the_map)
+            pmReleaseMemory()
+        if counts != NULL:
+            for i in range(max_count + 1):
+                if counts[i]:
+                    stats[i] += counts[i]
+    finally:
+        free(counts)
+    return ans
+
+
+cdef bint _generate(pmSize *size, pmMethod *method, pmMemory *memory,
+                    pmMap *the_map, int num_link_comps, long max_tries,
+                    long *counts, long max_count) noexcept nogil:
+    """
+    Generates a map, retrying up to max_tries times until it has the
+    given number of link components if that is positive.  On failure,
+    the last map is freed and False is returned.  If counts is not
+    NULL, the number of components of each map is tallied there.
+    """
+    cdef long tries = 0, comps
+    pmMemoryInit(size, method, memory)
+    while True:
+        pmPlanMap(size, method, memory, the_map)
+        if num_link_comps <= 0 and counts == NULL:
+            return True
+        comps = pmStatGauss(the_map)
+        if counts != NULL:
+            counts[min(comps, max_count)] += 1
+        if num_link_comps <= 0 or comps == num_link_comps:
+            return True
+        pmFreeMap(the_map)
+        if tries == max_tries:
+            return False
+        tries += 1
+
+
+cdef _read_map(pmMap *the_map):
+    cdef pm_edge *edge
+    cdef pm_vertex *vert
     ans = []
     vert = the_map.root.c_from
     while vert != NULL:
@@ -125,5 +290,36 @@ def random_map(num_vertices, int edge_connectivity=4,
         edges_at_vert.append(edge.label)
         ans.append( (vert.label, tuple(edges_at_vert)) )
         vert = vert.next
-    pmFreeMap(&the_map)
+    pmFreeMap(the_map)
     return ans
+
+
+cdef _read_gluings(pmMap *the_map):
+    cdef pm_edge *edge
+    cdef pm_vertex *vert
+    cdef long n = 0, v, i, num_edges
+    vert = the_map.root.c_from
+    while vert != NULL:
+        n += 1
+        vert = vert.next
+    num_edges = 2 * n
+
+    # The flat strand 4*v + i where each edge label occurs.
+    cdef long long[:] where = np.empty(2 * num_edges + 1, dtype=np.int64)
+    gluings = np.empty((n, 4), dtype=np.int32)
+    cdef int[:, :] view = gluings
+    for stage in range(2):
+        vert = the_map.root.c_from
+        v = 0
+        while vert != NULL:
+            edge = vert.root
+            for i in range(4):
+                if stage == 0:
+                    where[edge.label + num_edges] = 4 * v + i
+                else:
+                    view[v, i] = where[num_edges - edge.label]
+                edge = edge.next
+            vert = vert.next
+            v += 1
+    pmFreeMap(the_map)
+    return gluings
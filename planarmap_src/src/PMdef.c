@@ -3,6 +3,7 @@
 
 #include<stdio.h>
 #include<stdlib.h>
+#include<string.h>
 #include<math.h>
 
 #ifndef _MSC_VER
@@ -39,16 +40,34 @@ void pmFreeWrd(char *Wrd)
 pm_vertex *pmVtxSet;
 long pmNxtVtxNbr=-1;           
 
+/*
+When pmKeepMemory is set, pmFreeVtx and pmFreeEdge keep their arrays
+around to be reused by the next map, which saves reallocating them on
+every retry when sampling many maps; pmReleaseMemory frees them.
+*/
+int pmKeepMemory = FALSE;
+long pmVtxCapacity = 0, pmEdgeCapacity = 0;
+
 void pmCreateVtx(long n)
 {
-  pmVtxSet=(pm_vertex *)calloc(n,sizeof(pm_vertex));
-  if (pmVtxSet == NULL) pmMemoryFault();
+  if (pmVtxSet != NULL && n <= pmVtxCapacity)
+    memset(pmVtxSet, 0, n*sizeof(pm_vertex));
+  else {
+    free(pmVtxSet);
+    pmVtxSet=(pm_vertex *)calloc(n,sizeof(pm_vertex));
+    if (pmVtxSet == NULL) pmMemoryFault();
+    pmVtxCapacity = n;
+  }
   pmNxtVtxNbr=0;
 }
 
 void pmFreeVtx()
 {
-  free(pmVtxSet);
+  if (!pmKeepMemory){
+    free(pmVtxSet);
+    pmVtxSet = NULL;
+    pmVtxCapacity = 0;
+  }
   pmNxtVtxNbr=-1;
 }
 
@@ -83,17 +102,34 @@ pm_edge *pmEdgeSet;  long pmNxtEdgeNbr=-1;
 
 void pmCreateEdge(long n)
 {
-  pmEdgeSet=(pm_edge *)calloc(n,sizeof(pm_edge));
-  if (pmEdgeSet == NULL) pmMemoryFault();
+  if (pmEdgeSet != NULL && n <= pmEdgeCapacity)
+    memset(pmEdgeSet, 0, n*sizeof(pm_edge));
+  else {
+    free(pmEdgeSet);
+    pmEdgeSet=(pm_edge *)calloc(n,sizeof(pm_edge));
+    if (pmEdgeSet == NULL) pmMemoryFault();
+    pmEdgeCapacity = n;
+  }
   pmNxtEdgeNbr=0;
 }
 
 void pmFreeEdge()
 {
-  free(pmEdgeSet);
+  if (!pmKeepMemory){
+    free(pmEdgeSet);
+    pmEdgeSet = NULL;
+    pmEdgeCapacity = 0;
+  }
   pmNxtEdgeNbr=-1;
 }
 
+void pmReleaseMemory()
+{
+  pmKeepMemory = FALSE;
+  pmFreeVtx();
+  pmFreeEdge();
+}
+
 pm_edge *pmEmptyEdge()
 {
   return (pmEdgeSet+pmNxtEdgeNbr++);
@@ -325,6 +361,44 @@ void set_pmRandom_callback(long (*function)(long)){
     pmRandom_callback = function;
 }
 
+/*
+Alternatively, the numbers can come from a xoshiro256** generator
+whose state is owned by the caller, which avoids calling back into
+Python for every draw.  When pmRandom_state is NULL, the callback
+above is used.
+*/
+
+uint64_t *pmRandom_state = NULL;
+
+void pmSetRandomState(uint64_t *state){
+    pmRandom_state = state;
+}
+
+static inline uint64_t pmRotl(const uint64_t x, int k){
+    return (x << k) | (x >> (64 - k));
+}
+
+uint64_t pmNextRandom(uint64_t *s){
+    const uint64_t result = pmRotl(s[1] * 5, 7) * 9;
+    const uint64_t t = s[1] << 17;
+    s[2] ^= s[0];
+    s[3] ^= s[1];
+    s[1] ^= s[2];
+    s[0] ^= s[3];
+    s[2] ^= t;
+    s[3] = pmRotl(s[3], 45);
+    return result;
+}
+
 long pmRandom(long n){
-    return (*pmRandom_callback)(n);
+    uint64_t bound, threshold, r;
+    if (pmRandom_state == NULL)
+        return (*pmRandom_callback)(n);
+    /* Reject the lowest 2^64 mod n values so the result is unbiased. */
+    bound = (uint64_t) n;
+    threshold = (-bound) % bound;
+    do
+        r = pmNextRandom(pmRandom_state);
+    while (r < threshold);
+    return (long) (r % bound) + 1;
 }
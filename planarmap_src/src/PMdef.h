@@ -1,3 +1,5 @@
+#include <stdint.h>
+
 #define TRUE -1
 #define FALSE 0
 
@@ -166,3 +168,7 @@ extern int pmInitRND(pmMethod *Meth);
 extern long pmRandom(long n);
 extern int pmIsBloc();
 extern void set_pmRandom_callback(long (*function)(long));
+extern void pmSetRandomState(uint64_t *state);
+extern int pmKeepMemory;
+extern void pmReleaseMemory();
+extern uint64_t pmNextRandom(uint64_t *s);
@@ -177,7 +177,7 @@ long_description = open('README.rst').read()
 long_description = long_description.split('==\n')[1]
 long_description = long_description.split('\nDeveloped')[0]
 
-install_requires = ['decorator', 'networkx',
+install_requires = ['decorator', 'networkx', 'numpy',
                     'snappy_manifolds>=1.1.2', 'knot_floer_homology>=1.1']
 
 setup( name = 'spherogram',
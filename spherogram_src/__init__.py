@@ -22,9 +22,9 @@ __all__ = ['ABC', 'ClosedBraid', 'CyclicList', 'CyclicWord',
            'DTcodec', 'Digraph',
            'DirectedEdge', 'DirectedMultiEdge', 'Edge', 'FatEdge',
            'FatGraph', 'Graph',
-           'Link', 'MultiEdge', 'Poset', 'Presentation',
+           'Link', 'CompactLink', 'MultiEdge', 'Poset', 'Presentation',
            'Crossing', 'Strand', 'WhiteheadMove',
-           'Word', 'random_link',
+           'Word', 'random_link', 'random_links_stream', 'InvariantCache',
            # from spherogram.links.tangles:
            'Tangle', 'CapTangle', 'CupTangle', 'RationalTangle',
            'ZeroTangle', 'InfinityTangle', 'MinusOneTangle', 'OneTangle', 'IntegerTangle',
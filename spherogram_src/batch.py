@@ -0,0 +1,198 @@
+"""
+Computing invariants of many links at once.
+
+The links are farmed out to a pool of worker processes in chunks.
+Each link is shipped as a PD code packed into a byte string, which is
+far cheaper to pickle than the graph of Crossing objects making up a
+Link, and the results are handed back in the order the links were
+given, as soon as they are available.  An exception raised while
+computing one invariant of one link is recorded in the corresponding
+result rather than aborting the whole batch.
+
+>>> codes = ['K8a1', [(1,5,2,4),(3,1,4,6),(5,3,6,2)], 'DT: [(4,6,2)]',
+...          Link('L2a1')]
+>>> for r in compute_invariants(codes, ['linking_number', 'is_alternating']):
+...     print(r.values)
+{'linking_number': 0.0, 'is_alternating': True}
+{'linking_number': 0.0, 'is_alternating': True}
+{'linking_number': 0.0, 'is_alternating': True}
+{'linking_number': -1.0, 'is_alternating': True}
+>>> for r in compute_invariants(['K8a1', 'not a knot'],
+...                             ['is_alternating', 'nonexistent'], processes=0):
+...     print(r.values, r.errors)
+{'is_alternating': True} {'nonexistent': "AttributeError: 'Link' object has no attribute 'nonexistent'"}
+{} {'is_alternating': 'ValueError: No link by that name known', 'nonexistent': 'ValueError: No link by that name known'}
+
+The labels of a PD code need not be integers:
+
+>>> trefoil = [('x1', 'x5', 'x2', 'x4'), ('x3', 'x1', 'x4', 'x6'),
+...            ('x5', 'x3', 'x6', 'x2')]
+>>> for r in compute_invariants([trefoil, [(1, 2, 3), (3, 2, 1)]],
+...                             ['determinant'], processes=0):
+...     print(r.values, r.errors)
+{'determinant': 3} {}
+{} {'determinant': 'ValueError: Each crossing in a PD code needs 4 labels'}
+"""
+
+from collections import namedtuple, deque
+import concurrent.futures
+import itertools
+import os
+import numpy as np
+from .links import Link, CompactLink
+
+BatchResult = namedtuple('BatchResult', ['values', 'errors'])
+BatchResult.__doc__ = """
+The invariants of one link.  Here values maps the name of each invariant
+that was computed to its value, and errors maps the name of each one
+that failed to a string describing the exception.
+"""
+
+
+def _is_PD_code(code):
+    """
+    Tells a PD code, where every label occurs twice, from a DT code,
+    where every label occurs once.
+    """
+    if len(code) == 0:
+        return True
+    if isinstance(code[0], int):
+        return False
+    counts = dict()
+    for label in itertools.chain(*code):
+        counts[label] = counts.get(label, 0) + 1
+    return all(count == 2 for count in counts.values())
+
+
+def _pack(link):
+    """
+    Converts one of the inputs to compute_invariants into the form
+    shipped to the workers, namely a triple (spec, unlinked_unknots,
+    trusted) where spec is either a string or a PD code packed into
+    bytes.  Diagrams coming from a Link or CompactLink are trusted to
+    be planar.
+    """
+    if isinstance(link, (Link, CompactLink)):
+        code = link.PD_code()
+        return (_pack_PD(code), link.unlinked_unknot_components, True)
+    if isinstance(link, str):
+        return (link, 0, False)
+    if _is_PD_code(link):
+        # The Link constructor only uses the order of the labels, so
+        # replace them by their ranks, which also allows e.g. strings.
+        rank = {label: i for i, label in
+                enumerate(sorted(set(itertools.chain(*link))))}
+        return (_pack_PD([[rank[x] for x in X] for X in link]), 0, False)
+    if isinstance(link[0], int):
+        link = [tuple(link)]
+    return ('DT: %s' % [tuple(c) for c in link], 0, False)
+
+
+def _pack_PD(code):
+    code = np.asarray(code, dtype=np.int32)
+    if code.size and (code.ndim != 2 or code.shape[1] != 4):
+        raise ValueError('Each crossing in a PD code needs 4 labels')
+    return code.reshape(-1).tobytes()
+
+
+def _pack_or_error(link):
+    """
+    As _pack, but an input which can't be packed becomes the exception
+    raised, to be reported in its BatchResult.
+    """
+    try:
+        return _pack(link)
+    except Exception as e:
+        return (e, 0, False)
+
+
+def _unpack(spec, unlinked_unknots, trusted):
+    if isinstance(spec, Exception):
+        raise spec
+    if isinstance(spec, bytes):
+        code = np.frombuffer(spec, dtype=np.int32).reshape(-1, 4).tolist()
+        link = Link.from_PD(code, trusted=trusted)
+    else:
+        link = Link(spec)
+    link.unlinked_unknot_components += unlinked_unknots
+    return link
+
+
+def _invariant_name(invariant):
+    return invariant if isinstance(invariant, str) else invariant.__name__
+
+
+def _compute_one(packed, invariants):
+    values, errors = dict(), dict()
+    try:
+        link = _unpack(*packed)
+    except Exception as e:
+        message = '%s: %s' % (type(e).__name__, e)
+        for invariant in invariants:
+            errors[_invariant_name(invariant)] = message
+        return BatchResult(values, errors)
+
+    for invariant in invariants:
+        name = _invariant_name(invariant)
+        try:
+            if isinstance(invariant, str):
+                values[name] = getattr(link, invariant)()
+            else:
+                values[name] = invariant(link)
+        except Exception as e:
+            errors[name] = '%s: %s' % (type(e).__name__, e)
+    return BatchResult(values, errors)
+
+
+def _compute_chunk(chunk, invariants):
+    return [_compute_one(packed, invariants) for packed in chunk]
+
+
+def _chunks(links, chunksize):
+    links = iter(links)
+    while True:
+        chunk = [_pack_or_error(link)
+                 for link in itertools.islice(links, chunksize)]
+        if not chunk:
+            return
+        yield chunk
+
+
+def compute_invariants(links, invariants, processes=None, chunksize=16):
+    """
+    Computes the given invariants of each of the given links, yielding
+    a BatchResult for each link in the order they were given.
+
+    Each link can be a Link, a CompactLink, a PD code, a DT code (as a
+    list of tuples of even integers, or a single list for a knot) or
+    anything else accepted by the Link constructor as a string, for
+    instance a name or 'DT: ...'.  Each invariant is either the name of
+    a method of Link taking no arguments, such as 'determinant' or
+    'jones_polynomial', or a function taking a Link; such functions
+    must be defined at the top level of a module so that they can be
+    pickled.
+
+    The work is split into chunks of chunksize links, which are run on
+    a pool of the given number of worker processes, defaulting to one
+    per CPU.  Only a bounded number of chunks are in flight at once, so
+    links can be an arbitrarily long iterator.  With processes=0,
+    everything is computed in the current process.
+    """
+    invariants = list(invariants)
+    chunks = _chunks(links, chunksize)
+    if processes == 0:
+        for chunk in chunks:
+            yield from _compute_chunk(chunk, invariants)
+        return
+
+    if processes is None:
+        processes = os.cpu_count() or 1
+    with concurrent.futures.ProcessPoolExecutor(processes) as executor:
+        max_pending = 2 * processes
+        pending = deque()
+        for chunk in chunks:
+            pending.append(executor.submit(_compute_chunk, chunk, invariants))
+            if len(pending) >= max_pending:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
@@ -4,7 +4,9 @@ import sys
 from .links import Crossing, Strand, Link, ClosedBraid
 from .tangles import Tangle, CapTangle, CupTangle, RationalTangle, ZeroTangle, InfinityTangle, MinusOneTangle, OneTangle, IntegerTangle, IdentityBraid, ComponentTangle, join_strands
 from . import orthogonal
-from .random_links import random_link
+from .random_links import random_link, random_links_stream
+from .compact import CompactLink, BraidClosureBuilder
+from .invariant_cache import InvariantCache
 
 Link.view = orthogonal.orthogonal_draw
 
@@ -25,4 +27,5 @@ __all__ = ['Crossing', 'Strand', 'Link', 'ClosedBraid',
            'Tangle', 'CapTangle', 'CupTangle', 'RationalTangle',
            'ZeroTangle', 'InfinityTangle', 'MinusOneTangle', 'OneTangle', 'IntegerTangle',
            'IdentityBraid', 'join_strands',
-           'pdf_docs', 'random_link']
+           'pdf_docs', 'random_link', 'random_links_stream', 'CompactLink', 'BraidClosureBuilder',
+           'InvariantCache']
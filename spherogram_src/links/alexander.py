@@ -9,8 +9,14 @@ with some additional details drawn from conversations with him at said
 conference.
 """
 
+import concurrent.futures
+import itertools
 import random
+import numpy as np
 from .links_base import CrossingEntryPoint
+from .exhaust import plan_exhaustion
+from .laurent import LaurentPolynomial
+from .goeritz import _word_primes, _modular_inverse
 from ..sage_helper import _within_sage
 
 if _within_sage:
@@ -150,6 +156,114 @@ class DrorDatum():
         indices.merge(cs_a, cs_b)
 
 
+class SlotIndices():
+    """
+    Like StrandIndices, except that when two strands are merged, the
+    strand in the last slot is moved into the one freed up, so that
+    the other slots are left alone.
+    """
+    def __init__(self):
+        self.indices, self.members = dict(), []
+
+    def add_crossing(self, crossing):
+        for ce in entry_pts_ab(crossing):
+            self.indices[ce] = len(self.members)
+            self.members.append([ce])
+
+    def merge(self, a, b):
+        """
+        Merges the strands of a and b into the smaller of their two
+        slots, and returns the pair of slots, smaller first.
+        """
+        i, j = sorted((self[a], self[b]))
+        if i == j:
+            raise ClosedComponentCreated
+        for ce in self.members[j]:
+            self.indices[ce] = i
+        self.members[i] += self.members[j]
+        last = self.members.pop()
+        if j < len(self.members):
+            self.members[j] = last
+            for ce in last:
+                self.indices[ce] = j
+        return i, j
+
+    def __getitem__(self, cs):
+        return self.indices[cep(cs)]
+
+
+class ModularDrorDatum():
+    """
+    The DrorDatum evaluated at each of the given integer points t
+    modulo the prime p < 2^31, with no Sage and no fraction field.
+    Crossings are given by their signs and strands by their slots, as
+    in Exhaustion.program, so this can be shipped to another process.  The
+    matrix A is stored as an int64 array whose last axis runs over the
+    points, and is updated in place as crossings are added and strands
+    merged, growing by doubling when needed.  To avoid inverting mu at
+    every merge, the actual matrix is A divided by the scale, and omega
+    is kept as a numerator and a denominator.  If mu vanishes at a
+    point, the corresponding entry of good is set to False and the
+    values there are meaningless.
+    """
+    def __init__(self, points, p):
+        self.p = p
+        self.t = np.asarray(points, dtype=np.int64) % p
+        self.t_inverse = _inverse_mod(self.t, p)
+        self.good = self.t != 0
+        self.scale = np.ones_like(self.t)
+        self.numerator = np.ones_like(self.t)
+        self.denominator = np.ones_like(self.t)
+        self.A = np.zeros((8, 8, len(self.t)), dtype=np.int64)
+        self.size = 0
+
+    @property
+    def omega(self):
+        return self.numerator * _inverse_mod(self.denominator, self.p) % self.p
+
+    def add_crossing(self, sign):
+        n, p, s = self.size, self.p, self.scale
+        if n + 2 > len(self.A):
+            A = np.zeros((2 * (n + 2),) * 2 + (len(self.t),), dtype=np.int64)
+            A[:n, :n] = self.A[:n, :n]
+            self.A = A
+        A = self.A
+        A[n:n + 2, :n + 2] = 0
+        A[:n + 2, n:n + 2] = 0
+        T = self.t if sign == 1 else self.t_inverse
+        A[n, n] = s
+        A[n, n + 1] = (1 - T) * s % p
+        A[n + 1, n + 1] = T * s % p
+        self.size = n + 2
+
+    def merge(self, a, b):
+        """
+        Merges the strands in slots a and b as SlotIndices.merge does.
+        """
+        A, n, p, s = self.A, self.size, self.p, self.scale
+        alpha, beta, gamma, delta = (A[a, a].copy(), A[a, b].copy(),
+                                     A[b, a].copy(), A[b, b].copy())
+        # The actual mu is this divided by the scale.
+        mu = (s - beta) % p
+        self.good &= mu != 0
+        self.numerator = self.numerator * mu % p
+        self.denominator = self.denominator * s % p
+        self.scale = s * mu % p
+        theta, epsilon = A[a, :n].copy(), A[b, :n].copy()
+        phi, psi = A[:n, a].copy(), A[:n, b].copy()
+        A[:n, :n] = (A[:n, :n] * mu % p + psi[:, None] * theta[None] % p) % p
+        i, j = min(a, b), max(a, b)
+        A[i, :n] = (epsilon * mu % p + delta * theta % p) % p
+        A[:n, i] = (phi * mu % p + alpha * psi % p) % p
+        A[i, i] = (gamma * mu % p + alpha * delta % p) % p
+        # Move the last strand into the freed up slot j.
+        last = n - 1
+        if j != last:
+            A[j, :n] = A[last, :n]
+            A[:n, j] = A[:n, last]
+        self.size = last
+
+
 def num_overlap(crossing, frontier):
     neighbor_strands = set(cs.opposite() for cs in crossing.crossing_strands())
     return len(neighbor_strands.intersection(frontier))
@@ -164,18 +278,35 @@ class Exhaustion():
     to minimize the sizes of the frontiers of the intermediate tangles.
 
     If no initial crossing is specified, one is chosen at random.
+    Alternatively, the order in which to add the crossings can be
+    given, e.g. one found by exhaust.plan_exhaustion.
+
+    >>> from spherogram import Link
+    >>> L = Link('K12n123')
+    >>> width, order = plan_exhaustion(L, consecutive=False)
+    >>> Exhaustion(L, order=order).width == width
+    True
     """
-    def __init__(self, link, crossing=None):
-        if crossing is None:
+    def __init__(self, link, crossing=None, order=None):
+        if order is not None:
+            crossing = order[0]
+        elif crossing is None:
             crossing = random.choice(link.crossings)
         crossings = [crossing]
         gluings = [[]]
         frontier = set(crossing.crossing_strands())
         frontier_lengths = [4]
         while len(crossings) < len(link.crossings):
-            choices = [(num_overlap(cs.opposite()[0], frontier), cs) for cs in frontier]
-            overlap, cs = max(choices, key=lambda x: x[0])
-            C = cs.opposite().crossing
+            if order is None:
+                choices = [(num_overlap(cs.opposite()[0], frontier), cs)
+                           for cs in frontier]
+                overlap, cs = max(choices, key=lambda x: x[0])
+                C = cs.opposite().crossing
+            else:
+                C = order[len(crossings)]
+                overlap = num_overlap(C, frontier)
+                if overlap == 0:
+                    raise ValueError('Can not add the crossings in the given order')
             assert C not in crossings
             crossings.append(C)
             C_gluings = []
@@ -205,12 +336,14 @@ class Exhaustion():
         for a, b in all_gluings[:-1]:
             indices.merge(a, b)
 
-    def alexander_polynomial(self):
-        D = DrorDatum(self.link, self.crossings)
-        gluings = self.gluings[:]
+    def _run(self, D):
+        """
+        Feeds the crossings and gluings to the given DrorDatum and
+        returns the resulting omega.
+        """
         # The last crossing is special because we need to end at a
         # string link.
-        for C, gluings in list(zip(self.crossings, gluings))[:-1]:
+        for C, gluings in list(zip(self.crossings, self.gluings))[:-1]:
             D.add_crossing(C)
             for a, b in gluings:
                 D.merge(a, b)
@@ -219,8 +352,10 @@ class Exhaustion():
         D.add_crossing(C)
         for a, b in self.gluings[-1][:-1]:
             D.merge(a, b)
+        return D.omega
 
-        alex = D.omega
+    def alexander_polynomial(self):
+        alex = self._run(DrorDatum(self.link, self.crossings))
         p, q = alex.numerator(), alex.denominator()
         # make sure the denominator is +/- t^n
         assert [abs(c) for c in q.coefficients()] == [1]
@@ -229,6 +364,154 @@ class Exhaustion():
         t, e = p.parent().gen(), min(p.exponents())
         return p // t**e
 
+    def program(self):
+        """
+        The steps of _run in terms of plain integers, as used by
+        ModularDrorDatum: for each crossing in turn, its sign and the
+        list of pairs of slots of strands to merge.
+        """
+        indices, program = SlotIndices(), []
+        last = len(self.crossings) - 1
+        for k, (C, gluings) in enumerate(zip(self.crossings, self.gluings)):
+            indices.add_crossing(C)
+            merges = []
+            for a, b in (gluings[:-1] if k == last else gluings):
+                merges.append((indices[a], indices[b]))
+                indices.merge(a, b)
+            program.append((C.sign, merges))
+        return program
+
+    def modular_alexander_polynomial(self, chunk_size=256, processes=0):
+        """
+        The Alexander polynomial as a LaurentPolynomial in t, without
+        Sage.  Here omega is a Laurent polynomial whose exponents lie
+        between -n and n, where n is the number of crossings, so it is
+        found by evaluating t^n * omega at 2n + 1 points modulo a prime
+        and interpolating, with one more point to check the result.
+        Each run of chunk_size points is a separate task, whose memory
+        use only depends on chunk_size and the width of the exhaustion;
+        with processes other than 0 these are spread over a pool of
+        that many worker processes, or one per CPU if None.  Primes are
+        added, combining the results by the Chinese remainder theorem,
+        until this no longer changes the answer or the modulus exceeds
+        the a priori bound 4^n on the coefficients.
+
+        >>> from spherogram import Link
+        >>> E = Exhaustion(Link('K8n1'))
+        >>> E.modular_alexander_polynomial()
+        1 - 2*t + 3*t^2 - 2*t^3 + t^4
+        >>> E.modular_alexander_polynomial(chunk_size=4, processes=2)
+        1 - 2*t + 3*t^2 - 2*t^3 + t^4
+        """
+        program = self.program()
+        n = len(program)
+        N = 2 * n + 1
+        coeffs, modulus = [0] * N, 1
+        choices = random.Random(n)
+        executor = None
+        if processes != 0:
+            executor = concurrent.futures.ProcessPoolExecutor(processes)
+        try:
+            for p in _word_primes():
+                # Points where some mu vanishes are no good, so use a
+                # randomly placed run of consecutive points.
+                start = choices.randrange(1, p - N - 1)
+                points = np.arange(start, start + N + 1, dtype=np.int64)
+                chunks = [points[k:k + chunk_size]
+                          for k in range(0, N + 1, chunk_size)]
+                if executor is None:
+                    values = [_omega_mod_p(program, chunk, p) for chunk in chunks]
+                else:
+                    values = list(executor.map(_omega_mod_p, itertools.repeat(program),
+                                               chunks, itertools.repeat(p)))
+                if any(v is None for v in values):
+                    continue
+                values = np.concatenate(values)
+                residues = _interpolate_mod_p(values[:N], start, p).tolist()
+                check = 0
+                for c in reversed(residues):
+                    check = (check * (start + N) + c) % p
+                if check != values[N]:
+                    raise RuntimeError('Interpolation of omega failed to verify')
+                inverse = _modular_inverse(modulus, p)
+                new = [x + modulus * ((r - x) * inverse % p)
+                       for x, r in zip(coeffs, residues)]
+                old_modulus, modulus = modulus, modulus * p
+                stable = _symmetric(coeffs, old_modulus) == _symmetric(new, modulus)
+                coeffs = new
+                if stable or modulus > 2 * 4**n:
+                    break
+        finally:
+            if executor is not None:
+                executor.shutdown()
+        coeffs = _symmetric(coeffs, modulus)
+        exponents = [e for e, c in enumerate(coeffs) if c]
+        if not exponents:
+            return LaurentPolynomial(0, 't')
+        low, high = min(exponents), max(exponents)
+        sign = 1 if coeffs[high] > 0 else -1
+        return LaurentPolynomial({e - low: sign * coeffs[e] for e in exponents},
+                                 't')
+
+
+def _omega_mod_p(program, points, p):
+    """
+    The values of t^n * omega modulo p at the given points, where n is
+    the number of crossings, or None if some mu vanishes at one of them.
+    """
+    D = ModularDrorDatum(points, p)
+    for sign, merges in program:
+        D.add_crossing(sign)
+        for a, b in merges:
+            D.merge(a, b)
+    if not D.good.all():
+        return None
+    return D.omega * _power_mod(D.t, len(program), p) % p
+
+
+def _power_mod(x, e, p):
+    """
+    The entries of the int64 array x to the power e modulo p < 2^31.
+    """
+    ans, x = np.ones_like(x), x % p
+    while e:
+        if e & 1:
+            ans = ans * x % p
+        x, e = x * x % p, e >> 1
+    return ans
+
+
+def _inverse_mod(x, p):
+    """
+    The inverses modulo the prime p of the entries of the int64 array x,
+    with 0 for those divisible by p.
+    """
+    return _power_mod(x, p - 2, p)
+
+
+def _interpolate_mod_p(values, start, p):
+    """
+    The coefficients, lowest degree first, of the polynomial of degree
+    less than N taking values[k] at start + k modulo p, found from the
+    Newton form, where all the divided differences have spacing 1.
+    """
+    c = np.asarray(values, dtype=np.int64) % p
+    N = len(c)
+    for j in range(1, N):
+        c[j:] = (c[j:] - c[j - 1:-1]) * pow(j, p - 2, p) % p
+    poly = np.zeros(N, dtype=np.int64)
+    poly[0] = c[N - 1]
+    for k in range(N - 2, -1, -1):
+        shifted = np.zeros_like(poly)
+        shifted[1:] = poly[:-1]
+        poly = (shifted - (start + k) * poly % p) % p
+        poly[0] = (poly[0] + c[k]) % p
+    return poly
+
+
+def _symmetric(coeffs, modulus):
+    return [c - modulus if 2 * c > modulus else c for c in coeffs]
+
 
 def good_exhaustion(link, max_failed_tries=20):
     """
@@ -249,10 +532,43 @@ def good_exhaustion(link, max_failed_tries=20):
     return E_best
 
 
-def alexander(K):
-    c = len(K.crossings)
-    if c < 100:
+def planned_exhaustion(link, beam_width=32, time_budget=1.0):
+    """
+    An Exhaustion in the order found by exhaust.plan_exhaustion.
+    """
+    width, order = plan_exhaustion(link, False, beam_width, time_budget)
+    ans = Exhaustion(link, order=order)
+    if ans.width != width:
+        raise RuntimeError('The planned order gives width %d rather than %d'
+                           % (ans.width, width))
+    return ans
+
+
+def alexander(K, exhaustion=None, method=None, chunk_size=256, processes=0):
+    """
+    The exhaustion used can be given, e.g. one from planned_exhaustion
+    whose width has been checked beforehand.  The method is either
+    'sage', working over the fraction field of ZZ[t], or 'modular', see
+    Exhaustion.modular_alexander_polynomial, which returns a
+    LaurentPolynomial and is the default outside of Sage.  The
+    chunk_size and processes are passed on to the latter.
+
+    >>> from spherogram import Link
+    >>> alexander(Link('K4a1'), method='modular')
+    1 - 3*t + t^2
+    >>> alexander(Link('K8n1'), method='modular', chunk_size=8, processes=2)
+    1 - 2*t + 3*t^2 - 2*t^3 + t^4
+    """
+    if exhaustion is not None:
+        E = exhaustion
+    elif len(K.crossings) < 100:
         E = Exhaustion(K)
     else:
-        E = good_exhaustion(K, max(20, 0.15 * c))
+        E = good_exhaustion(K, max(20, 0.15 * len(K.crossings)))
+    if method is None:
+        method = 'sage' if _within_sage else 'modular'
+    if method == 'modular':
+        return E.modular_alexander_polynomial(chunk_size, processes)
+    if method != 'sage':
+        raise ValueError("Available methods are 'sage' and 'modular'")
     return E.alexander_polynomial()
@@ -0,0 +1,149 @@
+"""
+Canonical encodings of link diagrams up to planar isotopy.
+
+Once a crossing has been oriented, its strands are numbered so that 0
+is the incoming understrand, and so each crossing carries a canonical
+local frame.  Hence starting a breadth-first traversal at a crossing,
+labeling the crossings in the order they are found and scanning the
+strands of each crossing in the order 0, 1, 2, 3, gives an encoding of
+the diagram which only depends on the starting crossing.  The
+canonical code is the lexicographically smallest of these.  The
+traversals are run one after the other, and each is abandoned as soon
+as it is known to produce something larger than the best so far,
+which for typical diagrams happens within a few steps.
+
+Split diagrams are encoded one connected piece at a time; how the
+pieces are nested in the plane is not recorded.
+"""
+
+import numpy as np
+
+
+def _rooted_code(root, best=None):
+    """
+    The encoding of the connected piece containing root from a
+    breadth-first traversal starting there, together with the labels of
+    the crossings.  If best is given, returns None as soon as the code
+    is known to be larger than it.
+    """
+    labels = {root: 0}
+    order = [root]
+    code = []
+    smaller = best is None
+    i = 0
+    while i < len(order):
+        C = order[i]
+        i += 1
+        entries = [1 if C.sign == 1 else 0]
+        for s in range(4):
+            D, d = C.adjacent[s]
+            if D not in labels:
+                labels[D] = len(order)
+                order.append(D)
+            entries.append(4 * labels[D] + d)
+        for x in entries:
+            if not smaller:
+                y = best[len(code)]
+                if x > y:
+                    return None
+                smaller = x < y
+            code.append(x)
+    return code, labels
+
+
+def _pieces(link):
+    """
+    The crossings of each connected piece of the diagram.
+    """
+    seen, pieces = set(), []
+    for C in link.crossings:
+        if C not in seen:
+            seen.add(C)
+            piece, i = [C], 0
+            while i < len(piece):
+                for D, d in piece[i].adjacent:
+                    if D not in seen:
+                        seen.add(D)
+                        piece.append(D)
+                i += 1
+            pieces.append(piece)
+    return pieces
+
+
+def _canonical_piece(piece):
+    """
+    Returns the minimal code of the piece, prefixed by its number of
+    crossings, and the labelings of the crossings realizing it.
+    """
+    best, labelings = None, []
+    for C in piece:
+        ans = _rooted_code(C, best)
+        if ans is None:
+            continue
+        code, labels = ans
+        if best is None or code < best:
+            best, labelings = code, [labels]
+        else:
+            labelings.append(labels)
+    return [len(piece)] + best, labelings
+
+
+def _component_ids(link, labels, components):
+    """
+    For each of the given components, the smallest label of the form
+    4 * crossing label + strand index along it.
+    """
+    return [min(4 * labels[cep.crossing] + cep.strand_index for cep in comp)
+            for comp in components]
+
+
+def canonical_code_list(link, ordered_components=False):
+    """
+    The canonical code as a list of integers.  If ordered_components is
+    True, the order of link.link_components is also encoded, by
+    appending the position in the canonical labeling of each component
+    in turn.
+    """
+    pieces = []
+    for piece in _pieces(link):
+        code, labelings = _canonical_piece(piece)
+        if ordered_components:
+            crossings = set(piece)
+            indices = [k for k, comp in enumerate(link.link_components)
+                       if comp[0].crossing in crossings]
+            comps = [link.link_components[k] for k in indices]
+            ids = min(_component_ids(link, labels, comps)
+                      for labels in labelings)
+            pieces.append((code, indices, ids))
+        else:
+            pieces.append((code, None, None))
+    pieces.sort()
+    ans = [len(link.crossings), link.unlinked_unknot_components]
+    for code, indices, ids in pieces:
+        ans += code
+    if ordered_components:
+        position = dict()
+        for p, (code, indices, ids) in enumerate(pieces):
+            for k, i in zip(indices, ids):
+                position[k] = (p, i)
+        for k in range(len(link.link_components)):
+            ans += position[k]
+    return ans
+
+
+def pack_code(code):
+    """
+    Packs a list of non-negative integers into bytes, as big-endian
+    integers of 2 or 4 bytes each, with the width recorded in the first
+    byte.
+    """
+    if max(code, default=0) < 2**16:
+        return b'\x02' + np.asarray(code, dtype='>u2').tobytes()
+    return b'\x04' + np.asarray(code, dtype='>u4').tobytes()
+
+
+def canonical_code(link, ordered_components=False):
+    """
+    See Link.canonical_code.
+    """
+    return pack_code(canonical_code_list(link, ordered_components))
@@ -0,0 +1,694 @@
+"""
+A compact, array-based representation of oriented link diagrams.
+
+A Link stores each crossing as a Python object, together with lists
+of (Crossing, int) pairs describing how the crossings are glued
+together, and creates CrossingStrands and CrossingEntryPoints on the
+fly.  That is convenient for manipulating a single diagram, but costs
+on the order of a kilobyte per crossing.  A CompactLink instead keeps
+the same information in a few NumPy arrays, so that millions of
+diagrams can be held in memory and basic invariants computed without
+creating any Crossing objects.
+
+Throughout, the strand i of crossing c is encoded by the single
+integer 4*c + i, which we call a "flat strand".  With this encoding:
+
+* gluings[c, i] is the flat strand that strand i of crossing c is
+  attached to, i.e. the array version of Crossing.adjacent.
+
+* signs[c] is the sign of crossing c.  All crossings are oriented
+  following the conventions of "doc.pdf": the understrand enters at
+  0 and the overstrand enters at 3 if the sign is +1 and at 1 if it
+  is -1.
+
+* component_starts[k] is the flat strand of the CrossingEntryPoint
+  where the kth link component begins.
+"""
+
+import array
+import numpy as np
+from .links import Crossing, CrossingEntryPoint, Link
+from .links_base import Labels, LinkComponents
+
+
+def _over_entry(signs):
+    """
+    The strand index where the overstrand enters each crossing.
+    """
+    return np.where(signs == 1, 3, 1)
+
+
+def _component_starts_from_PD(code, flat, ends, first, glue):
+    """
+    The array version of Link._component_starts_from_PD, which see.
+    Here flat is the flattened code, ends its sorted entries, first the
+    flat position where each label first appears and glue the pairing
+    of flat positions.  The answer is a list of flat strands, each
+    being where the component leaves the crossing containing its
+    minimal label.
+    """
+    code, flat, glue = code.tolist(), flat.tolist(), glue.tolist()
+    labels = ends[0::2].tolist()
+    where = dict(zip(labels, first.tolist()))
+    unused = set(labels)
+    starts = []
+    for m in labels:
+        if m not in unused:
+            continue
+        unused.remove(m)
+        f1 = where[m]
+        f2 = glue[f1]
+        (c1, i1), (c2, i2) = divmod(f1, 4), divmod(f2, 4)
+        if c1 == c2:
+            next_label = min(set(code[c1]) - set([m]))
+            direction = 4 * c1 + code[c1].index(next_label)
+        else:
+            d1, d2 = 4 * c1 + (i1 + 2) % 4, 4 * c2 + (i2 + 2) % 4
+            l1, l2 = flat[d1], flat[d2]
+            if l1 < l2:
+                next_label, direction = l1, d1
+            elif l2 < l1:
+                next_label, direction = l2, d2
+            else:
+                next_label = l1
+                direction = d2 if d2 % 2 == 1 else d1
+        starts.append(direction)
+        while next_label != m:
+            unused.remove(next_label)
+            other = glue[direction]
+            direction = (other & ~3) | ((other + 2) & 3)
+            next_label = flat[direction]
+    return starts
+
+
+def _orient_from_starts(glue, starts):
+    """
+    The array version of Link._orient_crossings.  Each start is a flat
+    strand where a component leaves a crossing; returns a boolean
+    array recording which flat strands are incoming.
+    """
+    glue = glue.tolist()
+    incoming = [False] * len(glue)
+    for start in starts:
+        s = start
+        while True:
+            d = glue[s]
+            s = (d & ~3) | ((d + 2) & 3)
+            if incoming[s]:
+                raise ValueError('Can only orient a strand once.')
+            incoming[d] = True
+            if s == start:
+                break
+    if 2 * sum(incoming) != len(glue):
+        raise ValueError('Every component needs a start')
+    return np.array(incoming, dtype=bool)
+
+
+def _orientation_starts(glue):
+    """
+    One flat strand on each component, namely the smallest one, for
+    the component to leave its crossing through.
+    """
+    glue = glue.tolist()
+    seen = [False] * len(glue)
+    starts = []
+    for start in range(len(glue)):
+        if seen[start]:
+            continue
+        starts.append(start)
+        s = start
+        while not seen[s]:
+            d = glue[s]
+            seen[s] = seen[d] = True
+            s = (d & ~3) | ((d + 2) & 3)
+    return starts
+
+
+class CompactLink():
+    """
+    An oriented link diagram stored as NumPy arrays; see the module
+    docstring for the encoding.  Converting to and from a Link
+    preserves the order of the crossings, the orientations and order
+    of the components, and the labels of the PD code.  The labels of
+    the crossings themselves are not stored.
+
+    >>> L = Link('L13n11308')
+    >>> C = CompactLink.from_link(L)
+    >>> C
+    <CompactLink L13n11308: 5 comp; 13 cross>
+    >>> C.gluings.shape, C.gluings.dtype, C.signs.dtype
+    ((13, 4), dtype('int32'), dtype('int8'))
+    >>> C.PD_code() == L.PD_code()
+    True
+    >>> C.to_link().PD_code() == L.PD_code()
+    True
+    >>> C.writhe() == L.writhe(), C.linking_number() == L.linking_number()
+    (True, True)
+    >>> [len(c) for c in C.link_components()]
+    [4, 4, 4, 6, 8]
+    >>> len(C.faces()) == len(L.faces()) == len(L) + 2
+    True
+
+    A CompactLink can also be built directly from a PD code, in which
+    case the components are ordered and oriented exactly as they would
+    be by Link.
+
+    >>> code = [(8,3,1,4), (2,6,3,5), (6,2,7,1), (4,7,5,8)]
+    >>> CompactLink.from_PD_code(code).PD_code() == Link(code).PD_code()
+    True
+    """
+
+    def __init__(self, gluings, signs, component_starts,
+                 unlinked_unknot_components=0, name=None):
+        self.gluings = np.asarray(gluings, dtype=np.int32).reshape((-1, 4))
+        self.signs = np.asarray(signs, dtype=np.int8)
+        self.component_starts = np.asarray(component_starts, dtype=np.int32)
+        self.unlinked_unknot_components = unlinked_unknot_components
+        self.name = name
+        if len(self.signs) != len(self.gluings):
+            raise ValueError('Need exactly one sign per crossing')
+
+    @classmethod
+    def from_link(cls, link):
+        """
+        Encode the given Link, all of whose crossings must be oriented.
+        """
+        index = {C: i for i, C in enumerate(link.crossings)}
+        n = len(link.crossings)
+        gluings = np.empty((n, 4), dtype=np.int32)
+        signs = np.empty(n, dtype=np.int8)
+        for i, C in enumerate(link.crossings):
+            if C.sign == 0:
+                raise ValueError('Crossings must be oriented')
+            signs[i] = C.sign
+            gluings[i] = [4 * index[D] + j for D, j in C.adjacent]
+        starts = [4 * index[comp[0].crossing] + comp[0].strand_index
+                  for comp in link.link_components]
+        return cls(gluings, signs, starts,
+                   link.unlinked_unknot_components, link.name)
+
+    @classmethod
+    def from_PD_code(cls, code):
+        """
+        Build the diagram directly from a PD code, following the same
+        conventions as Link for ordering and orienting the components,
+        but without creating any Crossing objects.
+
+        >>> code = [(1,7,2,6), (7,4,8,5), (3,8,0,9), (5,3,6,2), (9,0,4,1)]
+        >>> C = CompactLink.from_PD_code(code)
+        >>> C.PD_code() == Link(code).PD_code()
+        True
+        >>> CompactLink.from_PD_code([(1, 2, 3, 4)])
+        Traceback (most recent call last):
+            ...
+        ValueError: PD code isn't consistent
+        """
+        code = np.asarray(code, dtype=np.int64).reshape((-1, 4))
+        n = len(code)
+        if n == 0:
+            return cls(np.empty((0, 4)), [], [])
+        flat = code.ravel()
+        order = np.argsort(flat, kind='stable')
+        ends = flat[order]
+        if (np.any(ends[0::2] != ends[1::2]) or
+                np.any(ends[1:-1:2] == ends[2::2])):
+            raise ValueError("PD code isn't consistent")
+        first, second = order[0::2], order[1::2]
+        glue = np.empty(4 * n, dtype=np.int64)
+        glue[first], glue[second] = second, first
+
+        starts = _component_starts_from_PD(code, flat, ends, first, glue)
+        return cls._from_glue(glue, starts)
+
+    @classmethod
+    def from_gluings(cls, gluings):
+        """
+        Build the diagram from an array of shape (n, 4) whose entry
+        [c, i] is the flat strand that strand i of crossing c is glued
+        to, where at each crossing the understrand joins 0 and 2, as
+        produced by planarmap.random_map(..., output='gluings').  Each
+        component is oriented so that it leaves the crossing of its
+        smallest flat strand there, with the components ordered by that
+        strand.  Planarity is not checked.
+
+        >>> L = Link('L8n1')
+        >>> C = CompactLink.from_gluings(CompactLink.from_link(L).gluings)
+        >>> C
+        <CompactLink: 2 comp; 8 cross>
+        >>> abs(C.linking_number()) == abs(L.linking_number())
+        True
+        """
+        glue = np.asarray(gluings, dtype=np.int64).ravel()
+        n = len(glue) // 4
+        if n == 0:
+            return cls(np.empty((0, 4)), [], [])
+        if np.any(glue[glue] != np.arange(4 * n)):
+            raise ValueError('Gluings must pair up the strands')
+        return cls._from_glue(glue, _orientation_starts(glue))
+
+    @classmethod
+    def from_braid_closure(cls, word, num_strands=None):
+        """
+        The closure of the given braid word, which can be any iterable
+        of generators; see BraidClosureBuilder.
+
+        >>> CompactLink.from_braid_closure([1, -2, 1, -2])
+        <CompactLink: 1 comp; 4 cross>
+        """
+        builder = BraidClosureBuilder(num_strands or 0)
+        builder.extend(word)
+        return builder.compact_link()
+
+    @classmethod
+    def _from_glue(cls, glue, starts):
+        """
+        The diagram with the given flat gluings, where the components
+        leave the given starts.
+        """
+        n = len(glue) // 4
+        incoming = _orient_from_starts(glue, starts)
+
+        # Rotate each crossing so its understrand enters at 0, exactly
+        # as Crossing.orient does.
+        strand_index = np.arange(4 * n) % 4
+        rot = np.where(incoming.reshape((n, 4))[:, 0], 0, 2)
+        shift = np.repeat(rot, 4)
+        new_flat = (np.arange(4 * n) & ~3) + (strand_index - shift) % 4
+        gluings = np.empty(4 * n, dtype=np.int64)
+        gluings[new_flat] = new_flat[glue]
+        new_incoming = np.empty(4 * n, dtype=bool)
+        new_incoming[new_flat] = incoming
+        signs = np.where(new_incoming.reshape((n, 4))[:, 3], 1, -1)
+
+        # Turn the starts into entry points on the same strand.
+        over = _over_entry(signs)
+        starts = [4 * (s // 4) + (0 if s % 2 == 0 else over[s // 4])
+                  for s in starts]
+        ans = cls(gluings.reshape((n, 4)), signs, starts)
+        ans._fix_DT_convention()
+        return ans
+
+    def to_link(self):
+        """
+        Return the corresponding Link.
+        """
+        crossings = [Crossing(i) for i in range(len(self))]
+        for c, row in enumerate(self.gluings.tolist()):
+            for i, s in enumerate(row):
+                crossings[c].adjacent[i] = (crossings[s >> 2], s & 3)
+        for C, sign in zip(crossings, self.signs.tolist()):
+            C.make_tail(0)
+            C.make_tail(3 if sign == 1 else 1)
+            C.orient()
+        starts = [CrossingEntryPoint(crossings[s >> 2], s & 3)
+                  for s in self.component_starts.tolist()]
+        link = Link(crossings, check_planarity=False, build=False)
+        labels, comps = self._strand_labels()
+        if self._DT_convention_holds(labels):
+            self._set_components(link, labels, comps)
+        else:
+            link._build(component_starts=starts)
+        link.unlinked_unknot_components = self.unlinked_unknot_components
+        link.name = self.name
+        return link
+
+    def _set_components(self, link, labels, comps):
+        """
+        Fill in the components and strand labels of the Link made from
+        self, exactly as Link._build_components does when given our
+        component starts, without walking the crossings again.
+        """
+        crossings = link.crossings
+        link.labels = link_labels = Labels()
+        link.link_components = components = LinkComponents()
+        for component in self.link_components():
+            component = [CrossingEntryPoint(crossings[s >> 2], s & 3)
+                         for s in component.tolist()]
+            components.append(component)
+            for cep in component:
+                link_labels.add(cep)
+        labels, comps = labels.tolist(), comps.tolist()
+        for c, C in enumerate(crossings):
+            C.strand_labels[:] = labels[4 * c:4 * c + 4]
+            C.strand_components[:] = comps[4 * c:4 * c + 4]
+        link._crossing_indices = {C: i for i, C in enumerate(crossings)}
+        link._component_positions = {cep: (k, i)
+                                     for k, component in enumerate(components)
+                                     for i, cep in enumerate(component)}
+
+    def __len__(self):
+        return len(self.signs)
+
+    def __repr__(self):
+        name = ' ' + self.name if self.name else ''
+        return '<CompactLink%s: %d comp; %d cross>' % (
+            name, len(self.component_starts), len(self))
+
+    def _next_entry(self):
+        """
+        For every flat strand s = 4*c + e, the flat strand reached by
+        continuing straight through crossing c and along the following
+        edge.  When s is an entry point, this is CrossingEntryPoint.next.
+        """
+        return self.gluings[:, [2, 3, 0, 1]].ravel()
+
+    def link_components(self):
+        """
+        The link components, each given as an array of the flat
+        strands of its entry points, in order.
+        """
+        nxt = self._next_entry().tolist()
+        components = []
+        for start in self.component_starts.tolist():
+            component = [start]
+            s = nxt[start]
+            while s != start:
+                component.append(s)
+                s = nxt[s]
+            components.append(np.array(component, dtype=np.int32))
+        return components
+
+    def _strand_labels(self):
+        """
+        The PD labels of all flat strands, together with the index of
+        the component each flat strand lies on.
+        """
+        labels = np.empty(4 * len(self), dtype=np.int64)
+        comps = np.empty(4 * len(self), dtype=np.int64)
+        opposite = self.gluings.ravel()
+        offset = 0
+        for k, component in enumerate(self.link_components()):
+            these = np.arange(offset, offset + len(component))
+            labels[component] = these
+            labels[opposite[component]] = these
+            comps[component] = comps[opposite[component]] = k
+            offset += len(component)
+        return labels, comps
+
+    def _DT_convention_holds(self, labels):
+        """
+        Whether each crossing has both an odd and even incoming strand
+        with respect to the given strand labels.
+        """
+        under = 4 * np.arange(len(self))
+        over = under + _over_entry(self.signs)
+        return bool(np.all((labels[under] + labels[over]) % 2 == 1))
+
+    def _fix_DT_convention(self):
+        """
+        Shift the component starts, exactly as Link._build_components
+        does, if they violate the DT convention that each crossing
+        has both an odd and even incoming strand.
+        """
+        n = len(self)
+        if n == 0:
+            return
+        labels, _ = self._strand_labels()
+        if self._DT_convention_holds(labels):
+            return
+
+        # Reproduce the parities of the labels Link._build_components
+        # chooses when no starts are given.  Each connected piece of
+        # the diagram is anchored at its last entry point, in the order
+        # of Link.crossing_entries, which gets an even label.
+        under = 4 * np.arange(n)
+        over = under + _over_entry(self.signs)
+        components = self.link_components()
+        comp_of = np.empty(4 * n, dtype=np.int64)
+        position = np.empty(4 * n, dtype=np.int64)
+        for k, component in enumerate(components):
+            comp_of[component] = k
+            position[component] = np.arange(len(component))
+        comp_of, position = comp_of.tolist(), position.tolist()
+        over_of = {}
+        for c, o in enumerate(over.tolist()):
+            over_of[4 * c] = o
+            over_of[o] = 4 * c
+        entries = np.column_stack([under, over]).ravel().tolist()
+        shift = [None] * len(components)
+        while None in shift:
+            anchor = next(s for s in reversed(entries)
+                          if shift[comp_of[s]] is None)
+            shift[comp_of[anchor]] = position[anchor] % 2
+            todo = [comp_of[anchor]]
+            while todo:
+                k = todo.pop()
+                for s in components[k].tolist():
+                    o = over_of[s]
+                    j = comp_of[o]
+                    if shift[j] is None:
+                        shift[j] = (1 + position[s] + shift[k] + position[o]) % 2
+                        todo.append(j)
+        nxt = self._next_entry()
+        starts = [s if (position[s] + shift[comp_of[s]]) % 2 == 0 else nxt[s]
+                  for s in self.component_starts.tolist()]
+        self.component_starts = np.array(starts, dtype=np.int32)
+
+    def PD_code(self, KnotTheory=False, min_strand_index=0):
+        """
+        The planar diagram code, which agrees with Link.PD_code.
+        """
+        labels, _ = self._strand_labels()
+        PD = (labels + min_strand_index).reshape((-1, 4)).tolist()
+        if KnotTheory:
+            return "PD" + repr(PD).replace('[', 'X[')[1:]
+        return [tuple(x) for x in PD]
+
+    def faces(self):
+        """
+        The faces of the diagram, each given as an array of flat
+        strands s = 4*c + i denoting the corner of crossing c between
+        strands i and i + 1, as one goes around the face *clockwise*;
+        compare Link.faces.
+        """
+        next_corner = self.gluings[:, [1, 2, 3, 0]].ravel().tolist()
+        seen = [False] * len(next_corner)
+        faces = []
+        for start in range(len(next_corner)):
+            if not seen[start]:
+                face = [start]
+                seen[start] = True
+                s = next_corner[start]
+                while s != start:
+                    face.append(s)
+                    seen[s] = True
+                    s = next_corner[s]
+                faces.append(np.array(face, dtype=np.int32))
+        return faces
+
+    def writhe(self):
+        """
+        The sum of the signs of the crossings.
+
+        >>> CompactLink.from_PD_code([(4,1,5,2), (6,4,7,3), (8,5,1,6), (2,8,3,7)]).writhe()
+        0
+        """
+        return int(self.signs.sum(dtype=np.int64))
+
+    def linking_number(self):
+        """
+        The sum of the linking numbers of all pairs of components, with
+        the same conventions as Link.linking_number.
+        """
+        if len(self) == 0:
+            return 0.0
+        _, comps = self._strand_labels()
+        under = 4 * np.arange(len(self))
+        over = under + _over_entry(self.signs)
+        mixed = comps[under] != comps[over]
+        return int(self.signs[mixed].sum(dtype=np.int64)) / 2
+
+    def linking_matrix(self):
+        """
+        The matrix of linking numbers of pairs of components, as an
+        integer array; see linking_matrices.
+        """
+        return linking_matrices([self])[0]
+
+
+def _crossing_components(link):
+    """
+    The signs of the crossings of a Link or CompactLink, together with
+    the indices of the components of the under and over strands at
+    each, and the number of components.
+    """
+    if isinstance(link, CompactLink):
+        _, comps = link._strand_labels()
+        under = 4 * np.arange(len(link))
+        over = under + _over_entry(link.signs)
+        return link.signs, comps[under], comps[over], len(link.component_starts)
+    positions = link._component_position()
+    crossings = link.crossings
+    signs = np.array([C.sign for C in crossings], dtype=np.int64)
+    comps = np.array([[positions[cep][0] for cep in C.entry_points()]
+                      for C in crossings], dtype=np.int64).reshape((-1, 2))
+    return signs, comps[:, 0], comps[:, 1], len(link.link_components)
+
+
+def linking_matrices(links):
+    """
+    The linking matrices of the given Links or CompactLinks, as integer
+    arrays.  The signs of the crossings between distinct components of
+    all the links are accumulated in a single pass into one flat array
+    holding every matrix.
+
+    >>> [M.tolist() for M in linking_matrices([Link('L7a7'), Link('K3a1')])]
+    [[[0, 1, 1], [1, 0, -1], [1, -1, 0]], [[0]]]
+    >>> CompactLink.from_link(Link('L8n4')).linking_matrix().tolist()
+    [[0, 1, -1], [1, 0, 2], [-1, 2, 0]]
+    """
+    data = [_crossing_components(link) for link in links]
+    if not data:
+        return []
+    sizes = np.array([k for _, _, _, k in data], dtype=np.int64)
+    offsets = np.concatenate([[0], np.cumsum(sizes * sizes)])
+    signs = np.concatenate([d[0] for d in data] + [[]]).astype(np.int64)
+    under = np.concatenate([d[1] for d in data] + [[]]).astype(np.int64)
+    over = np.concatenate([d[2] for d in data] + [[]]).astype(np.int64)
+    which = np.repeat(np.arange(len(data)), [len(d[0]) for d in data])
+    mixed = under != over
+    base, k = offsets[which][mixed], sizes[which][mixed]
+    under, over, signs = under[mixed], over[mixed], signs[mixed]
+    flat = np.zeros(offsets[-1], dtype=np.int64)
+    np.add.at(flat, base + under * k + over, signs)
+    np.add.at(flat, base + over * k + under, signs)
+    flat //= 2
+    return [flat[offsets[i]:offsets[i + 1]].reshape((size, size))
+            for i, size in enumerate(sizes.tolist())]
+
+
+class BraidClosureBuilder():
+    """
+    Builds the closure of a braid in a single pass over its word,
+    writing the gluings and signs of each crossing straight into flat
+    arrays.  Generators are added one at a time, so arbitrarily long
+    words can be streamed in without ever being stored, and the
+    number of strands grows as needed.  The conventions are those of
+    Link(braid_closure=...): 1, 2, 3, ... are the generators sigma_1,
+    sigma_2, sigma_3, ..., negative numbers their inverses, and the
+    components are oriented consistently with the braid.  The
+    resulting diagram has the same crossings in the same order as
+    that one, though its components may be ordered differently.
+
+    >>> B = BraidClosureBuilder()
+    >>> B.extend(iter([1, 2, -1, -2]))
+    >>> C = B.compact_link()
+    >>> C, C.signs.tolist()
+    (<CompactLink: 1 comp; 4 cross>, [1, 1, -1, -1])
+    >>> B.append(1)
+    >>> B.compact_link(), len(C)
+    (<CompactLink: 2 comp; 5 cross>, 4)
+    >>> L = Link(braid_closure=[1, 1, 1, 2, -1, 2])
+    >>> K = Link.from_braid_closure([1, 1, 1, 2, -1, 2])
+    >>> K.signature() == L.signature(), K.linking_number() == L.linking_number()
+    (True, True)
+    >>> BraidClosureBuilder(num_strands=3).compact_link().unlinked_unknot_components
+    3
+    """
+
+    def __init__(self, num_strands=0):
+        self.glue = array.array('q')
+        self.signs = array.array('b')
+        # The flat strand leaving the braid at the bottom of each
+        # position so far, or None if no crossing has touched it yet
+        # in which case it is in tops instead.
+        self.bottoms = []
+        # The flat strand entering the braid at the top of each position.
+        self.tops = []
+        # Which top position the strand currently at each position began at.
+        self.strand_at = []
+        self._add_strands(num_strands)
+
+    def __len__(self):
+        return len(self.signs)
+
+    def _add_strands(self, num_strands):
+        for p in range(len(self.tops), num_strands):
+            self.tops.append(None)
+            self.bottoms.append(None)
+            self.strand_at.append(p)
+
+    def _join(self, p, s):
+        "Attach the incoming flat strand s to what is now at position p."
+        b = self.bottoms[p]
+        if b is None:
+            self.tops[p] = s
+        else:
+            self.glue[b] = s
+            self.glue[s] = b
+
+    def append(self, a):
+        """
+        Add the generator a to the bottom of the braid.
+        """
+        a = int(a)
+        if a == 0:
+            raise ValueError('Braid generators must be nonzero')
+        j0 = abs(a) - 1
+        j1 = j0 + 1
+        if j1 >= len(self.tops):
+            self._add_strands(j1 + 1)
+        f = 4 * len(self.signs)
+        self.glue.extend((-1, -1, -1, -1))
+        if a > 0:
+            # The understrand goes from j0 to j1 and the overstrand back.
+            self.signs.append(1)
+            self._join(j0, f)
+            self._join(j1, f + 3)
+            self.bottoms[j0], self.bottoms[j1] = f + 1, f + 2
+        else:
+            self.signs.append(-1)
+            self._join(j0, f + 1)
+            self._join(j1, f)
+            self.bottoms[j0], self.bottoms[j1] = f + 2, f + 3
+        at = self.strand_at
+        at[j0], at[j1] = at[j1], at[j0]
+
+    def extend(self, gens):
+        """
+        Add each of the given generators, which can be any iterable, in turn.
+        """
+        for a in gens:
+            self.append(a)
+
+    def compact_link(self):
+        """
+        The closure of the braid so far, as a CompactLink.  Each
+        component starts at the top of the leftmost position it passes
+        through, and the components are ordered by those positions.
+        """
+        glue = np.frombuffer(self.glue, dtype=np.int64).copy()
+        tops, bottoms = self.tops, self.bottoms
+        # Close up the braid, joining the bottom of each position to its top.
+        for b, t in zip(bottoms, tops):
+            if b is not None:
+                glue[b], glue[t] = t, b
+        # The strand ending at the bottom of position p starts at the
+        # top of position strand_at[p], and continues from the top of p.
+        successor = [None] * len(tops)
+        for p, q in enumerate(self.strand_at):
+            successor[q] = p
+        starts, unknots = [], 0
+        seen = [False] * len(tops)
+        for p in range(len(tops)):
+            if seen[p]:
+                continue
+            if tops[p] is None:
+                unknots += 1
+            else:
+                starts.append(tops[p])
+            q = p
+            while not seen[q]:
+                seen[q] = True
+                q = successor[q]
+        n = len(self.signs)
+        signs = np.frombuffer(self.signs, dtype=np.int8).copy()
+        ans = CompactLink(glue.reshape((n, 4)), signs, starts, unknots)
+        ans._fix_DT_convention()
+        return ans
+
+    def link(self):
+        """
+        The closure of the braid so far, as a Link.
+        """
+        return self.compact_link().to_link()
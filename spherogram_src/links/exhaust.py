@@ -1,6 +1,7 @@
 from .links_base import Strand, Crossing, Link
 import random
 import collections
+import time
 
 
 def insert_space(point_dict, i):
@@ -271,7 +272,7 @@ class Frontier(BiDict):
 
     def overlap_is_consecutive(self, crossing):
         overlap = self.overlap_indices(crossing)
-        return len(overlap) > 0 and is_range(overlap)
+        return len(overlap) > 0 and is_range(sorted(overlap))
 
     def biggest_all_consecutive_overlap(self):
         """
@@ -303,6 +304,8 @@ class MorseExhaustion():
     MorseEncoding.
 
     If no initial crossing is specified, one is chosen at random.
+    Alternatively, the order in which to add the crossings can be
+    given, e.g. one found by plan_exhaustion.
 
     >>> L = Link('L2a1')
     >>> mexhaust = MorseExhaustion(L, L.crossings[0])
@@ -313,9 +316,11 @@ class MorseExhaustion():
     ['abAB']
     """
 
-    def __init__(self, link, crossing=None):
+    def __init__(self, link, crossing=None, order=None):
         events = []
-        if crossing is None:
+        if order is not None:
+            crossing = order[0]
+        elif crossing is None:
             crossing = random.choice(link.crossings)
         crossings = [crossing]
         events = [('cup', 0, 1), ('cup', 0, 1), ('cross', 1, 2)]
@@ -323,7 +328,14 @@ class MorseExhaustion():
         frontier = Frontier({0: css[3], 1: css[2], 2: css[1], 3: css[0]})
         frontier_lengths = [4]
         while len(crossings) < len(link.crossings):
-            overlap, i, C = frontier.biggest_all_consecutive_overlap()
+            if order is None:
+                overlap, i, C = frontier.biggest_all_consecutive_overlap()
+            else:
+                C = order[len(crossings)]
+                indices = sorted(frontier.overlap_indices(C))
+                if len(indices) == 0 or not is_range(indices):
+                    raise ValueError('Can not add the crossings in the given order')
+                overlap, i = len(indices), indices[0]
             cs = frontier[i]
             cs_opp = cs.opposite()
             assert C not in crossings
@@ -403,6 +415,186 @@ def good_exhaustion(link, max_tries=20):
     return E_best
 
 
+def _initial_frontier(crossing, consecutive):
+    css = crossing.crossing_strands()
+    return (css[3], css[2], css[1], css[0]) if consecutive else tuple(css)
+
+
+def _attachments(frontier, chosen, index, consecutive):
+    """
+    The crossings which can be added next, each with the positions in
+    the frontier of the strands where it would be attached.
+    """
+    positions = dict()
+    for j, cs in enumerate(frontier):
+        C = cs.opposite().crossing
+        if not (chosen >> index[C]) & 1:
+            positions.setdefault(C, []).append(j)
+    for C, indices in positions.items():
+        if not consecutive or indices[-1] - indices[0] == len(indices) - 1:
+            yield C, indices
+
+
+def _attach(frontier, C, indices, consecutive):
+    """
+    The frontier after adding C, in the same way as MorseExhaustion
+    when consecutive is True and alexander.Exhaustion otherwise.
+    """
+    if consecutive:
+        i, k = indices[0], len(indices)
+        cs_opp = frontier[i].opposite()
+        new = tuple(cs_opp.rotate(-(s + 1)) for s in range(4 - k))
+        return frontier[:i] + new + frontier[i + k:]
+    glued = set(frontier[j] for j in indices)
+    new = tuple(cs for cs in C.crossing_strands() if cs.opposite() not in glued)
+    indices = set(indices)
+    kept = tuple(cs for j, cs in enumerate(frontier) if j not in indices)
+    return kept + new
+
+
+def _beam_pass(link, consecutive, beam_width, best, deadline, rng):
+    """
+    One pass of the search in plan_exhaustion.  The partial orders are
+    stored as linked lists (crossing, rest) and the sets of crossings
+    used as bitmasks.  Returns the pair (ans, truncated), where ans is
+    (largest frontier, order), or None if nothing better than best was
+    found in time, and truncated records whether any partial orders
+    which could still beat best were dropped to keep to the beam width.
+    """
+    index = link._crossing_index()
+    beam = [(4, _initial_frontier(C, consecutive), (C, None), 1 << index[C])
+            for C in link.crossings]
+    truncated = False
+    for step in range(1, len(link.crossings)):
+        if time.perf_counter() > deadline:
+            return None, True
+        children = dict()
+        for width, frontier, order, chosen in beam:
+            for C, indices in _attachments(frontier, chosen, index, consecutive):
+                new_frontier = _attach(frontier, C, indices, consecutive)
+                new_width = max(width, len(new_frontier))
+                if new_width >= best:
+                    continue
+                new_chosen = chosen | (1 << index[C])
+                rank = (new_width, len(new_frontier), -len(indices),
+                        rng.random())
+                if new_chosen not in children or rank < children[new_chosen][0]:
+                    children[new_chosen] = (rank, (new_width, new_frontier,
+                                                   (C, order), new_chosen))
+        if not children:
+            return None, truncated
+        ranked = sorted(children.values(), key=lambda child: child[0])
+        truncated = truncated or len(ranked) > beam_width
+        beam = [state for rank, state in ranked[:beam_width]]
+
+    width, frontier, order, chosen = min(beam, key=lambda state: state[0])
+    crossings = []
+    while order is not None:
+        C, order = order
+        crossings.append(C)
+    return (width, crossings[::-1]), truncated
+
+
+def _is_connected(link):
+    crossings = link.crossings
+    seen, todo = {crossings[0]}, [crossings[0]]
+    while todo:
+        for D, j in todo.pop().adjacent:
+            if D not in seen:
+                seen.add(D)
+                todo.append(D)
+    return len(seen) == len(crossings)
+
+
+def plan_exhaustion(link, consecutive=True, beam_width=32, time_budget=1.0):
+    """
+    Searches for an order in which to add the crossings of the link,
+    each adjacent to those before it, so that the largest frontier of
+    the intermediate tangles is as small as possible.  When consecutive
+    is True, each crossing must be attached along consecutive strands
+    of the frontier, as MorseExhaustion requires; otherwise the order
+    is meant for alexander.Exhaustion.  The diagram must be connected.
+
+    The search starts from the order found by good_exhaustion, or its
+    analogue in alexander, when that succeeds, so it never does worse.
+    It then runs a beam search: at each step, each partial order in the
+    beam is extended in all possible ways and the best of these are
+    kept, ranked first by the largest frontier so far, then by the
+    current frontier, then by the overlap of the new crossing as in
+    Frontier.biggest_all_consecutive_overlap, with any remaining ties
+    broken at random.  The search is repeated with beams of width 1, 2,
+    4, ..., beam_width, and then restarted with different ties broken,
+    until time_budget seconds have passed or a pass drops nothing that
+    could beat the best complete order so far.  Without a starting
+    order, the first pass runs to the end regardless of the time.
+
+    Returns the pair (width, order), where the width is half the size
+    of the largest frontier, as for MorseExhaustion.
+
+    >>> L = Link('K12n123')
+    >>> width, order = plan_exhaustion(L)
+    >>> E = MorseExhaustion(L, order=order)
+    >>> E.width == width <= good_exhaustion(L).width
+    True
+    >>> L = Link(braid_closure=[1, -3, 3, 3, 1, 3, -3, -3, 3, 2])
+    >>> plan_exhaustion(L)[0], plan_exhaustion(L, consecutive=False)[0]
+    (2, 2)
+    >>> plan_exhaustion(Link([(1, 5, 2, 4), (3, 1, 4, 6), (5, 3, 6, 2),
+    ...                       (14, 9, 7, 10), (8, 11, 9, 12), (10, 13, 11, 14),
+    ...                       (12, 7, 13, 8)]))
+    Traceback (most recent call last):
+        ...
+    ValueError: The link diagram is split.
+    """
+    n = len(link.crossings)
+    if n == 0:
+        return 0, []
+    if not _is_connected(link):
+        raise ValueError('The link diagram is split.')
+    deadline = time.perf_counter() + time_budget
+    best, best_order = float('inf'), None
+    if consecutive:
+        seed = good_exhaustion
+    else:
+        from .alexander import good_exhaustion as seed
+    try:
+        E = seed(link)
+        best, best_order = max(E.frontier_lengths), E.crossings
+    except AssertionError:  # The greedy search can get stuck.
+        pass
+    rng = random.Random(n)
+    beam = 1
+    while best > 4 and time.perf_counter() < deadline:
+        ans, truncated = _beam_pass(link, consecutive, beam, best,
+                                    deadline if best_order else float('inf'),
+                                    rng)
+        if ans is not None:
+            best, best_order = ans
+        if not truncated:
+            break
+        beam = min(2 * beam, beam_width)
+    if best_order is None:
+        raise ValueError('Can not add the crossings in any order')
+    return best // 2, best_order
+
+
+def planned_exhaustion(link, beam_width=32, time_budget=1.0):
+    """
+    A MorseExhaustion in the order found by plan_exhaustion.  Check its
+    width to see how expensive e.g. the Kauffman bracket will be.
+
+    >>> E = planned_exhaustion(Link('K8n1'))
+    >>> E.width
+    3
+    """
+    width, order = plan_exhaustion(link, True, beam_width, time_budget)
+    ans = MorseExhaustion(link, order=order)
+    if ans.width != width:
+        raise RuntimeError('The planned order gives width %d rather than %d'
+                           % (ans.width, width))
+    return ans
+
+
 def test_morse_machine(link):
     E = link.exterior()
     exhaust = MorseExhaustion(link, link.crossings[0])
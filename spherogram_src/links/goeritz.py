@@ -0,0 +1,552 @@
+"""
+Sparse integer matrices attached to a link diagram, namely the
+Goeritz matrix of a checkerboard surface and the colouring matrix,
+together with exact elimination routines computing their determinants
+and signatures.
+
+Both matrices have only a handful of nonzero entries in each row, so
+they are built in a single pass over the flat gluing array of the
+diagram (see compact.py) and stored as a SparseIntegerMatrix rather
+than as a dense matrix.  The elimination routines work in the same
+sparse form, always pivoting on a row with as few entries as possible,
+which for the planar graphs arising here keeps the fill-in small.  All
+arithmetic is on Python integers: each row carries a positive common
+denominator, and rows are divided through by their content after
+each update, so nothing is ever rounded.
+
+>>> from spherogram import Link
+>>> K = Link('K8a1')
+>>> G = goeritz_matrix(K)
+>>> G.nrows, abs(G.determinant()), G.signature()
+(4, 31, -4)
+>>> signature(K), abs(colouring_matrix(K).minor(0, 0).determinant())
+(-2, 31)
+"""
+
+import concurrent.futures
+import heapq
+import itertools
+import math
+from fractions import Fraction
+from math import gcd
+import numpy as np
+
+
+class SparseIntegerMatrix():
+    """
+    An integer matrix stored as a list of rows, each a dictionary from
+    column indices to nonzero entries.
+
+    >>> M = SparseIntegerMatrix(3, 3, {(0, 0): 2, (0, 1): 1, (1, 0): 1,
+    ...                                (1, 1): 2, (2, 2): -1})
+    >>> M.dense(), M[1, 0]
+    ([[2, 1, 0], [1, 2, 0], [0, 0, -1]], 1)
+    >>> M.determinant(), M.inertia(), M.minor(2, 2).determinant()
+    (-3, (2, 1, 0), 3)
+    """
+    def __init__(self, nrows, ncols, entries=None):
+        self.nrows, self.ncols = nrows, ncols
+        self.rows = [dict() for i in range(nrows)]
+        if entries is not None:
+            for (i, j), value in entries.items():
+                self.add(i, j, value)
+
+    def add(self, i, j, value):
+        """
+        Adds value to the (i, j) entry.
+        """
+        row = self.rows[i]
+        value += row.get(j, 0)
+        if value:
+            row[j] = value
+        else:
+            row.pop(j, None)
+
+    def __getitem__(self, ij):
+        i, j = ij
+        return self.rows[i].get(j, 0)
+
+    def __repr__(self):
+        return '<SparseIntegerMatrix: %d x %d with %d nonzero entries>' % (
+            self.nrows, self.ncols, sum(len(row) for row in self.rows))
+
+    def entries(self):
+        """
+        A dictionary mapping (i, j) to each nonzero entry.
+        """
+        return {(i, j): v for i, row in enumerate(self.rows)
+                for j, v in row.items()}
+
+    def dense(self):
+        return [[row.get(j, 0) for j in range(self.ncols)] for row in self.rows]
+
+    def minor(self, i, j):
+        """
+        The matrix obtained by deleting row i and column j.
+        """
+        entries = {(a - (a > i), b - (b > j)): v
+                   for (a, b), v in self.entries().items()
+                   if a != i and b != j}
+        return SparseIntegerMatrix(self.nrows - 1, self.ncols - 1, entries)
+
+    def is_symmetric(self):
+        return self.nrows == self.ncols and all(
+            self.rows[j].get(i) == v
+            for i, row in enumerate(self.rows) for j, v in row.items())
+
+    def numpy(self):
+        """
+        The matrix as a dense NumPy array of Python integers.
+        """
+        return np.array(self.dense(), dtype=object).reshape(
+            (self.nrows, self.ncols))
+
+    def scipy(self):
+        """
+        The matrix as a scipy.sparse CSR matrix with int64 entries.
+        Requires SciPy, which Spherogram does not depend on.
+        """
+        from scipy.sparse import csr_matrix
+        entries = self.entries()
+        rows = [i for i, j in entries]
+        cols = [j for i, j in entries]
+        return csr_matrix((list(entries.values()), (rows, cols)),
+                          shape=(self.nrows, self.ncols), dtype='int64')
+
+    def sage(self):
+        """
+        The matrix as a sparse Sage matrix over ZZ.
+        """
+        from sage.all import matrix, ZZ
+        return matrix(ZZ, self.nrows, self.ncols, self.entries(), sparse=True)
+
+    def determinant(self):
+        if self.nrows != self.ncols:
+            raise ValueError('The matrix is not square')
+        return _eliminate(self.rows, symmetric=False)[0]
+
+    def modular_determinant(self, processes=0):
+        """
+        The determinant, found modulo enough primes below 2^31 to pin
+        it down by the Hadamard bound and then reconstructed by the
+        Chinese remainder theorem.  Each prime costs one elimination on
+        a dense NumPy int64 array, whose rows and columns are put in
+        reverse Cuthill-McKee order so that it is close to banded.
+        With processes other than 0, the primes are spread over a pool
+        of that many worker processes, or one per CPU if None.
+
+        >>> M = SparseIntegerMatrix(2, 2, {(0, 0): 3**40, (1, 1): -2**50})
+        >>> M.modular_determinant() == M.determinant() == -3**40 * 2**50
+        True
+        """
+        if self.nrows != self.ncols:
+            raise ValueError('The matrix is not square')
+        bits = 0.0
+        for row in self.rows:
+            if not row:
+                return 0
+            bits += math.log2(sum(v * v for v in row.values())) / 2
+        primes, prime_bits = [], 0.0
+        for p in _word_primes():
+            if prime_bits > bits + 1:
+                break
+            primes.append(p)
+            prime_bits += math.log2(p)
+
+        try:
+            A = np.array(self.dense(), dtype=np.int64)
+        except OverflowError:
+            A = np.array(self.dense(), dtype=object)
+        A = A.reshape((self.nrows, self.ncols))
+        order = _banded_order(self.rows)
+        A = A[np.ix_(order, order)]
+        if processes == 0:
+            residues = [_determinant_mod_p(A, p) for p in primes]
+        else:
+            with concurrent.futures.ProcessPoolExecutor(processes) as executor:
+                residues = list(executor.map(
+                    _determinant_mod_p, itertools.repeat(A), primes))
+
+        det, modulus = 0, 1
+        for r, p in zip(residues, primes):
+            det += modulus * ((r - det) * _modular_inverse(modulus, p) % p)
+            modulus *= p
+        return det - modulus if 2 * det > modulus else det
+
+    def inertia(self):
+        """
+        The numbers of positive, negative and zero eigenvalues of a
+        symmetric matrix, read off from the pivots of a symmetric
+        elimination by Sylvester's law of inertia.
+        """
+        if not self.is_symmetric():
+            raise ValueError('The matrix is not symmetric')
+        return _eliminate(self.rows, symmetric=True)[1]
+
+    def signature(self):
+        pos, neg, zero = self.inertia()
+        return pos - neg
+
+
+def _content(row):
+    g = 0
+    for v in row.values():
+        g = gcd(g, v)
+        if g == 1:
+            break
+    return g
+
+
+def _eliminate(rows, symmetric):
+    """
+    Gaussian elimination on the square matrix whose rows are the given
+    dictionaries, which are left untouched.  Returns the determinant
+    and, when symmetric is set, the inertia.
+
+    The actual ith row is rows[i] divided by the positive integer
+    scale[i].  In the symmetric case only diagonal pivots are used,
+    so that each elimination step is a congruence, and a row whose
+    diagonal entry vanishes is first combined with a neighbour, which
+    is also a congruence of determinant one.
+    """
+    n = len(rows)
+    rows = [dict(row) for row in rows]
+    scale = [1] * n
+    cols = [set() for j in range(n)]
+    for i, row in enumerate(rows):
+        for j in row:
+            cols[j].add(i)
+    alive = set(range(n))
+    heap = [(len(row), i) for i, row in enumerate(rows)]
+    heapq.heapify(heap)
+    det, pos, neg, zero = Fraction(1), 0, 0, 0
+    pivots = dict()
+
+    def set_row(a, row):
+        for j in rows[a].keys() - row.keys():
+            cols[j].discard(a)
+        for j in row.keys() - rows[a].keys():
+            cols[j].add(a)
+        g = gcd(_content(row), scale[a])
+        if g > 1:
+            row = {j: v // g for j, v in row.items()}
+            scale[a] //= g
+        rows[a] = row
+        heapq.heappush(heap, (len(row), a))
+
+    while alive:
+        length, i = heapq.heappop(heap)
+        if i not in alive or length != len(rows[i]):
+            continue
+        row = rows[i]
+        if not row:
+            det = 0
+            zero += 1
+            alive.remove(i)
+            continue
+        if symmetric:
+            if i not in row:
+                k = min((k for k in row if k in rows[k]),
+                        key=lambda k: len(rows[k]), default=None)
+                if k is not None:
+                    heapq.heappush(heap, (len(row), i))
+                    i, row = k, rows[k]
+                else:
+                    # Add row and column k to row and column i, making
+                    # the diagonal entry twice the (i, k) entry.
+                    k = min(row, key=lambda k: len(rows[k]))
+                    new = dict(row)
+                    for j, v in rows[k].items():
+                        new[j] = new.get(j, 0) * scale[k] + v * scale[i]
+                    for j in row.keys() - rows[k].keys():
+                        new[j] *= scale[k]
+                    scale[i] *= scale[k]
+                    set_row(i, {j: v for j, v in new.items() if v})
+                    for a in list(cols[k]):
+                        other = rows[a]
+                        value = other.get(i, 0) + other[k]
+                        other = dict(other)
+                        if value:
+                            other[i] = value
+                        else:
+                            other.pop(i, None)
+                        set_row(a, other)
+                    row = rows[i]
+            j = i
+        else:
+            j = min(row, key=lambda j: len(cols[j]))
+        p = row[j]
+        det *= Fraction(p, scale[i])
+        if symmetric:
+            if p > 0:
+                pos += 1
+            else:
+                neg += 1
+        pivots[i] = j
+        alive.remove(i)
+        for j2 in row:
+            cols[j2].discard(i)
+        for a in list(cols[j]):
+            other, f = rows[a], rows[a][j]
+            new = {c: v * p for c, v in other.items()}
+            for c, v in row.items():
+                x = new.get(c, 0) - f * v
+                if x:
+                    new[c] = x
+                else:
+                    new.pop(c, None)
+            if p < 0:
+                new = {c: -v for c, v in new.items()}
+            scale[a] *= abs(p)
+            set_row(a, new)
+
+    if det and not symmetric:
+        # Account for the permutation taking pivot rows to columns.
+        seen = set()
+        for i in pivots:
+            if i not in seen:
+                length, k = 0, i
+                while k not in seen:
+                    seen.add(k)
+                    k = pivots[k]
+                    length += 1
+                if length % 2 == 0:
+                    det = -det
+    return int(det), (pos, neg, zero)
+
+
+def _is_prime(n):
+    """
+    The Miller-Rabin test with bases 2, 3, 5 and 7, which is correct
+    for all n < 3215031751.
+    """
+    for a in (2, 3, 5, 7):
+        if n % a == 0:
+            return n == a
+    d, r = n - 1, 0
+    while d % 2 == 0:
+        d, r = d // 2, r + 1
+    for a in (2, 3, 5, 7):
+        x = pow(a, d, n)
+        if x == 1 or x == n - 1:
+            continue
+        for i in range(r - 1):
+            x = x * x % n
+            if x == n - 1:
+                break
+        else:
+            return False
+    return True
+
+
+def _modular_inverse(a, n):
+    """
+    The inverse of a modulo n, found by the extended Euclidean
+    algorithm, as pow(a, -1, n) needs Python 3.8.
+
+    >>> _modular_inverse(10, 2**31 - 1) * 10 % (2**31 - 1)
+    1
+    """
+    x, y, r, s = 1, 0, a % n, n
+    while s:
+        q = r // s
+        x, y, r, s = y, x - q * y, s, r - q * s
+    if r != 1:
+        raise ValueError('%d is not invertible modulo %d' % (a, n))
+    return x % n
+
+
+def _word_primes():
+    """
+    The primes below 2^31 in decreasing order, so that the product of
+    two residues fits in an int64.
+    """
+    p = 2**31 - 1
+    while p > 2:
+        if _is_prime(p):
+            yield p
+        p -= 2
+
+
+def _banded_order(rows):
+    """
+    The reverse Cuthill-McKee ordering of the symmetrized pattern of
+    nonzero entries.
+    """
+    import networkx as nx
+    from networkx.utils import reverse_cuthill_mckee_ordering
+    G = nx.Graph()
+    G.add_nodes_from(range(len(rows)))
+    G.add_edges_from((i, j) for i, row in enumerate(rows) for j in row)
+    return list(reverse_cuthill_mckee_ordering(G))
+
+
+def _determinant_mod_p(A, p):
+    """
+    The determinant of the square integer array A modulo the prime p.
+    Each elimination step only touches the rows with a nonzero entry in
+    the pivot column, and the columns up to the last nonzero entry in
+    the pivot row, which is cheap when A is close to banded.
+    """
+    A = (A % p).astype(np.int64)
+    det = 1
+    for k in range(len(A)):
+        nonzero = np.flatnonzero(A[k:, k])
+        if len(nonzero) == 0:
+            return 0
+        if nonzero[0] != 0:
+            i = k + nonzero[0]
+            A[[k, i]] = A[[i, k]]
+            det = -det
+        pivot = int(A[k, k])
+        det = det * pivot % p
+        rows = k + 1 + np.flatnonzero(A[k + 1:, k])
+        cols = np.flatnonzero(A[k, k + 1:])
+        if len(rows) and len(cols):
+            end = k + 2 + cols[-1]
+            factors = A[rows, k] * pow(pivot, p - 2, p) % p
+            update = np.outer(factors, A[k, k + 1:end]) % p
+            A[rows, k + 1:end] = (A[rows, k + 1:end] - update) % p
+    return det % p
+
+
+def _flat_diagram(link):
+    """
+    The flat gluing list and the signs of the crossings of a Link or
+    CompactLink; see compact.py.
+    """
+    gluings = getattr(link, 'gluings', None)
+    if gluings is not None:
+        return gluings.ravel().tolist(), link.signs.tolist()
+    index = link._crossing_index()
+    glue = [4 * index[D] + j for C in link.crossings for D, j in C.adjacent]
+    return glue, [C.sign for C in link.crossings]
+
+
+def _corner_faces(glue):
+    """
+    The index of the face containing each corner 4*c + i, that is the
+    corner of crossing c between strands i and i + 1, with the faces
+    numbered as in Link.faces, together with the number of faces.
+    """
+    next_corner = [glue[s - s % 4 + (s + 1) % 4] for s in range(len(glue))]
+    face_of = [-1] * len(glue)
+    count = 0
+    for start in range(len(glue) - 1, -1, -1):
+        if face_of[start] < 0:
+            s = start
+            while face_of[s] < 0:
+                face_of[s] = count
+                s = next_corner[s]
+            count += 1
+    return face_of, count
+
+
+def _white_faces(link):
+    """
+    The faces making up the white graph, as in Link.white_graph, given
+    as a dictionary from face indices to rows of the Goeritz matrix,
+    together with the flat gluings, the signs, the face of each corner,
+    and for each crossing the sign of the edge of the white graph at
+    it, which is 1 if its corners 0 and 2 are white and -1 otherwise.
+    """
+    glue, signs = _flat_diagram(link)
+    face_of, count = _corner_faces(glue)
+    parent = list(range(count))
+
+    def find(f):
+        while parent[f] != f:
+            parent[f] = parent[parent[f]]
+            f = parent[f]
+        return f
+
+    for s in range(len(glue)):
+        if s % 4 > 1:
+            continue
+        a, b = find(face_of[s]), find(face_of[s + 2])
+        if a != b:
+            parent[max(a, b)] = min(a, b)
+    classes = dict()
+    for f in range(count):
+        classes.setdefault(find(f), []).append(f)
+    if len(classes) > 2:
+        raise ValueError('The link diagram is split.')
+    if len(classes) < 2:
+        white = []
+    else:
+        # Mimic Graph.connected_components, which lists the class of
+        # face 0 first and then sorts by size, largest first.
+        first, second = sorted(classes.values(), key=len, reverse=True)
+        white = second
+    vertex = {f: i for i, f in enumerate(white)}
+    edge_signs = [1 if face_of[4 * c] in vertex else -1
+                  for c in range(len(signs))]
+    return vertex, glue, signs, face_of, edge_signs
+
+
+def goeritz_matrix(link):
+    """
+    The Goeritz matrix of the white graph of the diagram, with the same
+    conventions as Link.goeritz_matrix, as a SparseIntegerMatrix.
+    """
+    vertex, glue, signs, face_of, edge_signs = _white_faces(link)
+    N = len(vertex)
+    M = SparseIntegerMatrix(N, N)
+    for c, e in enumerate(edge_signs):
+        k = 0 if e == 1 else 1
+        i, j = vertex[face_of[4 * c + k]], vertex[face_of[4 * c + k + 2]]
+        if i != j:
+            M.add(i, j, e)
+            M.add(j, i, e)
+            M.add(i, i, -e)
+            M.add(j, j, -e)
+    if N == 0:
+        return M
+    return M.minor(0, 0)
+
+
+def signature(link, new_convention=True):
+    """
+    The signature by the formula of Gordon and Litherland; see
+    Link.signature.
+    """
+    vertex, glue, signs, face_of, edge_signs = _white_faces(link)
+    correction = sum(e for e, s in zip(edge_signs, signs) if e == s)
+    ans = goeritz_matrix(link).signature() + correction
+    return -ans if new_convention else ans
+
+
+def colouring_matrix(link):
+    """
+    The colouring matrix, with a row for each crossing and a column for
+    each arc of the diagram, where the arc leaving crossing c as the
+    understrand is arc c.  The entries of row c are 2 for the arc over
+    c and -1 for each of the arcs ending and starting there.  A
+    component passing over every crossing it meets is a closed arc,
+    which gets one of the extra columns at the end, so the matrix is
+    only square when there are none.  All the crossings must be
+    oriented.
+    """
+    glue, signs = _flat_diagram(link)
+    n = len(signs)
+    over = [False] * (4 * n)
+    arcs = dict()
+    for c in range(n):
+        arcs[(c, c)] = arcs.get((c, c), 0) - 1
+        s = glue[4 * c + 2]
+        while s % 4 != 0:
+            over[s] = True
+            arcs[(s // 4, c)] = arcs.get((s // 4, c), 0) + 2
+            s = glue[s ^ 2]
+        arcs[(s // 4, c)] = arcs.get((s // 4, c), 0) - 1
+    closed = n
+    for c, sign in enumerate(signs):
+        start = 4 * c + (3 if sign == 1 else 1)
+        if not over[start]:
+            s = start
+            while not over[s]:
+                over[s] = True
+                arcs[(s // 4, closed)] = arcs.get((s // 4, closed), 0) + 2
+                s = glue[s ^ 2]
+            closed += 1
+    return SparseIntegerMatrix(n, closed, arcs)
@@ -0,0 +1,236 @@
+"""
+An optional on-disk cache for invariants of link diagrams.
+
+Invariants such as the Jones polynomial are often recomputed for the
+same diagrams over and over, for instance for census links or the
+output of random_link with a fixed seed.  When a cache is active, the
+methods of Link decorated with cached_invariant look up their value
+in an SQLite file keyed by the canonical code of the diagram, the name
+of the invariant, and its arguments, and store the value there after
+computing it.  The number of entries is bounded, with the least
+recently used ones evicted first.
+
+A cache is activated either with a context manager::
+
+    with InvariantCache('/tmp/invariants.sqlite'):
+        ...
+
+or for a whole session by setting the environment variable
+SPHEROGRAM_INVARIANT_CACHE to the path of the file, in which case
+SPHEROGRAM_INVARIANT_CACHE_SIZE can be used to set the maximum number
+of entries.
+
+>>> import tempfile, os
+>>> from spherogram import Link
+>>> path = os.path.join(tempfile.mkdtemp(), 'cache.sqlite')
+>>> calls = []
+>>> @cached_invariant
+... def crossing_count(link):
+...     calls.append(link)
+...     return len(link.crossings)
+>>> K = Link('K8a1')
+>>> with InvariantCache(path, max_entries=2) as cache:
+...     crossing_count(K), crossing_count(Link('K8a1')), len(calls)
+(8, 8, 1)
+>>> crossing_count(K), len(calls)
+(8, 2)
+>>> with InvariantCache(path, max_entries=2) as cache:
+...     for name in ['K8a1', 'K9a1', 'K10a1']:
+...         _ = crossing_count(Link(name))
+...     len(cache), len(calls)
+(2, 4)
+
+Hits are recorded in memory and written out before evicting, so here
+K8a1 survives and K9a1 is evicted:
+
+>>> with InvariantCache(path, max_entries=2) as cache:
+...     for name in ['K8a1', 'K9a1', 'K8a1', 'K11a1', 'K8a1']:
+...         _ = crossing_count(Link(name))
+...     len(calls)
+7
+
+Arguments such as processes are not part of the name of an invariant,
+and values which can't be unpickled, e.g. Sage objects outside Sage,
+count as missing:
+
+>>> with InvariantCache(path) as cache:
+...     K, size = Link('K8n1'), len(cache)
+...     dets = K.determinant(), K.determinant(processes=2)
+...     cache.store(b'key', 'name', 1)
+...     _ = cache.connection.execute(
+...         "UPDATE invariants SET value = x'00' WHERE key = x'6b6579'")
+...     dets, len(cache) - size, cache.lookup(b'key', 'name')
+((9, 9), 2, (False, None))
+"""
+
+import functools
+import inspect
+import os
+import pickle
+import sqlite3
+from ..sage_helper import _within_sage
+
+_active_caches = []
+_environment_cache = None
+
+# Arguments which only affect how an invariant is computed.
+_execution_only = {'processes', 'chunk_size'}
+
+
+def diagram_key(link):
+    """
+    A bytes key identifying the given diagram up to planar isotopy,
+    including the orientations and order of its components and any
+    unlinked unknots.
+    """
+    return link.canonical_code(ordered_components=True)
+
+
+class InvariantCache():
+    """
+    An SQLite file holding at most max_entries invariant values.  Using
+    it as a context manager makes it the active cache for the duration.
+    The times entries were last used are only written to the file every
+    flush_every lookups, before evicting entries, and on closing.
+    """
+    def __init__(self, path, max_entries=100000, flush_every=1000):
+        self.path = path
+        self.max_entries = max_entries
+        self.flush_every = flush_every
+        self._last_used = dict()
+        self.connection = sqlite3.connect(path, timeout=60)
+        self.connection.execute(
+            'CREATE TABLE IF NOT EXISTS invariants '
+            '(key BLOB, name TEXT, value BLOB, last_used INTEGER, '
+            'PRIMARY KEY (key, name))')
+        self.connection.execute(
+            'CREATE INDEX IF NOT EXISTS lru ON invariants (last_used)')
+        self.connection.commit()
+        row = self.connection.execute(
+            'SELECT max(last_used), count(*) FROM invariants').fetchone()
+        self._clock = row[0] or 0
+        self._size = row[1]
+
+    def __len__(self):
+        return self._size
+
+    def __enter__(self):
+        _active_caches.append(self)
+        return self
+
+    def __exit__(self, type, value, traceback):
+        _active_caches.remove(self)
+        self.close()
+
+    def close(self):
+        if self.connection is not None:
+            self._flush_last_used()
+            self.connection.commit()
+            self.connection.close()
+            self.connection = None
+
+    def _tick(self):
+        self._clock += 1
+        return self._clock
+
+    def _flush_last_used(self):
+        if self._last_used:
+            self.connection.executemany(
+                'UPDATE invariants SET last_used = ? WHERE key = ? AND name = ?',
+                [(tick, key, name)
+                 for (key, name), tick in self._last_used.items()])
+            self._last_used.clear()
+
+    def lookup(self, key, name):
+        """
+        Returns the pair (found, value).
+        """
+        row = self.connection.execute(
+            'SELECT value FROM invariants WHERE key = ? AND name = ?',
+            (key, name)).fetchone()
+        if row is None:
+            return False, None
+        try:
+            value = pickle.loads(row[0])
+        except Exception:  # E.g. a Sage value written from within Sage.
+            return False, None
+        self._last_used[key, name] = self._tick()
+        if len(self._last_used) >= self.flush_every:
+            self._flush_last_used()
+            self.connection.commit()
+        return True, value
+
+    def store(self, key, name, value):
+        self._last_used.pop((key, name), None)
+        existing = self.connection.execute(
+            'SELECT 1 FROM invariants WHERE key = ? AND name = ?',
+            (key, name)).fetchone()
+        self.connection.execute(
+            'INSERT OR REPLACE INTO invariants VALUES (?, ?, ?, ?)',
+            (key, name, pickle.dumps(value), self._tick()))
+        if existing is None:
+            self._size += 1
+        if self._size > self.max_entries:
+            # Evict a little extra so that this doesn't happen on
+            # every store once the cache is full.
+            target = self.max_entries - self.max_entries // 10
+            self._flush_last_used()
+            self.connection.execute(
+                'DELETE FROM invariants WHERE rowid IN (SELECT rowid FROM '
+                'invariants ORDER BY last_used LIMIT ?)',
+                (self._size - target,))
+            # Other processes may share the file, so recount.
+            self._size = self.connection.execute(
+                'SELECT count(*) FROM invariants').fetchone()[0]
+        self.connection.commit()
+
+
+def active_cache():
+    """
+    The innermost cache activated by a context manager, failing that the
+    one given by the SPHEROGRAM_INVARIANT_CACHE environment variable, or
+    None.
+    """
+    global _environment_cache
+    if _active_caches:
+        return _active_caches[-1]
+    path = os.environ.get('SPHEROGRAM_INVARIANT_CACHE')
+    if not path:
+        return None
+    if _environment_cache is None or _environment_cache.path != path:
+        size = int(os.environ.get('SPHEROGRAM_INVARIANT_CACHE_SIZE', 100000))
+        _environment_cache = InvariantCache(path, size)
+    return _environment_cache
+
+
+def cached_invariant(method):
+    """
+    Decorator for methods of Link whose value only depends on the
+    diagram and the arguments, so that they use the active cache.
+    Values computed within Sage are cached separately, as they are
+    Sage objects, and arguments such as the number of processes are
+    left out of the name of the invariant.
+    """
+    signature = inspect.signature(method)
+
+    @functools.wraps(method)
+    def wrapper(link, *args, **kwargs):
+        cache = active_cache()
+        if cache is None:
+            return method(link, *args, **kwargs)
+        bound = signature.bind(link, *args, **kwargs)
+        bound.apply_defaults()
+        arguments = [(arg, value) for arg, value in bound.arguments.items()
+                     if arg not in _execution_only][1:]
+        name = method.__name__
+        if arguments:
+            name += repr(arguments)
+        if _within_sage:
+            name += ' in Sage'
+        key = diagram_key(link)
+        found, value = cache.lookup(key, name)
+        if not found:
+            value = method(link, *args, **kwargs)
+            cache.store(key, name, value)
+        return value
+    return wrapper
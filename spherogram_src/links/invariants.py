@@ -4,9 +4,10 @@ standard invariants.  Much of this code was contributed by Robert Lipshitz
 and Jennet Dickinson.
 """
 
-from . import links_base, alexander
+from . import links_base, alexander, goeritz
 from .links_base import CrossingStrand, Crossing
-from ..sage_helper import _within_sage, sage_method
+from .invariant_cache import cached_invariant
+from ..sage_helper import _within_sage, sage_method, SageNotAvailable
 
 deprecation_warnings_issued = set()
 
@@ -17,7 +18,6 @@ if _within_sage:
     from sage.groups.braid import Braid, BraidGroup
     from sage.all import QQ
     from sage.rings.polynomial.laurent_polynomial_ring import LaurentPolynomialRing
-    from sage.quadratic_forms.quadratic_form import QuadraticForm
     try:
         from sage.knots.knot import Knot as SageKnot
         from sage.knots.link import Link as SageLink
@@ -106,33 +106,19 @@ class Link(links_base.Link):
 
         links_base.Link.__init__(self, crossings, braid_closure, check_planarity, build)
 
-    @sage_method
     def linking_matrix(self):
         """
         Calculates the linking number for each pair of link components.
 
         Returns a linking matrix, in which the (i,j)th component is the
-        linking number of the ith and jth link components.
-        """
-        mat = [[0 for i in range(len(self.link_components))]
-               for j in range(len(self.link_components))]
-        for n1, comp1 in enumerate(self.link_components):
-            for n2, comp2 in enumerate(self.link_components):
-                tally = [[0 for m in range(len(self.crossings))]
-                         for n in range(2)]
-                if comp1 != comp2:
-                    for i, c in enumerate(self.crossings):
-                        for x1 in comp1:
-                            if x1[0] == c:
-                                tally[0][i] += 1
-                        for x2 in comp2:
-                            if x2[0] == c:
-                                tally[1][i] += 1
-                for k, c in enumerate(self.crossings):
-                    if (tally[0][k] == 1 and tally[1][k] == 1):
-                        mat[n1][n2] += 0.5 * (c.sign)
-                mat[n1][n2] = int(mat[n1][n2])
-        return mat
+        linking number of the ith and jth link components.  To compute
+        these for many links at once, use compact.linking_matrices.
+
+        >>> Link('L8n4').linking_matrix()
+        [[0, 1, -1], [1, 0, 2], [-1, 2, 0]]
+        """
+        from .compact import linking_matrices
+        return linking_matrices([self])[0].tolist()
 
     @sage_method
     def knot_group(self):
@@ -150,20 +136,20 @@ class Link(links_base.Link):
         F = FreeGroup(n)
         rels = []
         pieces = self._pieces()
+        starts, ends, middles = dict(), dict(), dict()
+        for m, p in enumerate(pieces):
+            for t, q in enumerate(p):
+                if t == 0:
+                    starts[q[0]] = m
+                elif t == len(p) - 1:
+                    ends[q[0]] = m
+                else:
+                    middles[q[0]] = m
 
         for z in self.crossings:
-            for m, p in enumerate(pieces):
-                for t, q in enumerate(p):
-                    if q[0] == z:
-                        if t == 0:
-                            j = m
-                        elif t == len(p) - 1:
-                            i = m
-                        else:
-                            k = m
-            i += 1
-            j += 1
-            k += 1
+            i = ends[z] + 1
+            j = starts[z] + 1
+            k = middles[z] + 1
             if z.sign > 0:
                 r = F([-k, i, k, -j])
             if z.sign < 0:
@@ -228,11 +214,19 @@ class Link(links_base.Link):
             print('Deprecation Warning: use "alexander_polynomial" instead of "alexander_poly".')
         return self.alexander_polynomial(*args, **kwargs)
 
-    @sage_method
+    @cached_invariant
     def alexander_polynomial(self, multivar=True, v='no', method='default',
-                             norm=True, factored=False):
+                             norm=True, factored=False, chunk_size=256,
+                             processes=0):
         """
-        Calculates the Alexander polynomial of the link.
+        Calculates the Alexander polynomial of the link.  Outside of
+        Sage, only the default method for knots is available, which
+        returns a LaurentPolynomial; the chunk_size and processes are
+        passed on to alexander.alexander.
+
+        >>> K = Link('K8n1')
+        >>> K.alexander_polynomial(v=[2]), K.alexander_polynomial(v=[2], processes=2)
+        (9, 9)
 
         For links with one component,
         can evaluate the alexander polynomial at v::
@@ -269,9 +263,14 @@ class Link(links_base.Link):
         if comp < 2:
             multivar = False
 
+        if not _within_sage and not (comp == 1 and method == 'default' and norm):
+            raise SageNotAvailable('Sorry, outside Sage only the Alexander '
+                                   'polynomial of a knot is available.')
+
         # If single variable, use the super-fast method of Bar-Natan.
         if comp == 1 and method == 'default' and norm:
-            p = alexander.alexander(self)
+            p = alexander.alexander(self, chunk_size=chunk_size,
+                                    processes=processes)
         else:  # Use a simple method based on the Wirtinger presentation.
             if method not in ['default', 'wirtinger']:
                 raise ValueError("Available methods are 'default' and 'wirtinger'")
@@ -489,34 +488,33 @@ class Link(links_base.Link):
             raise ValueError('The link diagram is split.')
         return G.subgraph(components[1])
 
-    @sage_method
     def goeritz_matrix(self, return_graph=False):
         """
-        Call self.white_graph() and return the Goeritz matrix of the result.
-        If the return_graph flag is set, also return the graph::
+        Return the Goeritz matrix of the white graph, see white_graph.
+        Within Sage this is a sparse matrix over ZZ, and otherwise a
+        SparseIntegerMatrix from spherogram.links.goeritz.  If the
+        return_graph flag is set, also return the graph, which requires
+        Sage::
 
             sage: K=Link('4_1')
             sage: abs(K.goeritz_matrix().det())
             5
+
+        >>> abs(Link('4_1').goeritz_matrix().determinant())
+        5
         """
-        G = self.white_graph()
-        V = G.vertices()
-        N = len(V)
-        m = matrix(N, N)
-        vertex = {v: n for n, v in enumerate(V)}
-        for e in G.edges(sort=False):
-            i, j = vertex[e[0]], vertex[e[1]]
-            m[(i, j)] = m[(j, i)] = m[(i, j)] + e[2]['sign']
-        for i in range(N):
-            m[(i, i)] = -sum(m.column(i))
-        m = m.delete_rows([0]).delete_columns([0])
-        return (m, G) if return_graph else m
+        m = goeritz.goeritz_matrix(self)
+        if _within_sage:
+            m = m.sage()
+        return (m, self.white_graph()) if return_graph else m
 
-    @sage_method
+    @cached_invariant
     def signature(self, new_convention=True):
         """
         Returns the signature of the link, computed from the Goeritz matrix using
-        the algorithm of Gordon and Litherland::
+        the algorithm of Gordon and Litherland.  This does not need Sage,
+        as the inertia of the Goeritz matrix is found by exact integer
+        elimination::
 
             sage: K = Link('4a1')
             sage: K.signature()
@@ -538,55 +536,49 @@ class Link(links_base.Link):
           -2
           sage: L.signature(new_convention=False)
           2
+
+        >>> Link('9^3_12').signature() + Link('9^3_12').mirror().signature()
+        0
+        >>> Link(braid_closure=[1, 2, 1, 2, 1, 2, 1, 2]).signature()
+        -6
         """
-        m, G = self.goeritz_matrix(return_graph=True)
-        correction = sum([e[2]['sign'] for e in G.edges(sort=False)
-                          if e[2]['sign'] == e[2]['crossing'].sign])
-        ans = QuadraticForm(QQ, m).signature() + correction
-        if new_convention:
-            ans = -ans
-        return ans
+        return goeritz.signature(self, new_convention)
 
     @sage_method
     def _colorability_matrix(self):
         """Auxiliary function used by determinant."""
-        edges = self._pieces()
-        m = matrix(len(self.crossings), len(edges))
-        for c in self.crossings:
-            for i in range(4):
-                for s in edges:
-                    if (c, i) in s:
-                        ind = edges.index(s)
-                        if i % 2:
-                            m[(self.crossings.index(c), ind)] += 1
-                        else:
-                            m[(self.crossings.index(c), ind)] -= 1
-                        break
-        return m
+        return goeritz.colouring_matrix(self).sage()
 
-    @sage_method
-    def determinant(self, method='goeritz'):
+    @cached_invariant
+    def determinant(self, method='goeritz', processes=0):
         """
         Returns the determinant of the link, a non-negative integer.
 
         Possible methods are 'wirt', using the Wirtinger presentation; 'goeritz',
         using the Goeritz matrix, and 'color', using the 'colorability matrix', or
-        anything else, to compute the Alexander polynomial at -1.  Example::
+        anything else, to compute the Alexander polynomial at -1.  Only the
+        last needs Sage.  The method 'modular' works with the Goeritz matrix
+        modulo many primes, which can be spread over the given number of
+        processes; see SparseIntegerMatrix.modular_determinant.  Example::
 
             sage: K = Link( [(4,1,5,2),(6,4,7,3),(8,5,1,6),(2,8,3,7)] )  # Figure 8 knot
             sage: K.determinant()
             5
+
+        >>> K = Link('L7a3')
+        >>> K.determinant(), K.determinant(method='color'), K.determinant(method='modular')
+        (16, 16, 16)
         """
         if method == 'color':
-            M = self._colorability_matrix()
-            size = len(self.crossings) - 1
-            N = matrix(size, size)
-            for i in range(size):
-                for j in range(size):
-                    N[(i, j)] = M[(i + 1, j + 1)]
-            return abs(N.determinant())
+            M = goeritz.colouring_matrix(self)
+            if M.nrows != M.ncols:  # A component only passes over.
+                return 0
+            return abs(M.minor(0, 0).determinant()) if M.nrows else 1
         if method == 'goeritz':
-            return abs(self.goeritz_matrix().determinant())
+            return abs(goeritz.goeritz_matrix(self).determinant())
+        if method == 'modular':
+            M = goeritz.goeritz_matrix(self)
+            return abs(M.modular_determinant(processes))
         return abs(self.alexander_polynomial(multivar=False, v=[-1], norm=False))
 
     @sage_method
@@ -630,7 +622,7 @@ class Link(links_base.Link):
         from . import morse
         return morse.MorseLinkDiagram(self)
 
-    @sage_method
+    @cached_invariant
     def jones_polynomial(self, variable=None, new_convention=True):
         """
         Returns the Jones polynomial of the link, following the
@@ -664,22 +656,39 @@ class Link(links_base.Link):
           sage: U5.jones_polynomial(new_convention=False).factor()
           (q^-2) * (1 + q)^4
 
+        Outside of Sage, the answer is a laurent.LaurentPolynomial, but
+        the old conventions are only available for knots::
+
+          >>> L = Link('8_5')
+          >>> L.jones_polynomial()
+          1 - q^2 + 3*q^4 - 3*q^6 + 3*q^8 - 4*q^10 + 3*q^12 - 2*q^14 + q^16
+          >>> L.jones_polynomial(new_convention=False)
+          1 - q + 3*q^2 - 3*q^3 + 3*q^4 - 4*q^5 + 3*q^6 - 2*q^7 + q^8
+
+        There, a string variable just renames the variable::
+
+          >>> Link('K3a1').jones_polynomial('t')
+          t^2 + t^6 - t^8
         """
-        from . import jones, jones_old
+        from . import jones
+        from .laurent import LaurentPolynomial
 
-        if new_convention:
+        if new_convention or len(self.link_components) == 1:
             J = jones.jones_polynomial(self, normalized=True)
+            if not new_convention:
+                J = LaurentPolynomial({e // 2: c for e, c in J.items()})
+            if _within_sage:
+                J = J.sage()
         else:
-            if len(self.link_components) != 1:
-                J = jones_old.Jones_poly(self, new_convention=False)
-            else:
-                J = jones.jones_polynomial(self, normalized=True)
-                R = J.parent()
-                q = R.gen()
-                terms = [J[e] * q**(e // 2) for e in J.exponents()]
-                J = sum(terms, R(0))
-
-        if variable is not None:
+            if not _within_sage:
+                raise SageNotAvailable('Sorry, the old conventions for '
+                                       'links require Sage.')
+            from . import jones_old
+            J = jones_old.Jones_poly(self, new_convention=False)
+
+        if isinstance(variable, str) and not _within_sage:
+            J = LaurentPolynomial(J._coeffs, variable)
+        elif variable is not None:
             J = J(variable)
         return J
 
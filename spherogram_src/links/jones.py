@@ -6,30 +6,32 @@ Rasmussen's lectures at PCMI, Summer 2019.
 https://www.youtube.com/watch?v=--l-XOhDXOU
 https://www.youtube.com/watch?v=3VwcGHycyAE
 
-
+Nothing here needs Sage: the answers are laurent.LaurentPolynomials,
+whose sage method converts them when Sage is available.
 """
 
-from sage.all import ZZ, LaurentPolynomialRing, PerfectMatchings, PerfectMatching
 from . import exhaust
+from .laurent import LaurentPolynomial
+from .temperley_lieb import (default_tables, NoncrossingMatching, catalan,
+                             cup_partners, cap_partners)
+import numpy as np
 
-R = LaurentPolynomialRing(ZZ, 'q')
-q = R.gen()
+q = LaurentPolynomial.gen('q')
 
 
 def num_Pn(n):
     """
     An element of Jake's P_{0, n} of planar tangles from 0 points to n
-    points will be a PerfectMatching of [0,..,n-1] where
-    is_noncrossing is True.
+    points will be a NoncrossingMatching of [0,..,n-1].
     """
-    return len([m for m in PerfectMatchings(n) if m.is_noncrossing()])
+    return catalan(n // 2) if n % 2 == 0 else 0
 
 
 def insert_cup(matching, i):
     """
     Insert a new adjacent matching which joins i and i + 1.
 
-    >>> m = PerfectMatching([(0, 1), (2, 5), (3, 4)])
+    >>> m = NoncrossingMatching([(0, 1), (2, 5), (3, 4)])
     >>> insert_cup(m, 0)
     [(0, 1), (2, 3), (4, 7), (5, 6)]
     >>> insert_cup(m, 1)
@@ -37,11 +39,9 @@ def insert_cup(matching, i):
     >>> insert_cup(m, 6)
     [(0, 1), (2, 5), (3, 4), (6, 7)]
     """
-    assert len(matching.base_set()) >= i
-
-    def shift(pair):
-        return [a if a < i else a + 2 for a in pair]
-    return PerfectMatching([shift(pair) for pair in matching] + [(i, i + 1)])
+    assert len(matching) >= i
+    return NoncrossingMatching.from_partners(
+        cup_partners(list(matching.partners), i))
 
 
 def cap_off(matching, i):
@@ -49,47 +49,28 @@ def cap_off(matching, i):
     Merge i and i + 1 with a cap.  Returns a new matching and whether
     or not a circle was created.
 
-    >>> m = PerfectMatching([(0, 5), (1, 4), (2, 3)])
+    >>> m = NoncrossingMatching([(0, 5), (1, 4), (2, 3)])
     >>> cap_off(m, 2)
     ([(0, 3), (1, 2)], True)
     >>> cap_off(m, 3)
     ([(0, 3), (1, 2)], False)
     """
-    def shift(a):
-        return a if a < i else a - 2
-
-    def follow(a):
-        b = matching.partner(a)
-        if b == i:
-            b = matching.partner(i + 1)
-        elif b == i + 1:
-            b = matching.partner(i)
-        return b
-
-    n = len(matching.base_set())
-    circle = matching.partner(i) == i + 1
-    new_match = set()
-    for a in range(n):
-        if a not in {i, i + 1}:
-            u, v = shift(a), shift(follow(a))
-            if u > v:
-                u, v = v, u
-            new_match.add((u, v))
-    return PerfectMatching(new_match), circle
+    partners, circle = cap_partners(matching.partners, i)
+    return NoncrossingMatching.from_partners(partners), circle
 
 
 class VElement():
     """
     An element of some V_{0, n} which is the free R-module on P_{0, n}
 
-    >>> m = PerfectMatching([(0, 1), (3, 4), (2, 5)])
+    >>> m = NoncrossingMatching([(0, 1), (3, 4), (2, 5)])
     >>> v1 = VElement(m)
     >>> v1
     (1)*[(0, 1), (2, 5), (3, 4)]
     >>> v2 = (q + q**-1)*v1
     >>> v2
     (q^-1 + q)*[(0, 1), (2, 5), (3, 4)]
-    >>> v3 = q* VElement(PerfectMatching([(5, 0), (4, 3), (1, 2)]))
+    >>> v3 = q* VElement(NoncrossingMatching([(5, 0), (4, 3), (1, 2)]))
     >>> v1 + v2 + v3
     (q^-1 + 1 + q)*[(0, 1), (2, 5), (3, 4)] + (q)*[(0, 5), (1, 2), (3, 4)]
     >>> v2.insert_cup(6)
@@ -100,23 +81,22 @@ class VElement():
     def __init__(self, spec=None):
         self.dict = dict()
         if spec is None:
-            spec = PerfectMatching([])
+            spec = NoncrossingMatching([])
         if isinstance(spec, dict):
             self.dict = spec
-        if isinstance(spec, PerfectMatching):
-            assert spec.is_noncrossing()
-            self.dict[spec] = R.one()
+        if isinstance(spec, NoncrossingMatching):
+            self.dict[spec] = LaurentPolynomial(1)
 
     def __rmul__(self, other):
-        if other in R:
-            other = R(other)
+        if isinstance(other, (int, LaurentPolynomial)):
             return VElement({m: other * c for m, c in self.dict.items()})
+        return NotImplemented
 
     def __add__(self, other):
         if isinstance(other, VElement):
             ans_dict = self.dict.copy()
             for matching, coeff in other.dict.items():
-                cur_coeff = self.dict.get(matching, R.zero())
+                cur_coeff = self.dict.get(matching, LaurentPolynomial())
                 ans_dict[matching] = cur_coeff + coeff
         return VElement(ans_dict)
 
@@ -137,7 +117,7 @@ class VElement():
         ans_dict = dict()
         for matching, coeff in self.dict.items():
             new_matching, has_circle = cap_off(matching, i)
-            cur_coeff = ans_dict.get(new_matching, R.zero())
+            cur_coeff = ans_dict.get(new_matching, LaurentPolynomial())
             if has_circle:
                 coeff = (q + q**-1) * coeff
             ans_dict[new_matching] = cur_coeff + coeff
@@ -153,21 +133,169 @@ class VElement():
         return self.cap_then_cup(i) + (-q) * self
 
     def is_multiple_of_empty_pairing(self):
-        return len(self.dict) == 1 and (PerfectMatching([]) in self.dict)
+        return len(self.dict) == 1 and (NoncrossingMatching([]) in self.dict)
+
+
+# The vectorized backend.
+#
+# Matchings are represented by their ranks as in temperley_lieb.  An
+# element of V_{0, n} is then stored as an array of ranks together with
+# a dense 2-dimensional array of integer coefficients, where the
+# coefficient of q^(lo + j) for the matching ranks[r] is coeffs[r, j].
+
+
+# Beyond this, switch from int64 to Python integers.
+_coefficient_bound = 2**60
+
+
+class VectorVElement():
+    """
+    An element of V_{0, n} stored as arrays, see above.
+
+    >>> v = VectorVElement().insert_cup(0).insert_cup(0)
+    >>> v.width, v.ranks.tolist()
+    (4, [1])
+    >>> w = v.add_positive_crossing(1)
+    >>> sorted(w.terms().items())
+    [(0, [(1, -1)]), (1, [(0, 1)])]
+    >>> w.cap_off(0).cap_off(0).terms()
+    {0: [(-2, 1), (0, 1)]}
+    """
+    def __init__(self, width=0, ranks=None, coeffs=None, lo=0, tables=None):
+        self.width = width
+        if ranks is None:
+            ranks = np.zeros(1, dtype=np.int64)
+            coeffs = np.ones((1, 1), dtype=np.int64)
+        self.ranks, self.coeffs, self.lo = ranks, coeffs, lo
+        self.tables = default_tables if tables is None else tables
+
+    def terms(self):
+        """
+        A dictionary from ranks to lists of (exponent, coefficient).
+        """
+        return {int(r): [(self.lo + j, int(c)) for j, c in enumerate(row) if c]
+                for r, row in zip(self.ranks, self.coeffs)}
+
+    def insert_cup(self, i):
+        ranks = self.tables.cup(self.width, self.ranks, i)
+        return VectorVElement(self.width + 2, ranks, self.coeffs, self.lo,
+                              self.tables)
+
+    def _capped(self, i):
+        """
+        The image under cap_off before merging terms, as (ranks, coeffs,
+        lo), where the coefficients have two extra columns.
+        """
+        ranks, circle = self.tables.cap(self.width, self.ranks, i)
+        m, E = self.coeffs.shape
+        coeffs = np.zeros((m, E + 2), dtype=self.coeffs.dtype)
+        coeffs[~circle, 1:E + 1] = self.coeffs[~circle]
+        # Multiply by q + q^-1.
+        coeffs[circle, 0:E] += self.coeffs[circle]
+        coeffs[circle, 2:E + 2] += self.coeffs[circle]
+        return ranks, coeffs, self.lo - 1
+
+    def cap_off(self, i):
+        ranks, coeffs, lo = self._capped(i)
+        return _combine(self.width - 2, [(ranks, coeffs, lo)], self.tables)
+
+    def cap_then_cup(self, i):
+        return self.cap_off(i).insert_cup(i)
+
+    def _crossing(self, i, sign):
+        """
+        Computes self + (-q)*self.cap_then_cup(i) when sign is 1 and
+        self.cap_then_cup(i) + (-q)*self when sign is -1.
+        """
+        ranks, coeffs, lo = self._capped(i)
+        ranks = self.tables.cup(self.width - 2, ranks, i)
+        if sign == 1:
+            terms = [(self.ranks, self.coeffs, self.lo), (ranks, -coeffs, lo + 1)]
+        else:
+            terms = [(ranks, coeffs, lo), (self.ranks, -self.coeffs, self.lo + 1)]
+        return _combine(self.width, terms, self.tables)
+
+    def add_positive_crossing(self, i):
+        return self._crossing(i, 1)
+
+    def add_negative_crossing(self, i):
+        return self._crossing(i, -1)
+
+    def is_multiple_of_empty_pairing(self):
+        return self.width == 0 and len(self.ranks) == 1
+
+
+def _combine(width, terms, tables=None):
+    """
+    Add up the given (ranks, coeffs, lo) triples, merging equal ranks
+    and trimming zeros.
+    """
+    lo = min(t[2] for t in terms)
+    hi = max(t[2] + t[1].shape[1] for t in terms)
+    dtype = np.int64
+    if any(t[1].dtype == object for t in terms):
+        dtype = object
+    ranks = np.concatenate([t[0] for t in terms])
+    coeffs = np.zeros((len(ranks), hi - lo), dtype=dtype)
+    row = 0
+    for r, c, l in terms:
+        coeffs[row:row + len(r), l - lo:l - lo + c.shape[1]] = c
+        row += len(r)
+    unique, inverse = np.unique(ranks, return_inverse=True)
+    merged = np.zeros((len(unique), hi - lo), dtype=dtype)
+    np.add.at(merged, inverse, coeffs)
+
+    nonzero_rows = np.any(merged != 0, axis=1)
+    unique, merged = unique[nonzero_rows], merged[nonzero_rows]
+    nonzero_cols = np.flatnonzero(np.any(merged != 0, axis=0))
+    if len(nonzero_cols) == 0:
+        return VectorVElement(width, unique, np.zeros((0, 1), dtype=dtype), 0,
+                              tables)
+    first, last = nonzero_cols[0], nonzero_cols[-1]
+    merged = merged[:, first:last + 1]
+    if dtype != object and np.abs(merged).max() > _coefficient_bound:
+        merged = merged.astype(object)
+    return VectorVElement(width, unique, merged, lo + int(first), tables)
+
+
+def _morse_encoding(link, exhaustion=None):
+    if isinstance(link, exhaust.MorseEncoding):
+        return link
+    if exhaustion is None:
+        exhaustion = exhaust.MorseExhaustion(link)
+    return exhaust.MorseEncoding(exhaustion)
 
 
-def kauffman_bracket(link):
+def kauffman_bracket(link, method='vectorized', tables=None, exhaustion=None):
     """
+    The method can be 'vectorized', which uses VectorVElement, or
+    'matchings', which uses VElement.  For the former, tables is the
+    temperley_lieb.TransitionTables to use, by default the one shared
+    by the whole process.
+
+    The cost grows exponentially with the width of the MorseExhaustion
+    used, so for large links it can pay to find a good one with
+    exhaust.planned_exhaustion first, check its width, and pass it in.
+
+    >>> from spherogram import Link
     >>> L = Link('T(2, 3)')
     >>> kauffman_bracket(L)
     q^-2 + 1 + q^2 - q^6
+    >>> kauffman_bracket(L, method='matchings')
+    q^-2 + 1 + q^2 - q^6
+    >>> E = exhaust.planned_exhaustion(L)
+    >>> E.width
+    2
+    >>> kauffman_bracket(L, exhaustion=E)
+    q^-2 + 1 + q^2 - q^6
     """
-    ans = VElement()
-    if isinstance(link, exhaust.MorseEncoding):
-        encoded = link
+    encoded = _morse_encoding(link, exhaustion)
+    if method == 'vectorized':
+        ans = VectorVElement(tables=tables)
+    elif method == 'matchings':
+        ans = VElement()
     else:
-        exhaustion = exhaust.MorseExhaustion(link)
-        encoded = exhaust.MorseEncoding(exhaustion)
+        raise ValueError("Method must be 'vectorized' or 'matchings'")
     for event in encoded:
         if event.kind == 'cup':
             ans = ans.insert_cup(event.min)
@@ -180,11 +308,14 @@ def kauffman_bracket(link):
             else:
                 ans = ans.add_negative_crossing(event.min)
     assert ans.is_multiple_of_empty_pairing()
-    return ans.dict[PerfectMatching([])]
+    if method == 'vectorized':
+        return LaurentPolynomial.from_array(ans.lo, ans.coeffs[0])
+    return ans.dict[NoncrossingMatching([])]
 
 
-def jones_polynomial(link, normalized=True):
-    bracket = kauffman_bracket(link)
+def jones_polynomial(link, normalized=True, method='vectorized', tables=None,
+                     exhaustion=None):
+    bracket = kauffman_bracket(link, method, tables, exhaustion)
     if normalized:
         factor = q + q**-1
         norm_bracket = bracket // factor
@@ -200,6 +331,8 @@ def jones_polynomial(link, normalized=True):
 def test_one_link(link):
     new_poly = jones_polynomial(link)
     old_poly = link.jones_polynomial(new_convention=True)
+    if not isinstance(old_poly, LaurentPolynomial):
+        new_poly = new_poly.sage()
     return new_poly - old_poly == 0
 
 
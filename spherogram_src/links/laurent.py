@@ -0,0 +1,182 @@
+"""
+A minimal Laurent polynomial in one variable with integer
+coefficients, so that invariants such as the Jones polynomial can be
+computed without Sage.  Within Sage, use the sage method to convert to
+an element of LaurentPolynomialRing(ZZ, variable).
+
+>>> q = LaurentPolynomial.gen()
+>>> f = (q + q**-1)**2 - 3
+>>> f
+q^-2 - 1 + q^2
+>>> (f * (q + q**-1)) // (q + q**-1) == f
+True
+>>> f.exponents(), f.coefficients(), f[0]
+([-2, 0, 2], [1, -1, 1], -1)
+>>> f(2)
+3.25
+"""
+
+
+class LaurentPolynomial():
+    """
+    A Laurent polynomial, stored as a dictionary from exponents to
+    nonzero integer coefficients.
+    """
+    def __init__(self, coeffs=None, variable='q'):
+        if coeffs is None:
+            coeffs = dict()
+        elif not isinstance(coeffs, dict):
+            coeffs = {0: coeffs}
+        self._coeffs = {int(e): int(c) for e, c in coeffs.items() if c}
+        self.variable = variable
+
+    @classmethod
+    def gen(cls, variable='q'):
+        return cls({1: 1}, variable)
+
+    @classmethod
+    def from_array(cls, lo, coeffs, variable='q'):
+        """
+        The polynomial whose coefficient of q^(lo + j) is coeffs[j].
+        """
+        return cls({lo + j: c for j, c in enumerate(coeffs) if c}, variable)
+
+    def _coerce(self, other):
+        if isinstance(other, LaurentPolynomial):
+            return other
+        return LaurentPolynomial(other, self.variable)
+
+    def items(self):
+        return sorted(self._coeffs.items())
+
+    def exponents(self):
+        return sorted(self._coeffs)
+
+    def coefficients(self):
+        return [c for e, c in self.items()]
+
+    def __getitem__(self, exponent):
+        return self._coeffs.get(exponent, 0)
+
+    def degree(self):
+        return max(self._coeffs)
+
+    def valuation(self):
+        return min(self._coeffs)
+
+    def __bool__(self):
+        return bool(self._coeffs)
+
+    def __eq__(self, other):
+        if not isinstance(other, (LaurentPolynomial, int)):
+            return NotImplemented
+        return self._coeffs == self._coerce(other)._coeffs
+
+    def __hash__(self):
+        if set(self._coeffs) <= {0}:
+            return hash(self[0])
+        return hash(frozenset(self._coeffs.items()))
+
+    def __neg__(self):
+        return LaurentPolynomial({e: -c for e, c in self._coeffs.items()},
+                                 self.variable)
+
+    def __add__(self, other):
+        if not isinstance(other, (LaurentPolynomial, int)):
+            return NotImplemented
+        ans = dict(self._coeffs)
+        for e, c in self._coerce(other)._coeffs.items():
+            ans[e] = ans.get(e, 0) + c
+        return LaurentPolynomial(ans, self.variable)
+
+    __radd__ = __add__
+
+    def __sub__(self, other):
+        if not isinstance(other, (LaurentPolynomial, int)):
+            return NotImplemented
+        return self + (-self._coerce(other))
+
+    def __rsub__(self, other):
+        return (-self) + other
+
+    def __mul__(self, other):
+        if not isinstance(other, (LaurentPolynomial, int)):
+            return NotImplemented
+        ans = dict()
+        for a, x in self._coeffs.items():
+            for b, y in self._coerce(other)._coeffs.items():
+                ans[a + b] = ans.get(a + b, 0) + x * y
+        return LaurentPolynomial(ans, self.variable)
+
+    __rmul__ = __mul__
+
+    def __pow__(self, n):
+        if len(self._coeffs) == 1:
+            [(e, c)] = self._coeffs.items()
+            if c in (1, -1) or n >= 0:
+                return LaurentPolynomial({n * e: c**abs(n)}, self.variable)
+        if n < 0:
+            raise ValueError('Only monomials with unit coefficients can be '
+                             'raised to negative powers')
+        ans, power = LaurentPolynomial(1, self.variable), self
+        while n:
+            if n & 1:
+                ans = ans * power
+            power, n = power * power, n >> 1
+        return ans
+
+    def __floordiv__(self, other):
+        """
+        The quotient by long division from the top degree down, which
+        is exact when other divides self.
+        """
+        other = self._coerce(other)
+        if not other:
+            raise ZeroDivisionError
+        top, lead = other.degree(), other[other.degree()]
+        ans, rem = dict(), dict(self._coeffs)
+        low = self.valuation() - other.valuation() if self else 0
+        while rem:
+            e = max(rem)
+            shift = e - top
+            if shift < low or rem[e] % lead != 0:
+                break
+            c = rem[e] // lead
+            ans[shift] = c
+            for f, d in other._coeffs.items():
+                rem[f + shift] = rem.get(f + shift, 0) - c * d
+                if rem[f + shift] == 0:
+                    del rem[f + shift]
+        return LaurentPolynomial(ans, self.variable)
+
+    def __call__(self, x):
+        """
+        Evaluates the polynomial at x.
+        """
+        return sum((c * x**e for e, c in self.items()), 0)
+
+    def __repr__(self):
+        if not self._coeffs:
+            return '0'
+        ans = ''
+        for e, c in self.items():
+            if e == 0:
+                term = str(abs(c))
+            else:
+                term = self.variable if e == 1 else '%s^%d' % (self.variable, e)
+                if abs(c) != 1:
+                    term = '%d*%s' % (abs(c), term)
+            if not ans:
+                ans = term if c > 0 else '-' + term
+            else:
+                ans += (' + ' if c > 0 else ' - ') + term
+        return ans
+
+    def sage(self):
+        """
+        The corresponding element of LaurentPolynomialRing(ZZ, variable).
+        """
+        from sage.all import LaurentPolynomialRing, ZZ
+        R = LaurentPolynomialRing(ZZ, self.variable)
+        t = R.gen()
+        return sum((c * t**e for e, c in self.items()), R.zero())
@@ -532,6 +532,146 @@ class Link():
             for c, X in enumerate(self.crossings):
                 X.label = c
 
+    @classmethod
+    def from_gluings(cls, gluings):
+        """
+        Fast constructor from an array of shape (n, 4) whose entry [c, i]
+        is 4*d + j when strand i of crossing c is glued to strand j of
+        crossing d, with the understrand at each crossing joining 0 and
+        2.  The orientations are chosen as in CompactLink.from_gluings
+        and planarity is not checked.
+
+        >>> L = Link.from_gluings([[5, 4, 7, 6], [1, 0, 3, 2]])
+        >>> L, L.linking_number()
+        (<Link: 2 comp; 2 cross>, -1.0)
+        """
+        from .compact import CompactLink
+        return CompactLink.from_gluings(gluings).to_link()
+
+    @classmethod
+    def from_braid_closure(cls, word, num_strands=None):
+        """
+        Fast constructor for the closure of a long braid word, which
+        can be any iterable of generators, following the conventions of
+        Link(braid_closure=word).  The word is read once into flat
+        arrays, without going through Strands, and planarity is not
+        checked.
+
+        >>> Link.from_braid_closure(iter([1, 2, -1, -2]))
+        <Link: 1 comp; 4 cross>
+        """
+        from .compact import CompactLink
+        return CompactLink.from_braid_closure(word, num_strands).to_link()
+
+    @classmethod
+    def from_PD(cls, code, trusted=True):
+        """
+        Fast constructor for bulk loading PD codes, giving the same Link
+        as Link(code).  The orientations, components and strand labels
+        are all worked out in a single pass over plain lists before any
+        Crossing is created, rather than by repeatedly rebuilding the
+        link.  The code is always checked for consistency, but only
+        checked to be planar if trusted is False.
+
+        >>> code = [(8,3,1,4), (2,6,3,5), (6,2,7,1), (4,7,5,8)]
+        >>> Link.from_PD(code).PD_code() == Link(code).PD_code()
+        True
+        >>> L = Link('L10a90')
+        >>> Link.from_PD(L.PD_code()).DT_code() == L.DT_code()
+        True
+        >>> Link.from_PD([(1, 2, 3, 4)])
+        Traceback (most recent call last):
+            ...
+        ValueError: PD code isn't consistent
+        """
+        link = cls(check_planarity=False, build=False)
+        n = len(code)
+        gluings, glue = dict(), [None] * (4 * n)
+        for c, X in enumerate(code):
+            for i, x in enumerate(X):
+                f = 4 * c + i
+                if x in gluings:
+                    gluings[x].append((c, i))
+                    d, j = gluings[x][0]
+                    glue[f], glue[4 * d + j] = 4 * d + j, f
+                else:
+                    gluings[x] = [(c, i)]
+        if n == 0:
+            link._build()
+            return link
+        if None in glue or any(len(v) != 2 for v in gluings.values()):
+            raise ValueError("PD code isn't consistent")
+        starts = link._component_starts_from_PD(code, set(gluings), gluings)
+
+        # Orient, so that each component leaves its start.
+        incoming = [False] * (4 * n)
+        for c, i in starts:
+            start = s = 4 * c + i
+            while True:
+                d = glue[s]
+                incoming[d] = True
+                s = d ^ 2
+                if s == start:
+                    break
+
+        # Rotate each crossing so that the understrand enters at 0, as
+        # Crossing.orient does, and record its sign.
+        rot = [0 if incoming[4 * c] else 2 for c in range(n)]
+        signs = [1 if incoming[4 * c + (3 + r) % 4] else -1
+                 for c, r in enumerate(rot)]
+        new = [4 * c + (i - rot[c]) % 4 for c in range(n) for i in range(4)]
+        adjacent = [None] * (4 * n)
+        for s, t in enumerate(new):
+            adjacent[t] = new[glue[s]]
+
+        # Walk the components from entry points on the start strands.
+        entries = [4 * c + (0 if i % 2 == 0 else 3 if signs[c] == 1 else 1)
+                   for c, i in starts]
+        labels, comps, components = [None] * (4 * n), [None] * (4 * n), []
+        label = 0
+        for k, start in enumerate(entries):
+            component, e, first = [], start, label
+            while True:
+                component.append(e)
+                labels[e], labels[e ^ 2] = label, label + 1
+                comps[e] = comps[e ^ 2] = k
+                label += 1
+                e = adjacent[e ^ 2]
+                if e == start:
+                    break
+            labels[component[-1] ^ 2] = first
+            components.append(component)
+
+        crossings = [Crossing(c) for c in range(n)]
+        for c, C in enumerate(crossings):
+            C.adjacent[:] = [(crossings[t >> 2], t & 3)
+                             for t in adjacent[4 * c:4 * c + 4]]
+            C.sign = signs[c]
+            C.directions = {(0, 2), (3, 1) if signs[c] == 1 else (1, 3)}
+        link.crossings = crossings
+        link_components = LinkComponents(
+            [CrossingEntryPoint(crossings[e >> 2], e & 3) for e in component]
+            for component in components)
+        if not all((labels[4 * c] + labels[4 * c + (3 if sign == 1 else 1)]) % 2
+                   for c, sign in enumerate(signs)):
+            link._build_components([comp[0] for comp in link_components])
+        else:
+            for c, C in enumerate(crossings):
+                C.strand_labels[:] = labels[4 * c:4 * c + 4]
+                C.strand_components[:] = comps[4 * c:4 * c + 4]
+            link.labels = Labels()
+            for component in link_components:
+                for cep in component:
+                    link.labels.add(cep)
+            link.link_components = link_components
+            link._crossing_indices = {C: i for i, C in enumerate(crossings)}
+            link._component_positions = {
+                cep: (k, i) for k, component in enumerate(link_components)
+                for i, cep in enumerate(component)}
+        if not trusted and not link.is_planar():
+            raise ValueError("Link isn't planar")
+        return link
+
     def _crossings_from_string(self, spec):
         """
         >>> Link('T(3, 2)')
@@ -875,8 +1015,40 @@ class Link():
                     new_starts.append(cep.next())
             self._build_components(component_starts=new_starts)
             assert self._DT_convention_holds()
+            return
 
         self.link_components = components
+        self._crossing_indices = {C: i for i, C in enumerate(self.crossings)}
+        self._component_positions = {cep: (k, i)
+                                     for k, component in enumerate(components)
+                                     for i, cep in enumerate(component)}
+
+    def _crossing_index(self):
+        """
+        A dictionary mapping each crossing to its position in
+        self.crossings.  Anything which changes self.crossings must
+        invalidate it by setting self._crossing_indices to None.
+        """
+        index = getattr(self, '_crossing_indices', None)
+        if index is None:
+            index = {C: i for i, C in enumerate(self.crossings)}
+            self._crossing_indices = index
+        return index
+
+    def _component_position(self):
+        """
+        A dictionary mapping each CrossingEntryPoint in
+        self.link_components to the pair (component index, position in
+        the component).  It is rebuilt if it has been invalidated by
+        setting self._component_positions to None.
+        """
+        positions = getattr(self, '_component_positions', None)
+        if positions is None:
+            positions = {cep: (k, i)
+                         for k, component in enumerate(self.link_components)
+                         for i, cep in enumerate(component)}
+            self._component_positions = positions
+        return positions
 
     def digraph(self):
         """
@@ -1149,6 +1321,31 @@ class Link():
     def __len__(self):
         return len(self.crossings)
 
+    def canonical_code(self, ordered_components=False):
+        """
+        A bytes object which depends only on the planar isotopy class of
+        the oriented link diagram, suitable as a key when hashing or
+        deduplicating diagrams.  It does not depend on the labels of
+        the crossings or the order of the components unless
+        ordered_components is True.  For split diagrams, how the
+        pieces are nested in the plane is ignored.
+
+        >>> K = Link('K8n1')
+        >>> code = K.canonical_code()
+        >>> Link(K.PD_code(min_strand_index=7)).canonical_code() == code
+        True
+        >>> K.mirror().canonical_code() == code
+        False
+        >>> L = Link('L13n11308')
+        >>> M = L.sublink([4, 3, 2, 1, 0])
+        >>> M.canonical_code() == L.canonical_code()
+        True
+        >>> M.canonical_code(True) == L.canonical_code(True)
+        False
+        """
+        from . import canonical
+        return canonical.canonical_code(self, ordered_components)
+
     def PD_code(self, KnotTheory=False, min_strand_index=0):
         """
         The planar diagram code for the link.  When reconstructing a link
@@ -1253,8 +1450,17 @@ class Link():
         [<Link: 1 comp; 1 cross>, <Link: 1 comp; 1 cross>]
         """
         link = self.copy() if not destroy_original else self
-        return [type(self)(list(component), check_planarity=False)
-                for component in link.digraph().weak_components()]
+        # Keep the crossings in their original order, rather than the
+        # order of the sets returned by weak_components.
+        piece_of = dict()
+        for i, component in enumerate(link.digraph().weak_components()):
+            for C in component:
+                piece_of[C] = i
+        pieces = dict()
+        for C in link.crossings:
+            pieces.setdefault(piece_of[C], []).append(C)
+        return [type(self)(crossings, check_planarity=False)
+                for crossings in pieces.values()]
 
     def deconnect_sum(self, destroy_original=False):
         """
@@ -1290,10 +1496,7 @@ class Link():
         >>> K.writhe()
         0
         """
-        writhe_value = 0
-        for i in range(len(self.crossings)):
-            writhe_value += self.crossings[i].sign
-        return writhe_value
+        return sum(C.sign for C in self.crossings)
 
     def linking_number(self):
         """
@@ -1301,17 +1504,13 @@ class Link():
         or the sum of the linking numbers of all pairs of components
         in general.
         """
+        positions = self._component_position()
         n = 0
-        for s in self.link_components:
-            tally = [0] * len(self.crossings)
-            for c in s:
-                for i, x in enumerate(self.crossings):
-                    if c[0] == x:
-                        tally[i] += 1
-            for i, m in enumerate(tally):
-                if m == 1:
-                    n += (self.crossings)[i].sign
-        n = n / 4
+        for c in self.crossings:
+            a, b = [positions[cep][0] for cep in c.entry_points()]
+            if a != b:
+                n += c.sign
+        n = n / 2
         return n
 
     def _pieces(self):
@@ -1363,6 +1562,7 @@ class Link():
         for c in second.crossings:
             c.label = (c.label, 2)
             first.crossings.append(c)
+        first._crossing_indices = None
         return type(self)(first.crossings)
 
     def copy(self, recursively=False):
@@ -1380,12 +1580,13 @@ class Link():
         else:
             crossings = [Crossing(c.label) for c in self.crossings]
             old_to_new = dict(zip(self.crossings, crossings))
+            index = self._crossing_index()
             loose_strands = set((n, i) for n in range(len(crossings))
                                 for i in range(4))
             while loose_strands:
                 n, i = loose_strands.pop()
                 adj_c, adj_i = self.crossings[n].adjacent[i]
-                adj_n = self.crossings.index(adj_c)
+                adj_n = index[adj_c]
                 crossings[n][i] = crossings[adj_n][adj_i]
                 loose_strands.remove((adj_n, adj_i))
 
@@ -521,6 +521,7 @@ class OrthogonalLinkDiagram(list):
         """
         self.link.link_components = [component[0].component()
                                      for component in self.link.link_components]
+        self.link._component_positions = None
         self.strand_CEP_to_component = stc = dict()
         self.strand_CEPs = []
         for n, component in enumerate(self.link.link_components):
@@ -9,9 +9,14 @@ Details to hopefully appear in some paper or other.  I wouldn't hold
 your breath, though.
 """
 import random
+import collections
+import concurrent.futures
+import os
+import numpy as np
 from .. import graphs
 from . import links, twist
 from spherogram.planarmap import random_map as raw_random_map
+from spherogram.planarmap import RandomGenerator
 
 
 class LinkGenerationError(Exception):
@@ -21,23 +26,27 @@ class LinkGenerationError(Exception):
 
 
 def random_map(num_verts, edge_conn_param=4,
-               num_link_comps=0, max_tries=100):
+               num_link_comps=0, max_tries=100, rng=None, stats=None):
     """
     Returns a dictionary of endpoints of edges in the form:
 
     (signed edge) -> (vertex, position)
+
+    If rng is a RandomGenerator, it is used in place of Python's random
+    number generator.  See spherogram.planarmap.random_map for stats.
     """
+    randrange = random.randrange if rng is None else rng.randrange
     if isinstance(num_verts, list):
         data = num_verts
     else:
         data = raw_random_map(num_verts, edge_conn_param,
-                              num_link_comps, max_tries)
+                              num_link_comps, max_tries, rng, stats)
         if data is None:
             raise LinkGenerationError(max_tries)
 
     vertex_adjacencies = []
     for vertex, adjacencies in data:
-        if random.randrange(2):
+        if randrange(2):
             adjacencies = adjacencies[1:] + adjacencies[:1]
         vertex_adjacencies.append(adjacencies)
 
@@ -48,6 +57,27 @@ def random_map(num_verts, edge_conn_param=4,
     return edge_adjacencies
 
 
+def random_gluings(num_verts, edge_conn_param=4,
+                   num_link_comps=0, max_tries=100, rng=None, stats=None):
+    """
+    The array version of random_map, returning the gluings of a random
+    map as accepted by Link.from_gluings, with the vertices rotated at
+    random just as in random_map.
+    """
+    randrange = random.randrange if rng is None else rng.randrange
+    gluings = raw_random_map(num_verts, edge_conn_param, num_link_comps,
+                             max_tries, rng, stats, output='gluings')
+    if gluings is None:
+        raise LinkGenerationError(max_tries)
+    n = len(gluings)
+    shift = np.repeat([randrange(2) for v in range(n)], 4)
+    flat = np.arange(4 * n)
+    rotated = (flat & ~3) | ((flat - shift) & 3)
+    ans = np.empty(4 * n, dtype=np.int32)
+    ans[rotated] = rotated[gluings.ravel()]
+    return ans.reshape((n, 4))
+
+
 def map_to_link(map):
     num_edges = len(map) // 2
     crossings = [links.Crossing() for i in range(num_edges // 2)]
@@ -97,7 +127,8 @@ def random_link(crossings,
                 simplify='basic',
                 prime_decomposition=True,
                 return_all_pieces=False,
-                max_tries=100):
+                max_tries=100,
+                rng=None):
     """
     Generates a random link from a model that starts with a random
     4-valent planar graph sampled with the uniform distribution by
@@ -156,6 +187,11 @@ def random_link(crossings,
        fewer components than requested.  This is because a prime piece
        can have fewer components than the link as a whole.
 
+    5. ``rng``: A ``RandomGenerator`` from ``spherogram.planarmap``, or an
+       integer seed for one, used to sample G.  Its numbers are drawn in
+       C, which is much faster for large G.  By default, Python's random
+       number generator is used.
+
 
     Some examples:
 
@@ -166,23 +202,29 @@ def random_link(crossings,
     >>> L= random_link(30, consistent_twist_regions=True, simplify = 'global')
     >>> isinstance(random_link(30, return_all_pieces=True), list)
     True
+    >>> K = random_link(50, rng=7, simplify=None, prime_decomposition=False)
+    >>> K.PD_code() == random_link(50, rng=7, simplify=None,
+    ...                            prime_decomposition=False).PD_code()
+    True
     """
     # This means no trivial loops.  PlanarMap accepts 6, which means
     # no bigons, but this is unbearably slow.
     edge_conn_param = 4
+    if rng is not None and not isinstance(rng, RandomGenerator):
+        rng = RandomGenerator(rng)
 
     # Generate the initial link
     if num_components == 'any':
-        plane_map = random_map(crossings, edge_conn_param)
-        link = map_to_link(plane_map)
+        gluings = random_gluings(crossings, edge_conn_param, rng=rng)
+        link = links.Link.from_gluings(gluings)
     elif initial_map_gives_link:
-        plane_map = random_map(crossings, edge_conn_param,
-                               num_components, max_tries)
-        link = map_to_link(plane_map)
+        gluings = random_gluings(crossings, edge_conn_param,
+                                 num_components, max_tries, rng)
+        link = links.Link.from_gluings(gluings)
     else:
         for i in range(max_tries):
-            plane_map = random_map(crossings, edge_conn_param)
-            link = map_to_link(plane_map)
+            gluings = random_gluings(crossings, edge_conn_param, rng=rng)
+            link = links.Link.from_gluings(gluings)
             if len(link.link_components) >= num_components:
                 break
 
@@ -221,6 +263,117 @@ def random_link(crossings,
     else:
         return link
 
+
+def item_seed(seed, index):
+    """
+    The seed used for item index of random_links_stream(..., seed).
+    These are derived with numpy's SeedSequence, so the streams of
+    random numbers they give are independent of one another.
+    """
+    state = np.random.SeedSequence(seed, spawn_key=(index,)).generate_state(2)
+    return int(state[0]) << 32 | int(state[1])
+
+
+def _random_PD(seed, crossings, kwargs):
+    """
+    Runs random_link with both Python's random number generator and the
+    one used for the planar map seeded as given, restoring the state of
+    the former afterwards, and returns the result as pairs (PD code,
+    number of unlinked unknots).
+    """
+    state = random.getstate()
+    try:
+        random.seed(seed)
+        ans = random_link(crossings, rng=seed, **kwargs)
+    finally:
+        random.setstate(state)
+    pieces = ans if isinstance(ans, list) else [ans]
+    return [(L.PD_code(), L.unlinked_unknot_components) for L in pieces]
+
+
+def _random_PD_chunk(seeds, crossings, kwargs):
+    return [_random_PD(seed, crossings, kwargs) for seed in seeds]
+
+
+def _chunk_seeds(seed, count, chunksize):
+    for start in range(0, count, chunksize):
+        yield [item_seed(seed, i)
+               for i in range(start, min(start + chunksize, count))]
+
+
+def _from_PD(pieces, output, all_pieces):
+    if output == 'PD':
+        ans = [code for code, unknots in pieces]
+    else:
+        ans = []
+        for code, unknots in pieces:
+            L = links.Link.from_PD(code)
+            L.unlinked_unknot_components += unknots
+            ans.append(L)
+    return ans if all_pieces else ans[0]
+
+
+def random_links_stream(crossings, count, seed=None, workers=None,
+                        output='link', chunksize=64, **kwargs):
+    """
+    Generates count random links, yielding each one in turn.  The
+    remaining keyword arguments are passed on to random_link.
+
+    Item i is generated with Python's random number generator and the
+    rng argument of random_link both seeded by item_seed(seed, i), so
+    the output only depends on the seed and not on how the work is
+    split up; if no seed is given, one is chosen at random.  Hence rng
+    can't be given.  The items are generated in chunks of chunksize on a pool
+    of the given number of worker processes, defaulting to one per CPU,
+    with only a bounded number of chunks in flight at once.  With
+    workers=0, everything is done in the current process.
+
+    The output can be 'link' or 'PD', in which case PD codes are
+    yielded instead, skipping the cost of building a Link; note that a
+    PD code doesn't record any unlinked unknots.  When
+    return_all_pieces is set, each item is a list of these.
+
+    >>> codes = random_links_stream(20, 3, seed=1, workers=0, output='PD')
+    >>> list(codes) == list(random_links_stream(20, 3, seed=1, output='PD'))
+    True
+    >>> L = next(random_links_stream(20, 1, seed=1, workers=0))
+    >>> L.PD_code() == next(random_links_stream(20, 1, seed=1, output='PD'))
+    True
+    >>> next(random_links_stream(20, 1, rng=1))
+    Traceback (most recent call last):
+        ...
+    TypeError: random_links_stream seeds rng itself; give a seed instead
+    """
+    if output not in ('link', 'PD'):
+        raise ValueError("Output must be 'link' or 'PD'")
+    if 'rng' in kwargs:
+        raise TypeError('random_links_stream seeds rng itself; '
+                        'give a seed instead')
+    if seed is None:
+        seed = random.getrandbits(64)
+    all_pieces = kwargs.get('return_all_pieces', False)
+    chunks = _chunk_seeds(seed, count, chunksize)
+    if workers == 0:
+        for seeds in chunks:
+            for pieces in _random_PD_chunk(seeds, crossings, kwargs):
+                yield _from_PD(pieces, output, all_pieces)
+        return
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+    with concurrent.futures.ProcessPoolExecutor(workers) as executor:
+        max_pending = 2 * workers
+        pending = collections.deque()
+        for seeds in chunks:
+            pending.append(executor.submit(_random_PD_chunk, seeds,
+                                           crossings, kwargs))
+            if len(pending) >= max_pending:
+                for pieces in pending.popleft().result():
+                    yield _from_PD(pieces, output, all_pieces)
+        while pending:
+            for pieces in pending.popleft().result():
+                yield _from_PD(pieces, output, all_pieces)
+
 # def random_knot(crossings, **kwargs):
 #     return random_link(crossings, num_components=1, **kwargs)
 
@@ -6,9 +6,13 @@ Code written by Malik Obeidin.
 
 from .ordered_set import OrderedSet
 from .simplify import reverse_type_II
+from .links_base import CrossingStrand
 from .links_base import Link  # Used for testing only
 from .. import ClosedBraid    # Used for testing only
+from .goeritz import SparseIntegerMatrix
 from itertools import combinations
+from bisect import bisect_left
+import numpy as np
 
 
 def cyclic_permute(l, n):
@@ -50,15 +54,11 @@ def seifert_crossing_entry(crossing_strand):
 
 def admissible_moves(link):
     circles = seifert_circles(link)
-    cs_to_seifert_circle = {}
+    circle_of = {cep: n for n, circle in enumerate(circles) for cep in circle}
+    cs_to_seifert_circle = {cs: circle_of[seifert_crossing_entry(cs)]
+                            for cs in link.crossing_strands()}
     pairs = []
     seifert_circle_pairs = []
-    for cs in link.crossing_strands():
-        cep = seifert_crossing_entry(cs)
-        for c in circles:
-            if cep in c:
-                break
-        cs_to_seifert_circle[cs] = circles.index(c)
     for face in link.faces():
         for cs1, cs2 in combinations(face, 2):
             circle1, circle2 = cs_to_seifert_circle[cs1], cs_to_seifert_circle[cs2]
@@ -71,7 +71,9 @@ def admissible_moves(link):
 def seifert_tree(link):
     """
     The oriented tree corresponding to the complementary regions of
-    the Seifert circles.
+    the Seifert circles.  Each circle gives an edge, recorded as the
+    pair (tail, head) of the regions on either side of it, where each
+    region is the set of circles bounding it.
 
     >>> K5a2 = [(7,3,8,2),(9,5,0,4),(1,7,2,6),(3,9,4,8),(5,1,6,0)]
     >>> T = seifert_tree(Link(K5a2))
@@ -79,30 +81,312 @@ def seifert_tree(link):
     True
     """
     circles = seifert_circles(link)
-    edges = [[set([n]), set([n])] for n in range(len(circles))]
+    circle_of = {cep: n for n, circle in enumerate(circles) for cep in circle}
+    # The sides 2*n and 2*n + 1 of circle n are its tail and head.
+    parent = list(range(2 * len(circles)))
+
+    def find(a):
+        while parent[a] != a:
+            parent[a] = parent[parent[a]]
+            a = parent[a]
+        return a
+
     for c in link.crossings:
         under, over = c.entry_points()
-        under_circle, over_circle = -1, -1
-        sign = c.sign
-        for n, circle in enumerate(circles):
-            if under in circle:
-                under_circle = n
-            if over in circle:
-                over_circle = n
-            if under_circle > 0 and over_circle > 0:
-                break
-        if sign == -1:
-            connect_head_to_tail(edges[under_circle], edges[over_circle])
+        under_circle, over_circle = circle_of[under], circle_of[over]
+        if c.sign == -1:
+            a, b = 2 * under_circle + 1, 2 * over_circle
         else:
-            connect_head_to_tail(edges[over_circle], edges[under_circle])
-    # connect all vertices which intersect
-    for e1, e2 in combinations(edges, 2):
-        for i in range(2):
-            for j in range(2):
-                if len(e1[i].intersection(e2[j])) > 1:
-                    connect_vertices(e1, i, e2, j)
+            a, b = 2 * over_circle + 1, 2 * under_circle
+        a, b = find(a), find(b)
+        parent[max(a, b)] = min(a, b)
 
-    return [(frozenset(e[0]), frozenset(e[1])) for e in edges]
+    regions = {}
+    for side in range(len(parent)):
+        regions.setdefault(find(side), set()).add(side // 2)
+    regions = {r: frozenset(region) for r, region in regions.items()}
+    return [(regions[find(2 * n)], regions[find(2 * n + 1)])
+            for n in range(len(circles))]
+
+
+class SeifertStructure():
+    """
+    The Seifert circles of a link diagram and the regions between them,
+    kept up to date as Vogel's Reidemeister II moves are made, so that
+    nothing needs to be recomputed from scratch after each move.
+
+    Each move crosses two circles bounding a common region, which merges
+    them into one and creates a new circle in the bigon between the two
+    new crossings.  So the circles are the classes of a union-find
+    structure on circle ids, with a dict taking each strand of each
+    crossing to the circle of its edge.  The regions, i.e. the vertices
+    of the Seifert tree, are likewise the classes of a union-find
+    structure on the two sides of the circles, and the faces of the
+    diagram are retraced only around the new crossings.
+
+    The moves chosen are exactly those made when the circles, moves and
+    tree were recomputed from a rebuilt link after every move.  Such a
+    rebuild reverses all the components of the link; here that is
+    recorded as a parity, which decides the order in which circles and
+    faces are considered, and the link is only rebuilt at the end by
+    finish.
+
+    >>> L = Link('K8n1')
+    >>> S = SeifertStructure(L)
+    >>> len(S.circles())
+    5
+    >>> while S.remove_admissible_move():
+    ...     pass
+    >>> S.moves, len(S.circles()), len(L.crossings)
+    (4, 5, 16)
+    >>> S.finish()
+    >>> is_chain(seifert_tree(L))
+    True
+    """
+    def __init__(self, link):
+        self.link = link
+        self.index = {C: i for i, C in enumerate(link.crossings)}
+        self.moves, self.parity = 0, 0
+        # Per circle id: union-find parent, the largest keys of its
+        # edges in each parity, and the faces it meets with multiplicity.
+        self.parent, self.keys, self.circle_faces = [], [], []
+        self.sides, self.live = [], set()
+        self.slot_circle = dict()
+        for circle in seifert_circles(link):
+            n = self._new_circle()
+            for cep in circle:
+                self._add_edge(cep, n)
+        for C in link.crossings:
+            self._join_regions(C)
+        self.faces, self.face_keys, self.corner_face = dict(), dict(), dict()
+        # The circles each face meets, with multiplicity.
+        self.face_circles = dict()
+        self._next_face = 0
+        for face in link.faces():
+            self._add_face([tuple(cs) for cs in face])
+
+    def _new_circle(self):
+        n = len(self.parent)
+        self.parent.append(n)
+        self.keys.append([-1, -1])
+        self.circle_faces.append(dict())
+        self.sides += [2 * n, 2 * n + 1]
+        self.live.add(n)
+        return n
+
+    def _find(self, n):
+        parent = self.parent
+        while parent[n] != n:
+            parent[n] = parent[parent[n]]
+            n = parent[n]
+        return n
+
+    def _find_side(self, a):
+        sides = self.sides
+        while sides[a] != a:
+            sides[a] = sides[sides[a]]
+            a = sides[a]
+        return a
+
+    def _union_sides(self, a, b):
+        a, b = self._find_side(a), self._find_side(b)
+        self.sides[max(a, b)] = min(a, b)
+
+    def circles(self):
+        """
+        The ids of the current Seifert circles.
+        """
+        return sorted(self.live)
+
+    def _add_edge(self, strand, n):
+        """
+        Put the edge at the given (crossing, strand index) on circle n.
+        Its keys are the positions its CrossingEntryPoint would have in
+        Link.crossing_entries in the original and reversed orientations.
+        """
+        C, i = strand
+        D, j = C.adjacent[i]
+        if (i, (i + 2) % 4) not in C.directions:
+            C, i, D, j = D, j, C, i
+        self.slot_circle[(C, i)] = self.slot_circle[(D, j)] = n
+        keys = self.keys[n]
+        keys[0] = max(keys[0], 2 * self.index[C] + (i != 0))
+        keys[1] = max(keys[1], 2 * self.index[D] + (j != 2))
+
+    def _circle_of(self, strand):
+        return self._find(self.slot_circle[strand])
+
+    def _join_regions(self, C):
+        """
+        Each crossing joins the head of one of its circles to the tail of
+        the other, as in seifert_tree.
+        """
+        under = self._circle_of((C, 0))
+        over = self._circle_of((C, 3 if C.sign == 1 else 1))
+        if C.sign == -1:
+            self._union_sides(2 * under + 1, 2 * over)
+        else:
+            self._union_sides(2 * over + 1, 2 * under)
+
+    def _add_face(self, corners):
+        f = self._next_face
+        self._next_face += 1
+        self.faces[f] = corners
+        keys = []
+        for shift in (0, 2):
+            key = [4 * self.index[C] + (i + shift) % 4 for C, i in corners]
+            start = max(range(len(key)), key=key.__getitem__)
+            keys.append((key[start], start))
+        self.face_keys[f] = keys
+        self.face_circles[f] = circles = dict()
+        for corner in corners:
+            self.corner_face[corner] = f
+            n = self._circle_of(corner)
+            faces = self.circle_faces[n]
+            faces[f] = faces.get(f, 0) + 1
+            circles[n] = circles.get(n, 0) + 1
+
+    def _remove_face(self, f):
+        for n in self.face_circles.pop(f):
+            del self.circle_faces[n][f]
+        del self.faces[f], self.face_keys[f]
+
+    def _trace_face(self, corner):
+        corners = [corner]
+        while True:
+            C, i = corners[-1]
+            corner = C.adjacent[(i + 1) % 4]
+            if corner == corners[0]:
+                return corners
+            corners.append(corner)
+
+    def _face_start(self, f):
+        "The corners of the face, starting where Link.faces would."
+        corners = self.faces[f]
+        start = self.face_keys[f][self.parity][1]
+        return corners[start:] + corners[:start]
+
+    def find_move(self):
+        """
+        The pair of CrossingStrands which remove_admissible_move would
+        cross next, or None if the Seifert tree is a chain.
+        """
+        parity = self.parity
+        order = sorted(self.live, key=lambda n: self.keys[n][parity],
+                       reverse=True)
+        position = {n: k for k, n in enumerate(order)}
+        for n in order:
+            tail, head = self._find_side(2 * n), self._find_side(2 * n + 1)
+            best = None
+            for f in self.circle_faces[n]:
+                for m in self.face_circles[f]:
+                    if position[m] <= position[n]:
+                        continue
+                    if best is not None and position[m] >= position[best]:
+                        continue
+                    if (self._find_side(2 * m) == tail or
+                            self._find_side(2 * m + 1) == head):
+                        best = m
+            if best is not None:
+                return self._move_between(n, best)
+
+    def _move_between(self, n, m):
+        """
+        The first pair of corners of the first face, in the order of
+        admissible_moves, lying on the circles n and m.
+        """
+        other = self.circle_faces[m]
+        f = max((f for f in self.circle_faces[n] if f in other),
+                key=lambda f: self.face_keys[f][self.parity][0])
+        corners = self._face_start(f)
+        circles = [self._circle_of(corner) for corner in corners]
+        first = dict()
+        for a, circle in enumerate(circles):
+            if circle in (n, m) and circle not in first:
+                first[circle] = a
+        a = min(first.values())
+        want = m if circles[a] == n else n
+        b = next(b for b in range(a + 1, len(corners)) if circles[b] == want)
+        return CrossingStrand(*corners[a]), CrossingStrand(*corners[b])
+
+    def make_move(self, cs1, cs2):
+        """
+        Cross the strands at the given corners, which must lie on
+        different circles bounding the same region.
+        """
+        (c, i), (d, j) = cs1, cs2
+        old_faces = set(self.corner_face[x] for x in
+                        [(c, i), (c, (i - 1) % 4), (d, (j - 1) % 4)])
+        for f in old_faces:
+            self._remove_face(f)
+        c_out = ((i + 2) % 4, i) in c.directions
+        d_out = ((j + 2) % 4, j) in d.directions
+        label1, label2 = 'n' + str(c.label), 'n' + str(d.label)
+        reverse_type_II(self.link, cs1, cs2, label1, label2)
+        new = new1, new2 = self.link.crossings[-2:]
+        for X in new:
+            self.index[X] = len(self.index)
+
+        # Orient the new crossings compatibly with the rest of the link.
+        new1.make_tail(1 if c_out else 3)
+        new2.make_tail(3 if c_out else 1)
+        new1.make_tail(2 if d_out else 0)
+        new2.make_tail(2 if d_out else 0)
+        new1.orient()
+        new2.orient()
+
+        # The two circles merge, and the bigon becomes a new circle.
+        a, b = self._find(self.slot_circle[(c, i)]), self._find(self.slot_circle[(d, j)])
+        if len(self.circle_faces[a]) < len(self.circle_faces[b]):
+            a, b = b, a
+        self.parent[b] = a
+        self.live.remove(b)
+        self.keys[a] = [max(x, y) for x, y in zip(self.keys[a], self.keys[b])]
+        faces = self.circle_faces[a]
+        for f, count in self.circle_faces[b].items():
+            faces[f] = faces.get(f, 0) + count
+            circles = self.face_circles[f]
+            circles[a] = circles.get(a, 0) + circles.pop(b)
+        self.circle_faces[b] = None
+        self._union_sides(2 * a, 2 * b)
+        self._union_sides(2 * a + 1, 2 * b + 1)
+        bigon = self._new_circle()
+        for X in new:
+            for k in range(4):
+                D, _ = X.adjacent[k]
+                self._add_edge((X, k), bigon if D in new else a)
+        for X in new:
+            self._join_regions(X)
+
+        done = set()
+        for X in new:
+            for k in range(4):
+                if (X, k) not in done:
+                    corners = self._trace_face((X, k))
+                    done.update(corners)
+                    self._add_face(corners)
+        self.moves += 1
+        self.parity = self.moves % 2
+
+    def remove_admissible_move(self):
+        """
+        Make the next move of Vogel's algorithm, returning whether
+        there was one.
+        """
+        move = self.find_move()
+        if move is None:
+            return False
+        self.make_move(*move)
+        return True
+
+    def finish(self):
+        """
+        Rebuild the link, giving it the orientation and components it
+        would have had if it were rebuilt after every move.
+        """
+        if self.moves:
+            for i in range(2 - self.moves % 2):
+                self.link._rebuild(same_components_and_orientations=True)
 
 
 def remove_admissible_move(link):
@@ -110,32 +394,9 @@ def remove_admissible_move(link):
     Performs a Reidemester II move to remove one branching point of the Seifert
     tree.  The goal is to turn the Seifert tree into a chain.
     """
-    circles = seifert_circles(link)
-    moves, circle_pairs = admissible_moves(link)
-    tree = seifert_tree(link)
-    found_move = False
-    for e1, e2 in combinations(tree, 2):
-        if e1[0] == e2[0]:  # edges start at same point
-            circles = set([tree.index(e1), tree.index(e2)])
-            found_move = True
-        elif e1[1] == e2[1]:  # edges end at same point
-            circles = set([tree.index(e1), tree.index(e2)])
-            found_move = True
-        if found_move:
-            move_possible = False
-            for n, pair in enumerate(circle_pairs):
-                if set(pair) == circles:
-                    cs1, cs2 = moves[n]
-                    move_possible = True
-                    break
-            if move_possible:
-                label1 = 'n' + str(cs1.crossing.label)
-                label2 = 'n' + str(cs2.crossing.label)
-                reverse_type_II(link, cs1, cs2, label1, label2)
-                link._rebuild(same_components_and_orientations=True)
-                break
-            else:
-                found_move = False
+    S = SeifertStructure(link)
+    found_move = S.remove_admissible_move()
+    S.finish()
     return found_move
 
 
@@ -145,8 +406,10 @@ def isotope_to_braid(link):
     the Seifert circles are all nested and compatibly oriented, following
     P. Vogel, "Representation of links by braids, a new algorithm"
     """
-    while remove_admissible_move(link):
+    S = SeifertStructure(link)
+    while S.remove_admissible_move():
         pass
+    S.finish()
 
 
 def is_chain(tree):
@@ -166,33 +429,50 @@ def connect_vertices(e1, v1, e2, v2):
 
 
 def straighten_arrows(arrows):
+    """
+    Moves the ends of the arrows along the circles until each arrow has
+    the same position at both ends.  The tails of the arrows on strand s
+    and the heads of those on strand s - 1 are all positions on the same
+    circle, and each step pushes along all the positions on one circle
+    from some point on, so each circle is kept as a sorted array.
+    """
+    circles = dict()
+    for k, arrow in enumerate(arrows):
+        circles.setdefault(arrow[2], []).append((arrow[0], k, 0))
+        circles.setdefault(arrow[2] + 1, []).append((arrow[1], k, 1))
+    positions, where = dict(), [[None, None] for arrow in arrows]
+    for circle, ends in circles.items():
+        ends.sort()
+        positions[circle] = np.array([p for p, k, e in ends], dtype=np.int64)
+        for r, (p, k, e) in enumerate(ends):
+            where[k][e] = r
+
     totally_straightened = False
     while not totally_straightened:
         totally_straightened = True
-        for arrow in arrows:
-            tail, head = arrow[0], arrow[1]
+        for k, arrow in enumerate(arrows):
+            tails, heads = positions[arrow[2]], positions[arrow[2] + 1]
+            tail, head = tails[where[k][0]], heads[where[k][1]]
             if tail < head:  # need to move tail down
-                diff = head - tail
-                same_start_strand = [
-                    x for x in arrows if x[2] == arrow[2] and x[0] >= tail]
-                for other_arrow in same_start_strand:
-                    other_arrow[0] += diff
-                one_strand_behind = [
-                    x for x in arrows if x[2] == arrow[2] - 1 and x[1] >= tail]
-                for other_arrow in one_strand_behind:
-                    other_arrow[1] += diff
+                tails[np.searchsorted(tails, tail):] += head - tail
                 totally_straightened = False
             elif head < tail:  # need to move head down
-                diff = tail - head
-                same_end_strand = [x for x in arrows
-                                   if x[2] == arrow[2] and x[1] >= head]
-                for other_arrow in same_end_strand:
-                    other_arrow[1] += diff
-                one_strand_ahead = [x for x in arrows
-                                    if x[2] == arrow[2] + 1 and x[0] >= head]
-                for other_arrow in one_strand_ahead:
-                    other_arrow[0] += diff
+                heads[np.searchsorted(heads, head):] += tail - head
                 totally_straightened = False
+    for k, arrow in enumerate(arrows):
+        arrow[0] = int(positions[arrow[2]][where[k][0]])
+        arrow[1] = int(positions[arrow[2] + 1][where[k][1]])
+
+
+def _crossing_positions(strand):
+    """
+    Maps each crossing on the given Seifert circle to the first position
+    at which it occurs.
+    """
+    first = dict()
+    for m, cep in enumerate(strand):
+        first.setdefault(cep.crossing, m)
+    return first
 
 
 def braid_arrows(link):
@@ -219,23 +499,18 @@ def braid_arrows(link):
     positions_in_next_strand = []
 
     for i in range(len(ordered_strands) - 1):
-        for n, cep in enumerate(ordered_strands[i]):
-            found_next = False
-            for m, next_cep in enumerate(ordered_strands[i + 1]):
-                if cep.crossing == next_cep.crossing:
-                    ordered_strands[i + 1] = cyclic_permute(ordered_strands[i + 1], m)
-                    found_next = True
-                    break
-            if found_next:
+        first = _crossing_positions(ordered_strands[i + 1])
+        for cep in ordered_strands[i]:
+            if cep.crossing in first:
+                ordered_strands[i + 1] = cyclic_permute(ordered_strands[i + 1],
+                                                        first[cep.crossing])
                 break
 
     for i in range(len(ordered_strands) - 1):
-        positions = {}
-        for n, cep in enumerate(ordered_strands[i]):
-            for m, next_cep in enumerate(ordered_strands[i + 1]):
-                if cep.crossing == next_cep.crossing:
-                    positions[n] = ((m, cep.strand_index % 2))
-                    break
+        first = _crossing_positions(ordered_strands[i + 1])
+        positions = {n: (first[cep.crossing], cep.strand_index % 2)
+                     for n, cep in enumerate(ordered_strands[i])
+                     if cep.crossing in first}
         positions_in_next_strand.append(positions)
 
     ordered_strands = ordered_strands[::-1]
@@ -273,7 +548,7 @@ def braid_word(link):
             for position, strand, over_or_under in arrows]
 
 
-def seifert_matrix(link, return_matrix_of_types=False):
+def seifert_matrix(link, return_matrix_of_types=False, output='list'):
     """
     Returns the Seifert matrix of a link by first making it isotopic to a braid
     closure.
@@ -295,58 +570,83 @@ def seifert_matrix(link, return_matrix_of_types=False):
      [0, 0, 0, 0, 0, -1, 1, 0, 0, 1, 0, 0],
      [0, 0, 0, 0, 0, 0, 0, 0, -1, 0, 1, 0]]
 
+    The matrix is assembled sparsely, and with output='sparse' it is
+    returned as a SparseIntegerMatrix from spherogram.links.goeritz,
+    while output='numpy' and output='scipy' give a NumPy array and a
+    SciPy CSR matrix respectively; the last requires SciPy.
+
+    >>> A = seifert_matrix(L, output='sparse')
+    >>> A, A.dense() == seifert_matrix(L)
+    (<SparseIntegerMatrix: 12 x 12 with 22 nonzero entries>, True)
+    >>> seifert_matrix(L, output='numpy').shape
+    (12, 12)
+
     Uses the algorithm described in:
 
     J. Collins, "An algorithm for computing the Seifert matrix of a link
     from a braid representation." (2007).
     """
+    if output not in ('list', 'sparse', 'numpy', 'scipy'):
+        raise ValueError("The output must be 'list', 'sparse', 'numpy' or 'scipy'")
     arrows = braid_arrows(link)
     strands = set(x[1] for x in arrows)
-    grouped_by_strand = [[x for x in arrows if x[1] == strand]
-                         for strand in strands]
+    grouped_by_strand = {strand: [] for strand in strands}
+    for arrow in arrows:
+        grouped_by_strand[arrow[1]].append(arrow)
+    grouped_by_strand = list(grouped_by_strand.values())
     hom_gens = [[(group[i][0], group[i + 1][0], group[i][2], group[i + 1][2])
                  for i in range(len(group) - 1)] for group in grouped_by_strand]
-    num_gens = sum(map(len, hom_gens))
-    matrix = [[0] * num_gens for i in range(num_gens)]
-    entries = [(i, j) for i, hgi in enumerate(hom_gens)
-               for j in range(len(hgi))]
-    type_matrix = [[0] * num_gens for i in range(num_gens)]
+    # The row of the mth generator on the nth strand is offsets[n] + m.
+    offsets = [0]
+    for strand in hom_gens:
+        offsets.append(offsets[-1] + len(strand))
+    num_gens = offsets[-1]
+    matrix, type_matrix = dict(), dict()
+
+    def set_entry(i, j, value, entry_type):
+        matrix[i, j] = value
+        type_matrix[i, j] = entry_type
+
     for n, strand in enumerate(hom_gens):
+        row = offsets[n]
         # diagonal entries
         for m, gen in enumerate(strand):
             if gen[2] == gen[3]:  # same sign, otherwise entry is zero
                 if gen[2] == 0:  # both right handed
-                    matrix[entries.index((n, m))][entries.index((n, m))] = -1
-                    type_matrix[entries.index(
-                        (n, m))][entries.index((n, m))] = 1
+                    set_entry(row + m, row + m, -1, 1)
                 else:  # both left handed
-                    matrix[entries.index((n, m))][entries.index((n, m))] = 1
-                    type_matrix[entries.index(
-                        (n, m))][entries.index((n, m))] = 2
+                    set_entry(row + m, row + m, 1, 2)
 
         # two gens on same strand, one after the other
         for m, gen in enumerate(strand[:-1]):
             if gen[3] == 0:  # shared crossing is right handed
-                matrix[entries.index((n, m + 1))][entries.index((n, m))] = 1
-                type_matrix[entries.index((n, m + 1))][entries.index((n, m))] = 3
+                set_entry(row + m + 1, row + m, 1, 3)
             else:  # shared crossing if left handed
-                matrix[entries.index((n, m))][entries.index((n, m + 1))] = -1
-                type_matrix[entries.index((n, m))][entries.index((n, m + 1))] = 4
+                set_entry(row + m, row + m + 1, -1, 4)
 
-        # two gens on adjacent strand, "staggered"
+        # two gens on adjacent strand, "staggered".  The gens on a strand
+        # are consecutive intervals, so each end of a gen lies strictly
+        # inside at most one gen on the next strand.
         if n != len(hom_gens) - 1:
             next_strand = hom_gens[n + 1]
+            next_row = offsets[n + 1]
+            starts = [next_gen[0] for next_gen in next_strand]
             for m, gen in enumerate(strand):
-                for l, next_gen in enumerate(next_strand):
-                    if next_gen[0] < gen[0] < next_gen[1] < gen[1]:
-                        matrix[entries.index((n + 1, l))][entries.index((n, m))] = 1
-                        type_matrix[entries.index(
-                            (n + 1, l))][entries.index((n, m))] = 5
-                    elif gen[0] < next_gen[0] < gen[1] < next_gen[1]:
-                        matrix[entries.index((n + 1, l))][entries.index((n, m))] = -1
-                        type_matrix[entries.index(
-                            (n + 1, l))][entries.index((n, m))] = 6
-
+                l = bisect_left(starts, gen[0]) - 1
+                if l >= 0 and gen[0] < next_strand[l][1] < gen[1]:
+                    set_entry(next_row + l, row + m, 1, 5)
+                l = bisect_left(starts, gen[1]) - 1
+                if l >= 0 and gen[0] < next_strand[l][0] and gen[1] < next_strand[l][1]:
+                    set_entry(next_row + l, row + m, -1, 6)
+
+    matrix = SparseIntegerMatrix(num_gens, num_gens, matrix)
+    type_matrix = SparseIntegerMatrix(num_gens, num_gens, type_matrix)
+    if output == 'list':
+        matrix, type_matrix = matrix.dense(), type_matrix.dense()
+    elif output == 'numpy':
+        matrix, type_matrix = matrix.numpy(), type_matrix.numpy()
+    elif output == 'scipy':
+        matrix, type_matrix = matrix.scipy(), type_matrix.scipy()
     if return_matrix_of_types:
         return matrix, type_matrix
     else:
@@ -25,55 +25,68 @@ def remove_crossings(link, eliminate):
     """
 
     if len(eliminate):
+        eliminate = set(eliminate)
+        link.crossings[:] = [C for C in link.crossings if C not in eliminate]
+        link._crossing_indices = None
+        positions = link._component_position()
+        affected = set()
         for C in eliminate:
-            link.crossings.remove(C)
+            for cep in C.entry_points():
+                if cep in positions:
+                    affected.add(positions.pop(cep)[0])
         new_components = []
-        for component in link.link_components:
-            for C in eliminate:
-                for cep in C.entry_points():
-                    try:
-                        component.remove(cep)
-                    except ValueError:
-                        pass
+        for k, component in enumerate(link.link_components):
+            if k in affected:
+                component[:] = [cep for cep in component
+                                if cep.crossing not in eliminate]
             if len(component):
                 new_components.append(component)
         components_removed = len(link.link_components) - len(new_components)
         link.unlinked_unknot_components += components_removed
         link.link_components = new_components
+        if components_removed:
+            link._component_positions = None
+        else:
+            for k in affected:
+                for i, cep in enumerate(new_components[k]):
+                    positions[cep] = (k, i)
 
 
-def reidemeister_I(link, C):
+def reidemeister_I(link, C, faces=None):
     """
     Does a type-1 simplification on the given crossing C if possible.
+    If a FaceIndex is given, it is updated to match.
 
     Returns the pair: {crossings eliminated}, {crossings changed}
     """
-    elim, changed = set(), set()
+    elim, changed = set(), OrderedSet()
     for i in range(4):
         if C.adjacent[i] == (C, (i + 1) % 4):
             (A, a), (B, b) = C.adjacent[i+2], C.adjacent[i+3]
             elim = set([C])
             if C != A:
                 A[a] = B[b]
-                changed = set([A, B])
+                changed = OrderedSet([A, B])
 
     remove_crossings(link, elim)
+    if faces is not None and elim:
+        faces.update(changed, elim)
     return elim, changed
 
 
-def reidemeister_I_and_II(link, A):
+def reidemeister_I_and_II(link, A, faces=None):
     """
     Does a type-1 or type-2 simplification at the given crossing A if
-    possible.
+    possible.  If a FaceIndex is given, it is updated to match.
 
     Returns the pair: {crossings eliminated}, {crossings changed}
     """
-    eliminated, changed = reidemeister_I(link, A)
+    eliminated, changed = reidemeister_I(link, A, faces)
     if not eliminated:
         for a in range(4):
             (B, b), (C, c) = A.adjacent[a], A.adjacent[a+1]
             if B == C and (b-1) % 4 == c and (a+b) % 2 == 0:
-                eliminated, changed = reidemeister_I(link, B)
+                eliminated, changed = reidemeister_I(link, B, faces)
                 if eliminated:
                     break
                 else:
@@ -84,27 +97,35 @@ def reidemeister_I_and_II(link, A):
                     eliminated = set([A, B])
                     if W != B:
                         W[w] = Z[z]
-                        changed.update(set([W, Z]))
+                        changed.update([W, Z])
                     if X != B:
                         X[x] = Y[y]
-                        changed.update(set([X, Y]))
+                        changed.update([X, Y])
                     remove_crossings(link, eliminated)
+                    if faces is not None:
+                        faces.update(changed, eliminated)
                     break
 
     return eliminated, changed
 
 
 def basic_simplify(link, build_components=True, to_visit=None,
-                   force_build_components=False):
+                   force_build_components=False, faces=None):
     """
     Do Reidemeister I and II moves until none are possible.
+
+    Whether such a move is possible at a crossing depends only on
+    its own gluings, so after a local change to a diagram where no
+    such moves were possible, it suffices to pass the crossings
+    that were changed as to_visit.
     """
     if to_visit is None:
-        to_visit = set(link.crossings)
+        to_visit = link.crossings
+    to_visit = OrderedSet(to_visit)
     eliminated = set()
     while to_visit:
         crossing = to_visit.pop()
-        elim, changed = reidemeister_I_and_II(link, crossing)
+        elim, changed = reidemeister_I_and_II(link, crossing, faces)
         assert not elim.intersection(changed)
         eliminated.update(elim)
         to_visit.difference_update(elim)
@@ -130,9 +151,24 @@ def basic_simplify(link, build_components=True, to_visit=None,
     return success
 
 
-def possible_type_III_moves(link):
+def type_III_move_of_face(face):
+    """
+    If a type III move is possible across the given face, returns the
+    corresponding triple of CrossingStrands, suitably rotated for
+    reidemeister_III; otherwise returns None.
+    """
+    if len(face) == 3:
+        if sum(ce.strand_index % 2 for ce in face) in [1, 2]:
+            while(face[1][1] % 2 != 0 or face[2][1] % 2 != 1):    # renumber face_list
+                face = [face[1], face[2], face[0]]
+            if len(set(e.crossing for e in face)) == 3:  # No repeated crossings
+                return face
+
+
+def possible_type_III_moves(link, faces=None):
     """
     Returns all triples of crossings where a type III move is possible.
+    If a FaceIndex for the link is given, the faces are not recomputed.
 
     In this example, one type III move is forbidden since a crossing
     repeats twice.
@@ -140,15 +176,16 @@ def possible_type_III_moves(link):
     >>> L = Link([(2,1,3,2),(3,8,4,1),(4,6,5,5),(6,8,7,7)])
     >>> len(possible_type_III_moves(L))
     1
+    >>> len(possible_type_III_moves(L, FaceIndex(L)))
+    1
     """
+    if faces is not None:
+        return faces.type_III_moves()
     ans = []
     for face in link.faces():
-        if len(face) == 3:
-            if sum(ce.strand_index % 2 for ce in face) in [1, 2]:
-                while(face[1][1] % 2 != 0 or face[2][1] % 2 != 1):    # renumber face_list
-                    face = [face[1], face[2], face[0]]
-                if len(set(e.crossing for e in face)) == 3:  # No repeated crossings
-                    ans.append(face)
+        move = type_III_move_of_face(face)
+        if move is not None:
+            ans.append(move)
     return ans
 
 
@@ -159,38 +196,54 @@ def insert_strand(X, x):
     return S
 
 
-def reidemeister_III(link, triple):
+def reidemeister_III(link, triple, faces=None):
     """
     Performs the given type III move.  Modifies the given link but doesn't
-    update its lists of link components.
+    update its lists of link components.  If a FaceIndex is given, it
+    is updated to match.
+
+    Returns the set of crossings whose gluings were changed.
     """
     A, B, C = [t.crossing for t in triple]
     a, b, c = [t.strand_index for t in triple]
     # We insert Strands around the border of the triple to make the code more
     # transparent and eliminate some special cases.
     old_border = [(C, c-1), (C, c-2), (A, a-1), (A, a-2), (B, b-1), (B, b-2)]
+    changed = OrderedSet(X.adjacent[x][0] for X, x in old_border)
+    changed.update([A, B, C])
     border_strands = [insert_strand(*P) for P in old_border]
     new_boarder = [(A,a), (B, b+1), (B, b), (C, c+1), (C, c), (A, a+1)]
     for i, (X,x) in enumerate(new_boarder):
         X[x] = border_strands[i][0]
     A[a-1], B[b-1], C[c-1] = B[b+2], C[c+2], A[a+2]
     [S.fuse() for S in border_strands]
+    if faces is not None:
+        faces.update(changed)
+    return changed
 
 
-def simplify_via_level_type_III(link, max_consecutive_failures=100):
+def simplify_via_level_type_III(link, max_consecutive_failures=100,
+                                faces=None):
     """
     Applies a series of type III moves to the link, simplifying it via type
     I and II moves whenever possible.
+
+    The faces are tracked by a FaceIndex which is updated locally after
+    each move, so the cost is proportional to the number of moves
+    rather than moves times the size of the diagram.  An existing
+    FaceIndex for the link can be passed in, and is kept up to date.
     """
+    if faces is None:
+        faces = FaceIndex(link)
     failures, success = 0, False
-    if basic_simplify(link):
+    if basic_simplify(link, faces=faces):
         success = True
     while failures < max_consecutive_failures:
-        poss_moves = possible_type_III_moves(link)
-        if len(poss_moves) == 0:
+        move = faces.random_type_III_move()
+        if move is None:
             break
-        reidemeister_III(link, random.choice(poss_moves))
-        if basic_simplify(link):
+        changed = reidemeister_III(link, move, faces)
+        if basic_simplify(link, to_visit=changed, faces=faces):
             failures = 0
             success = True
         else:
@@ -217,15 +270,145 @@ class Face(tuple):
         return "<F%d>" % self.label
 
 
+class FaceIndex():
+    """
+    The faces of a link diagram, kept up to date as the diagram is
+    changed by local moves.  Here face_of maps each corner, as a
+    CrossingStrand, to the label of the face containing it and faces
+    maps each label to the corresponding Face.  Faces that are not
+    touched by a move keep their labels.
+
+    After the gluings of some crossings have been modified, call
+    update with the crossings that were changed and those that were
+    eliminated; the moves in this module do this themselves when given
+    the FaceIndex.  Only faces meeting those crossings are recomputed.
+
+    >>> L = Link('L7n1')
+    >>> F = FaceIndex(L)
+    >>> len(F.faces) == len(L.faces()) == len(L.crossings) + 2
+    True
+    >>> moves = possible_type_III_moves(L, F)
+    >>> changed = reidemeister_III(L, moves[0], F)
+    >>> F.is_consistent()
+    True
+    >>> basic_simplify(L, to_visit=changed, faces=F)
+    False
+    >>> len(F.faces) == len(L.crossings) + 2 and F.is_consistent()
+    True
+    """
+    def __init__(self, link):
+        self.link = link
+        self.face_of = dict()
+        self.faces = dict()
+        self._next_label = 0
+        self._type_III = dict()
+        self._type_III_labels = []
+        self._type_III_position = dict()
+        for C in link.crossings:
+            for i in range(4):
+                corner = CrossingStrand(C, i)
+                if corner not in self.face_of:
+                    self._add_face(corner)
+
+    def __len__(self):
+        return len(self.faces)
+
+    def _add_face(self, corner):
+        label = self._next_label
+        self._next_label += 1
+        face_of = self.face_of
+        face = [corner]
+        face_of[corner] = label
+        while True:
+            corner = corner.next_corner()
+            if corner == face[0]:
+                break
+            face_of[corner] = label
+            face.append(corner)
+        self.faces[label] = Face(face, label)
+        move = type_III_move_of_face(face)
+        if move is not None:
+            self._type_III[label] = move
+            self._type_III_position[label] = len(self._type_III_labels)
+            self._type_III_labels.append(label)
+
+    def _remove_face(self, label):
+        for corner in self.faces.pop(label):
+            del self.face_of[corner]
+        if label in self._type_III:
+            del self._type_III[label]
+            # Swap with the last entry so removal is O(1).
+            labels, position = self._type_III_labels, self._type_III_position
+            i = position.pop(label)
+            last = labels.pop()
+            if last != label:
+                labels[i] = last
+                position[last] = i
+
+    def update(self, changed, eliminated=()):
+        """
+        Recompute the faces meeting the given crossings.  The crossings
+        in eliminated must already have been removed from the link.
+        """
+        eliminated = set(eliminated)
+        dead, corners, new_corners = set(), [], []
+        for C in list(changed) + list(eliminated):
+            for i in range(4):
+                corner = CrossingStrand(C, i)
+                label = self.face_of.get(corner)
+                if label is not None:
+                    dead.add(label)
+                elif C not in eliminated:
+                    new_corners.append(corner)
+        # Go through the faces in order so that the new labels don't
+        # depend on the order of the crossings, which sets of them
+        # iterate over in an order depending on memory addresses.
+        for label in sorted(dead):
+            corners.extend(self.faces[label])
+            self._remove_face(label)
+        for corner in corners + new_corners:
+            if corner.crossing not in eliminated and corner not in self.face_of:
+                self._add_face(corner)
+
+    def type_III_moves(self):
+        """
+        All triples of crossings where a type III move is possible, as
+        in possible_type_III_moves.
+        """
+        return [self._type_III[label] for label in self._type_III_labels]
+
+    def random_type_III_move(self):
+        """
+        A random choice among type_III_moves, or None if there aren't
+        any.
+        """
+        if self._type_III_labels:
+            return self._type_III[random.choice(self._type_III_labels)]
+
+    def is_consistent(self):
+        """
+        Check the index against the faces computed from scratch.
+        """
+        current = set(frozenset(face) for face in self.link.faces())
+        ours = set(frozenset(face) for face in self.faces.values())
+        return current == ours and all(
+            self.face_of[corner] == label
+            for label, face in self.faces.items() for corner in face)
+
+
 class DualGraphOfFaces(graphs.Graph):
     """
     The dual graph to a link diagram D, whose vertices correspond to
     complementary regions (faces) of D and whose edges are dual to the
-    edges of D.
+    edges of D.  If a FaceIndex for D is given, its faces are used
+    rather than being recomputed.
     """
-    def __init__(self, link):
+    def __init__(self, link, faces=None):
         graphs.Graph.__init__(self)
-        faces = [Face(face, i) for i, face in enumerate(link.faces())]
+        if faces is None:
+            faces = [Face(face, i) for i, face in enumerate(link.faces())]
+        else:
+            faces = faces.faces.values()
         self.edge_to_face = to_face = {}
         for face in faces:
             for edge in face:
@@ -247,37 +430,49 @@ class DualGraphOfFaces(graphs.Graph):
 
         The crossing strands are
         oriented consistently with respect to one of the faces which a
-        vertex for the cycle.
+        vertex for the cycle.  They are found in order of the labels of
+        the faces and edges.
         """
-        for face0 in self.vertices:
-            for dual_edge0 in self.incident(face0):
+        def by_label(items):
+            return sorted(items, key=lambda x: x.label)
+
+        for face0 in by_label(self.vertices):
+            for dual_edge0 in by_label(self.incident(face0)):
                 face1 = dual_edge0(face0)
                 if face0.label < face1.label:
-                    for dual_edge1 in self.incident(face1):
+                    for dual_edge1 in by_label(self.incident(face1)):
                         if dual_edge0.label < dual_edge1.label and dual_edge1(face1) == face0:
                             yield (common_element(face0, dual_edge0.interface),
                                    common_element(face0, dual_edge1.interface))
 
 
-def dual_graph_as_nx(link):
-    corners = OrderedSet([CrossingStrand(c, i)
-                          for c in link.crossings for i in range(4)])
-    faces = []
-    to_face_index = dict()
-    while len(corners):
-        count = len(faces)
-        first_cs = corners.pop()
-        to_face_index[first_cs] = count
-        face = [first_cs]
-        while True:
-            next = face[-1].next_corner()
-            if next == face[0]:
-                faces.append(Face(face, count))
-                break
-            else:
-                to_face_index[next] = count
-                corners.remove(next)
-                face.append(next)
+def dual_graph_as_nx(link, faces=None):
+    """
+    The dual graph as a networkx Graph whose vertices are the face
+    labels.  If a FaceIndex is given, its faces and labels are used.
+    """
+    if faces is not None:
+        to_face_index = dict(faces.face_of)
+        faces = faces.faces
+    else:
+        corners = OrderedSet([CrossingStrand(c, i)
+                              for c in link.crossings for i in range(4)])
+        faces = []
+        to_face_index = dict()
+        while len(corners):
+            count = len(faces)
+            first_cs = corners.pop()
+            to_face_index[first_cs] = count
+            face = [first_cs]
+            while True:
+                next = face[-1].next_corner()
+                if next == face[0]:
+                    faces.append(Face(face, count))
+                    break
+                else:
+                    to_face_index[next] = count
+                    corners.remove(next)
+                    face.append(next)
 
     G = nx.Graph()
     to_face = {edge:faces[f] for edge, f in to_face_index.items()}
@@ -361,12 +556,26 @@ def extend_strand_backward(kind, strand, start_cep):
             break
 
 
-def pickup_strand(link, dual_graph, kind, strand):
+def _update_faces_after_removal(faces, strand, new_crossings=()):
+    """
+    Update the FaceIndex after the crossings along the given strand
+    have been removed and the given new crossings added.
+    """
+    if faces is not None:
+        eliminated = set(cep.crossing for cep in strand)
+        changed = set(new_crossings)
+        for C in eliminated.union(new_crossings):
+            changed.update(D for D, _ in C.adjacent)
+        faces.update(changed - eliminated, eliminated)
+
+
+def pickup_strand(link, dual_graph, kind, strand, faces=None):
     """
     Simplify the given (over/under)crossing strand by erasing it from
     the diagram and then finding a path that minimizes the number of
     edges it has to cross over to connect the same endpoints. Returns
-    number of crossings removed.
+    number of crossings removed.  If a FaceIndex is given, it is
+    updated to match.
     """
     init_link_cross_count = len(link.crossings)
     G = dual_graph
@@ -376,11 +585,13 @@ def pickup_strand(link, dual_graph, kind, strand):
         # Totally overcrossing loop, must be totally unlinked and
         # unknotted
         remove_strand(link, strand)
+        _update_faces_after_removal(faces, strand)
         return len(strand)
     if startcep == strand[-1].next():
         # We have a figure-8 curve with a single crossing in front
         # of the rest of the components.
         remove_strand(link, [startcep] + strand)
+        _update_faces_after_removal(faces, [startcep] + strand)
         return len(strand)
     crossing_set = set(cep.crossing for cep in strand)
     endpoint = strand[-1].next()
@@ -388,11 +599,11 @@ def pickup_strand(link, dual_graph, kind, strand):
     if endpoint.crossing in crossing_set:
         # Strand crosses itself underneath
         extend_strand_forward(kind, strand, endpoint)
-        return pickup_strand(link, G, kind, strand)
+        return pickup_strand(link, G, kind, strand, faces)
     if startcep.crossing in crossing_set:
         # Strand crosses itself over
         extend_strand_backward(kind, strand, startcep)
-        return pickup_strand(link, G, kind, strand)
+        return pickup_strand(link, G, kind, strand, faces)
 
     edges_crossed = dual_edges(strand, G)
     source = edges_crossed[0][0]
@@ -429,7 +640,8 @@ def pickup_strand(link, dual_graph, kind, strand):
     ec[ecep] = loose_end
 
     link.crossings.extend(newcrossings)
-    active = set()
+    link._crossing_indices = None
+    active = OrderedSet()
     for C in removed:
         for i in range(4):
             D = C.adjacent[i][0]
@@ -437,17 +649,20 @@ def pickup_strand(link, dual_graph, kind, strand):
                 active.add(D)
 
     active.update(newcrossings)
-    basic_simplify(link, force_build_components=True, to_visit=active)
+    _update_faces_after_removal(faces, strand, newcrossings)
+    basic_simplify(link, force_build_components=True, to_visit=active,
+                   faces=faces)
 
     final_cross_removed = init_link_cross_count - len(link.crossings)
     assert final_cross_removed >= crossingsremoved
     return final_cross_removed
 
 
-def strand_pickup(link, kind):
+def strand_pickup(link, kind, faces=None):
     """
     Simplifies link by optimizing the path of the longest sequence of overcrossings.
-    Returns a new link and the number of crossings removed.
+    Returns a new link and the number of crossings removed.  If a
+    FaceIndex is given, it is used for the dual graph and kept up to date.
     """
     G = None
     strands = over_or_under_strands(link, kind)
@@ -455,8 +670,8 @@ def strand_pickup(link, kind):
         if len(strand) == 1:
             continue
         if G is None:
-            G = dual_graph_as_nx(link)
-        crossings_removed = pickup_strand(link, G, kind, strand)
+            G = dual_graph_as_nx(link, faces)
+        crossings_removed = pickup_strand(link, G, kind, strand, faces)
         if crossings_removed != 0:
             return crossings_removed
     return 0
@@ -469,6 +684,17 @@ def remove_strand(link, strand):
     loop. Otherwise, there will be two strands left in the link not
     attached to anything.  This function assumes that the start and
     end of the strand are not places where strands crosses itself.
+
+    Here strand_pickup removes a loop which passes under only itself,
+    which must leave no Strand objects glued into the diagram:
+
+    >>> L = Link([(1, 6, 2, 7), (7, 2, 8, 3), (8, 5, 9, 0), (9, 5, 6, 4),
+    ...           (3, 0, 4, 1)])
+    >>> strand_pickup(L, 'under'), L.unlinked_unknot_components
+    (3, 1)
+    >>> all(D in L.crossings and D.adjacent[j] == (C, i)
+    ...     for C in L.crossings for i, (D, j) in enumerate(C.adjacent))
+    True
     """
     # only add bridge strands for the places where the strand doesn't cross itself
     crossings_seen = [s.crossing for s in strand]
@@ -479,25 +705,24 @@ def remove_strand(link, strand):
         else:
             crossing_set.add(c)
 
-    start_cep = strand[0].previous()
-    end_cep = strand[-1].next()
     bridge_strands = {c: Strand('strand' + str(c.label)) for c in crossing_set}
+    strand_index = {cep.crossing: cep.strand_index for cep in strand}
+
+    def bridge_end(cs):
+        # The right side of a strand crossing is bridge end 0 and the
+        # left side is end 1.
+        D, d = cs
+        if D in crossing_set:
+            side = 0 if d == (strand_index[D] + 1) % 4 else 1
+            return bridge_strands[D][side]
+        return D[d]
+
     for cep in strand:
         c = cep.crossing
         if c not in crossing_set:
             continue
-        right_cs = cep.rotate(1).opposite()
-        left_cs = cep.rotate(3).opposite()
-        if right_cs.crossing in crossing_set:
-            signs_equal = (c.sign == right_cs.crossing.sign)
-            bridge_strands[c][0] = bridge_strands[right_cs.crossing][signs_equal]
-        else:
-            bridge_strands[c][0] = right_cs.crossing[right_cs.strand_index]
-        if left_cs.crossing in crossing_set:
-            signs_equal = (c.sign == left_cs.crossing.sign)
-            bridge_strands[c][1] = bridge_strands[left_cs.crossing][1-signs_equal]
-        else:
-            bridge_strands[c][1] = left_cs.crossing[left_cs.strand_index]
+        bridge_strands[c][0] = bridge_end(cep.rotate(1).opposite())
+        bridge_strands[c][1] = bridge_end(cep.rotate(3).opposite())
     remove_crossings(link, set(crossings_seen))
 
     for s in bridge_strands.values():
@@ -603,6 +828,7 @@ def reverse_type_I(link,crossing_strand,label,hand,rebuild=False):
     """
     D = Crossing(label)
     link.crossings.append(D)
+    link._crossing_indices = None
     cs1 = crossing_strand
     cs2 = cs1.opposite()
 
@@ -649,6 +875,7 @@ def reverse_type_II(link, c, d, label1, label2, rebuild=False):
 
     link.crossings.append(new1)
     link.crossings.append(new2)
+    link._crossing_indices = None
 
     if rebuild:
         comp_sts = [comp[0] for comp in link.link_components]
@@ -722,6 +949,7 @@ def clear_orientations(link):
     Resets the orientations on the crossings of a link to default values
     """
     link.link_components = None
+    link._component_positions = None
     for i in link.crossings:
         i.sign = 0
         i.directions.clear()
@@ -741,22 +969,23 @@ def pickup_simplify(link, type_III=0):
     simplifying in between until the process stabilizes.
     """
     L = link
+    faces = FaceIndex(L)
     init_num_crossings = len(L.crossings)
     if type_III:
-        simplify_via_level_type_III(link, type_III)
+        simplify_via_level_type_III(link, type_III, faces)
     else:
-        basic_simplify(L, build_components=False)
+        basic_simplify(L, build_components=False, faces=faces)
     stabilized = init_num_crossings == 0
 
     while not stabilized:
         old_cross = len(L.crossings)
-        strand_pickup(L, 'over')
+        strand_pickup(L, 'over', faces)
         if type_III:
-            simplify_via_level_type_III(link, type_III)
+            simplify_via_level_type_III(link, type_III, faces)
 
-        strand_pickup(L, 'under')
+        strand_pickup(L, 'under', faces)
         if type_III:
-            simplify_via_level_type_III(link, type_III)
+            simplify_via_level_type_III(link, type_III, faces)
 
         new_cross = len(L.crossings)
         stabilized = new_cross == 0 or new_cross == old_cross
@@ -19,7 +19,8 @@ http://homepages.math.uic.edu/~kauffman/VegasAMS.pdf
 
 See doc.pdf for conventions.
 """
-import pickle
+import copy
+from collections import deque
 
 from .links import Crossing, Strand, Link
 from . import planar_isotopy
@@ -41,6 +42,15 @@ def join_strands(x, y):
     b.adjacent[j] = (a, i)
 
 
+def _copy_parts(c):
+    "A shallow copy of c, except that its lists, sets and dicts are copied too."
+    d = copy.copy(c)
+    for attr, value in vars(c).items():
+        if isinstance(value, (list, set, dict)):
+            setattr(d, attr, copy.copy(value))
+    return d
+
+
 def rotate_list(L, s):
     """Rotate the list, putting L[s] into index 0."""
     n = len(L)
@@ -127,58 +137,39 @@ class Tangle():
 
     def __add__(self, other):
         "Put self to left of other and fuse inside strands"
-        A, B = self.copy(), other.copy()
-        (mA, nA), (mB, nB) = A.boundary, B.boundary
-        if mA == 0 or mB == 0 or nA == 0 or nB == 0:
-            raise ValueError("Tangles must have at least one top and bottom strand each.")
-        a, b = A.adjacent, B.adjacent
-        join_strands(a[mA - 1], b[0])
-        join_strands(a[mA + nA - 1], b[mB])
-        entry_points = a[:mA - 1] + b[1:mB] + a[mA:mA + nA - 1] + b[mB + 1:]
-        return Tangle((mA + mB - 2, nA + nB - 2), A.crossings + B.crossings, entry_points)
+        return TangleBuilder(self.copy()).add_right(other.copy()).tangle()
 
     def __mul__(self, other):
         "Join with self *above* other, as with braid multiplication"
-        A, B = self.copy(), other.copy()
-        (mA, nA), (mB, nB) = A.boundary, B.boundary
-        if mA != nB:
-            raise ValueError("Tangles must have a compatible number of strands to multiply them")
-
-        a, b = A.adjacent, B.adjacent
-        for i in range(mA):
-            join_strands(a[i], b[mB + i])
-        return Tangle((mB, nA), A.crossings + B.crossings, b[:mB] + a[mA:])
+        return TangleBuilder(self.copy()).stack_below(other.copy()).tangle()
 
     def __neg__(self):
         "Mirror image of self"
-        T = self.copy()
-        for c in T.crossings:
-            if not isinstance(c, Strand):
-                c.rotate_by_90()
-        return T
+        return TangleBuilder(self.copy(), self.label).mirror().tangle()
 
     def __or__(self, other):
         "Put self to left of other, no fusing of strands"
-        A, B = self.copy(), other.copy()
-        (mA, nA), (mB, nB) = A.boundary, B.boundary
-        a, b = A.adjacent, B.adjacent
-        entry_points = a[:mA] + b[:mB] + a[mA:] + b[mB:]
-        return Tangle((mA + mB, nA + nB), A.crossings + B.crossings, entry_points)
+        return TangleBuilder(self.copy()).place_right(other.copy()).tangle()
 
     def copy(self):
-        return pickle.loads(pickle.dumps(self))
+        """
+        A copy of self with new crossings and strands.  This is done
+        directly rather than by pickling, which recurses along the
+        strands and so fails on long tangles.
+        """
+        T = copy.copy(self)
+        T.crossings = [_copy_parts(c) for c in self.crossings]
+        T.adjacent = list(self.adjacent)
+        new = {id(self): T}
+        new.update((id(c), d) for c, d in zip(self.crossings, T.crossings))
+        for d in [T] + T.crossings:
+            for i, (o, j) in enumerate(d.adjacent):
+                d.adjacent[i] = (new[id(o)], j)
+        return T
 
     def rotate(self, s):
         "Rotate anticlockwise by s*90 degrees"
-        if self.boundary != (2, 2):
-            raise ValueError("Only boundary=(2,2) tangles can be rotated")
-        anticlockwise = [0, 1, 3, 2]
-        rotate = dict(zip(anticlockwise, rotate_list(anticlockwise, s)))
-        T = self.copy()
-        T.adjacent = [T.adjacent[rotate[i]] for i in range(4)]
-        for i, (o, j) in enumerate(T.adjacent):
-            o.adjacent[j] = (T, i)
-        return T
+        return TangleBuilder(self.copy(), self.label).rotate(s).tangle()
 
     def invert(self):
         "Rotate anticlockwise by 90 and take the mirror image"
@@ -193,15 +184,7 @@ class Tangle():
 
         A synonym for this is ``Tangle.bridge_closure()``.
         """
-        m, n = self.boundary
-        if m % 2 or n % 2:
-            raise ValueError("To do bridge closure, both the top and bottom must have an even number of strands")
-        T = self.copy()
-        for i in range(0, m, 2):
-            join_strands(T.adjacent[i], T.adjacent[i + 1])
-        for j in range(0, n, 2):
-            join_strands(T.adjacent[m + i], T.adjacent[m + i + 1])
-        return Link(T.crossings, check_planarity=False)
+        return TangleBuilder(self.copy()).close('bridge')
 
     def denominator_closure(self):
         """The braid closure, where corresponding strands between the top and bottom
@@ -210,13 +193,7 @@ class Tangle():
 
         A synonym for this is ``Tangle.braid_closure()``.
         """
-        m, n = self.boundary
-        if m != n:
-            raise ValueError("To do braid closure, both the top and bottom number of strands must be equal")
-        T = self.copy()
-        for i in range(0, n):
-            join_strands(T.adjacent[i], T.adjacent[m + i])
-        return Link(T.crossings, check_planarity=False)
+        return TangleBuilder(self.copy()).close('braid')
     
     def annular_closure(self, component_idx=None):
         """
@@ -361,6 +338,179 @@ class Tangle():
 Tangle.bridge_closure = Tangle.numerator_closure
 Tangle.braid_closure = Tangle.denominator_closure
 
+
+class TangleBuilder():
+    """
+    A tangle which is changed in place, for building up long
+    compositions.  The operators on Tangle copy both operands, so
+    assembling a tangle from k pieces with them takes time quadratic in
+    k.  The methods here instead take over the crossings of the tangle
+    they are given, which must not be used afterwards, so the time is
+    linear.  Each returns the builder itself, so calls can be chained,
+    except for tangle and close, after which the builder itself must
+    not be used.
+
+    >>> B = TangleBuilder(IdentityBraid(2))
+    >>> for i in range(5):
+    ...     _ = B.stack_below(OneTangle())
+    >>> L = B.close()
+    >>> len(L.crossings), len(L.link_components)
+    (5, 1)
+    >>> T = TangleBuilder(OneTangle()).add_right(OneTangle()).invert().tangle()
+    >>> T.boundary, len(T.crossings)
+    ((2, 2), 2)
+    """
+    def __init__(self, tangle=None, label=None):
+        if tangle is None:
+            tangle = Tangle((0, 0))
+        boundary, crossings, entry_points = self._take(tangle)
+        self.crossings = deque(crossings)
+        self._set_boundary(boundary, entry_points)
+        self.label = label
+        # The number of quarter turns owed to every crossing; see mirror.
+        self._turns = 0
+
+    def _take(self, tangle):
+        """
+        The boundary, crossings and entry points of the given Tangle or
+        TangleBuilder, turning its crossings so that they end up as they
+        are now once self is finished.
+        """
+        crossings = list(tangle.crossings)
+        _turn_crossings(crossings, getattr(tangle, '_turns', 0) - getattr(self, '_turns', 0))
+        return tangle.boundary, crossings, list(tangle.adjacent)
+
+    def _set_boundary(self, boundary, entry_points):
+        m, n = boundary
+        self.boundary = (m, n)
+        self.adjacent = (m + n) * [None]
+        for i, e in enumerate(entry_points):
+            join_strands((self, i), e)
+
+    def _flush(self):
+        _turn_crossings(self.crossings, self._turns)
+        self._turns = 0
+
+    def __repr__(self):
+        return "<TangleBuilder: %s>" % self.label
+
+    def add_right(self, other):
+        "Put other to the right of self and fuse inside strands, as in self + other"
+        (mA, nA), (mB, nB) = self.boundary, other.boundary
+        if mA == 0 or mB == 0 or nA == 0 or nB == 0:
+            raise ValueError("Tangles must have at least one top and bottom strand each.")
+        boundary, crossings, b = self._take(other)
+        a = self.adjacent
+        join_strands(a[mA - 1], b[0])
+        join_strands(a[mA + nA - 1], b[mB])
+        self.crossings.extend(crossings)
+        self._set_boundary((mA + mB - 2, nA + nB - 2),
+                           a[:mA - 1] + b[1:mB] + a[mA:mA + nA - 1] + b[mB + 1:])
+        return self
+
+    def add_left(self, other):
+        "Put other to the left of self and fuse inside strands, as in other + self"
+        (mA, nA), (mB, nB) = other.boundary, self.boundary
+        if mA == 0 or mB == 0 or nA == 0 or nB == 0:
+            raise ValueError("Tangles must have at least one top and bottom strand each.")
+        boundary, crossings, a = self._take(other)
+        b = self.adjacent
+        join_strands(a[mA - 1], b[0])
+        join_strands(a[mA + nA - 1], b[mB])
+        self.crossings.extendleft(reversed(crossings))
+        self._set_boundary((mA + mB - 2, nA + nB - 2),
+                           a[:mA - 1] + b[1:mB] + a[mA:mA + nA - 1] + b[mB + 1:])
+        return self
+
+    def stack_below(self, other):
+        "Put other below self, as in self * other"
+        (mA, nA), (mB, nB) = self.boundary, other.boundary
+        if mA != nB:
+            raise ValueError("Tangles must have a compatible number of strands to multiply them")
+        boundary, crossings, b = self._take(other)
+        a = self.adjacent
+        for i in range(mA):
+            join_strands(a[i], b[mB + i])
+        self.crossings.extend(crossings)
+        self._set_boundary((mB, nA), b[:mB] + a[mA:])
+        return self
+
+    def place_right(self, other):
+        "Put other to the right of self, no fusing of strands, as in self | other"
+        (mA, nA), (mB, nB) = self.boundary, other.boundary
+        boundary, crossings, b = self._take(other)
+        a = self.adjacent
+        self.crossings.extend(crossings)
+        self._set_boundary((mA + mB, nA + nB), a[:mA] + b[:mB] + a[mA:] + b[mB:])
+        return self
+
+    def mirror(self):
+        """
+        Replace self by its mirror image.  This only records a quarter
+        turn owed to every crossing, which is paid when the tangle is
+        finished; tangles glued on later are turned back in advance.
+        """
+        self._turns += 1
+        return self
+
+    def rotate(self, s):
+        "Rotate anticlockwise by s*90 degrees"
+        if self.boundary != (2, 2):
+            raise ValueError("Only boundary=(2,2) tangles can be rotated")
+        anticlockwise = [0, 1, 3, 2]
+        rotate = dict(zip(anticlockwise, rotate_list(anticlockwise, s)))
+        self._set_boundary((2, 2), [self.adjacent[rotate[i]] for i in range(4)])
+        return self
+
+    def invert(self):
+        "Rotate anticlockwise by 90 and take the mirror image"
+        if self.boundary != (2, 2):
+            raise ValueError("Only boundary=(2,2) tangles can be inverted")
+        return self.rotate(1).mirror()
+
+    def tangle(self, label=None):
+        """
+        The finished Tangle, which takes over the crossings.
+        """
+        self._flush()
+        if label is None:
+            label = self.label
+        return Tangle(self.boundary, list(self.crossings), self.adjacent, label)
+
+    def close(self, kind='braid'):
+        """
+        The Link which is the braid (i.e. denominator) closure or the
+        bridge (i.e. numerator) closure, according to kind; see
+        Tangle.braid_closure and Tangle.bridge_closure.
+        """
+        m, n = self.boundary
+        a = self.adjacent
+        if kind in ('braid', 'denominator'):
+            if m != n:
+                raise ValueError("To do braid closure, both the top and bottom number of strands must be equal")
+            for i in range(0, n):
+                join_strands(a[i], a[m + i])
+        elif kind in ('bridge', 'numerator'):
+            if m % 2 or n % 2:
+                raise ValueError("To do bridge closure, both the top and bottom must have an even number of strands")
+            for i in range(0, m, 2):
+                join_strands(a[i], a[i + 1])
+            for j in range(0, n, 2):
+                join_strands(a[m + j], a[m + j + 1])
+        else:
+            raise ValueError("The kind of closure must be 'braid' or 'bridge'")
+        self._flush()
+        return Link(list(self.crossings), check_planarity=False)
+
+
+def _turn_crossings(crossings, s):
+    s = s % 4
+    if s:
+        for c in crossings:
+            if not isinstance(c, Strand):
+                c.rotate(s)
+
+
 def ComponentTangle(component_idx):
     """The unknotted (1,1) tangle with a specified component index.
     The component index can be a negative number following the usual
@@ -427,11 +577,10 @@ def IntegerTangle(n):
     if n == 0:
         return ZeroTangle()
     elif n > 0:
-        T = OneTangle()
+        T = TangleBuilder(OneTangle())
         for i in range(n - 1):
-            T += OneTangle()
-        T.label = f"IntegerTangle({n})"
-        return T
+            T.add_right(OneTangle())
+        return T.tangle(f"IntegerTangle({n})")
     elif n < 0:
         T = -IntegerTangle(-n)
         T.label = f"IntegerTangle({n})"
@@ -472,11 +621,12 @@ class RationalTangle(Tangle):
             a, b = -a, -b
         self.fraction = (a, b)
         self.partial_quotients = pqs = continued_fraction_expansion(abs(a), b)
-        T = InfinityTangle()
+        T = TangleBuilder(InfinityTangle())
         for p in reversed(pqs):
-            T = IntegerTangle(p) + T.invert()
+            T.invert().add_left(IntegerTangle(p))
         if a < 0:
-            T = -T
+            T.mirror()
+        T = T.tangle()
         Tangle.__init__(self, 2, T.crossings, T.adjacent,
                         f"RationalTangle({a}, {b})")
 
@@ -515,12 +665,12 @@ def BraidTangle(gens, n=None):
         g = OneTangle() if i < 0 else MinusOneTangle()
         return IdentityBraid(abs(i) - 1) | g | IdentityBraid(n - abs(i) - 1)
 
-    b = IdentityBraid(n)
+    b = TangleBuilder(IdentityBraid(n))
     for i in gens:
         if i == 0 : raise Exception("no")
         if abs(i) >= n : raise Exception("no")
-        b = b * gen(i)
-    return b
+        b.stack_below(gen(i))
+    return b.tangle()
 
 def EncircledIdentityBraid(num_strands, component_idx=None):
     """
@@ -0,0 +1,265 @@
+"""
+Noncrossing matchings and the cup and cap maps between them which make
+up the Temperley-Lieb category, as used by the vectorized backend of
+jones.py.
+
+A noncrossing matching of [0, ..., n - 1] is the same as a Dyck word
+of length n, where position a is an up step if it is matched with
+something larger.  Ordering the Dyck words lexicographically with up
+before down ranks the matchings as 0, ..., Catalan(n/2) - 1.
+
+The same (matching, position) pairs come up over and over when
+computing a Kauffman bracket, so the transitions are looked up in a
+TransitionTables object.  For widths up to precompute_width, whole
+columns of the table are computed for all matchings at once and stored
+as arrays; beyond that, individual transitions are memoized in LRU
+caches.  The module-level default_tables is shared by everything
+running in the same process, e.g. all the links in one chunk of a
+batch computation.
+
+>>> T = TransitionTables()
+>>> T.cup(2, np.array([0]), 0).tolist()
+[1]
+>>> ranks, circle = T.cap(4, np.array([0, 1]), 1)
+>>> ranks.tolist(), circle.tolist()
+([0, 0], [True, False])
+>>> T = TransitionTables(precompute_width=0, maxsize=10)
+>>> ranks, circle = T.cap(4, np.array([0, 1]), 1)
+>>> ranks.tolist(), circle.tolist()
+([0, 0], [True, False])
+"""
+
+import functools
+import numpy as np
+
+
+@functools.lru_cache(maxsize=None)
+def _dyck_counts(n):
+    """
+    Entry [r][h] is the number of ways of finishing a Dyck word with r
+    steps when currently at height h.
+    """
+    counts = [[0] * (n + 2) for r in range(n + 1)]
+    counts[0][0] = 1
+    for r in range(1, n + 1):
+        for h in range(0, r + 1):
+            counts[r][h] = counts[r - 1][h + 1] + (counts[r - 1][h - 1] if h > 0 else 0)
+    return counts
+
+
+def rank_matching(partners):
+    """
+    The rank of the noncrossing matching where a is joined to
+    partners[a].
+
+    >>> [rank_matching(p) for p in [(1, 0, 3, 2), (3, 2, 1, 0)]]
+    [1, 0]
+    """
+    n = len(partners)
+    counts = _dyck_counts(n)
+    rank, height = 0, 0
+    for a, b in enumerate(partners):
+        if b > a:
+            height += 1
+        else:
+            # All the words with an up step here come first.
+            rank += counts[n - a - 1][height + 1]
+            height -= 1
+    return rank
+
+
+def unrank_matching(n, rank):
+    """
+    The partners of the noncrossing matching of [0, ..., n - 1] with the
+    given rank.
+
+    >>> [unrank_matching(4, r) for r in range(2)]
+    [[3, 2, 1, 0], [1, 0, 3, 2]]
+    """
+    counts = _dyck_counts(n)
+    partners, openers, height = [None] * n, [], 0
+    for a in range(n):
+        ups = counts[n - a - 1][height + 1]
+        if rank < ups:
+            openers.append(a)
+            height += 1
+        else:
+            rank -= ups
+            b = openers.pop()
+            partners[a], partners[b] = b, a
+            height -= 1
+    return partners
+
+
+def cup_partners(partners, i):
+    """
+    The version of insert_cup for lists of partners.
+    """
+    def shift(a):
+        return a if a < i else a + 2
+    ans = [shift(b) for b in partners]
+    ans[i:i] = [i + 1, i]
+    return ans
+
+
+def cap_partners(partners, i):
+    """
+    The version of cap_off for lists of partners.
+    """
+    def shift(a):
+        return a if a < i else a - 2
+
+    circle = partners[i] == i + 1
+    ans = [None] * (len(partners) - 2)
+    for a in range(len(partners)):
+        if a not in (i, i + 1):
+            b = partners[a]
+            if b == i:
+                b = partners[i + 1]
+            elif b == i + 1:
+                b = partners[i]
+            ans[shift(a)] = shift(b)
+    return ans, circle
+
+
+class NoncrossingMatching():
+    """
+    A noncrossing matching of [0, ..., n - 1], given by its pairs.
+
+    >>> m = NoncrossingMatching([(2, 5), (0, 1), (4, 3)])
+    >>> m
+    [(0, 1), (2, 5), (3, 4)]
+    >>> m.partner(5), len(m), m.rank()
+    (2, 6, 3)
+    >>> NoncrossingMatching([(0, 2), (1, 3)])
+    Traceback (most recent call last):
+        ...
+    ValueError: Matching is not noncrossing
+    """
+    def __init__(self, pairs):
+        pairs = list(pairs)
+        partners = [None] * (2 * len(pairs))
+        for a, b in pairs:
+            partners[a], partners[b] = b, a
+        self.partners = tuple(partners)
+        if None in partners or not self.is_noncrossing():
+            raise ValueError('Matching is not noncrossing')
+
+    @classmethod
+    def from_partners(cls, partners):
+        ans = cls.__new__(cls)
+        ans.partners = tuple(partners)
+        return ans
+
+    def partner(self, a):
+        return self.partners[a]
+
+    def pairs(self):
+        return [(a, b) for a, b in enumerate(self.partners) if a < b]
+
+    def is_noncrossing(self):
+        openers = []
+        for a, b in enumerate(self.partners):
+            if b > a:
+                openers.append(a)
+            elif not openers or openers.pop() != b:
+                return False
+        return True
+
+    def rank(self):
+        return rank_matching(self.partners)
+
+    def __len__(self):
+        return len(self.partners)
+
+    def __eq__(self, other):
+        return (isinstance(other, NoncrossingMatching) and
+                self.partners == other.partners)
+
+    def __hash__(self):
+        return hash(self.partners)
+
+    def __lt__(self, other):
+        return self.pairs() < other.pairs()
+
+    def __repr__(self):
+        return repr(self.pairs())
+
+
+def catalan(k):
+    return _dyck_counts(2 * k)[2 * k][0]
+
+
+def cup_transition(n, rank, i):
+    """
+    The rank of the result of inserting a cup at i into the matching of
+    width n with the given rank.
+    """
+    return rank_matching(cup_partners(unrank_matching(n, rank), i))
+
+
+def cap_transition(n, rank, i):
+    """
+    The rank of the result of capping off i and i + 1 in the matching of
+    width n with the given rank, and whether a circle was created.
+    """
+    partners, circle = cap_partners(unrank_matching(n, rank), i)
+    return rank_matching(partners), circle
+
+
+class TransitionTables():
+    """
+    Memoized cup and cap transitions acting on arrays of ranks.
+    """
+    def __init__(self, precompute_width=14, maxsize=2**20):
+        self.precompute_width = precompute_width
+        self._cup_columns = dict()
+        self._cap_columns = dict()
+        self._cup = functools.lru_cache(maxsize)(cup_transition)
+        self._cap = functools.lru_cache(maxsize)(cap_transition)
+
+    def _cup_column(self, n, i):
+        key = (n, i)
+        if key not in self._cup_columns:
+            self._cup_columns[key] = np.array(
+                [cup_transition(n, r, i) for r in range(catalan(n // 2))],
+                dtype=np.int64)
+        return self._cup_columns[key]
+
+    def _cap_column(self, n, i):
+        key = (n, i)
+        if key not in self._cap_columns:
+            images = [cap_transition(n, r, i) for r in range(catalan(n // 2))]
+            self._cap_columns[key] = (
+                np.array([r for r, c in images], dtype=np.int64),
+                np.array([c for r, c in images], dtype=bool))
+        return self._cap_columns[key]
+
+    def cup(self, n, ranks, i):
+        """
+        The ranks after inserting a cup at i into each of the given
+        matchings of width n.
+        """
+        if n <= self.precompute_width:
+            return self._cup_column(n, i)[ranks]
+        unique, inverse = np.unique(ranks, return_inverse=True)
+        images = [self._cup(n, int(r), i) for r in unique]
+        return np.array(images, dtype=np.int64)[inverse]
+
+    def cap(self, n, ranks, i):
+        """
+        The ranks after capping off i and i + 1 in each of the given
+        matchings of width n, and an array recording where a circle
+        was created.
+        """
+        if n <= self.precompute_width:
+            new_ranks, circles = self._cap_column(n, i)
+            return new_ranks[ranks], circles[ranks]
+        unique, inverse = np.unique(ranks, return_inverse=True)
+        images = [self._cap(n, int(r), i) for r in unique]
+        new_ranks = np.array([r for r, c in images], dtype=np.int64)
+        circles = np.array([c for r, c in images], dtype=bool)
+        return new_ranks[inverse], circles[inverse]
+
+
+default_tables = TransitionTables()
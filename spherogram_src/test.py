@@ -4,6 +4,14 @@ import spherogram.links.test
 import spherogram.links.simplify
 import spherogram.links.morse
 import spherogram.links.seifert
+import spherogram.links.invariant_cache
+import spherogram.links.temperley_lieb
+import spherogram.links.laurent
+import spherogram.links.jones
+import spherogram.links.alexander
+import spherogram.links.goeritz
+import spherogram.batch
+import spherogram.planarmap
 
 import spherogram.test_helper as test_helper
 import re
@@ -17,7 +25,12 @@ modules = [spherogram.codecs.DT, spherogram.codecs.Base64LikeDT,
            spherogram.links.tangles,
            spherogram.links.random_links, spherogram.links.orthogonal,
            spherogram.links.simplify, spherogram.links.invariants,
-           spherogram.links.morse, spherogram.links.seifert]
+           spherogram.links.morse, spherogram.links.seifert,
+           spherogram.links.compact, spherogram.links.invariant_cache,
+           spherogram.links.temperley_lieb, spherogram.links.laurent,
+           spherogram.links.jones, spherogram.links.alexander,
+           spherogram.links.goeritz,
+           spherogram.batch, spherogram.planarmap]
 
 # Apply the monkey-patches that snappy applies when it is imported.
 if test_helper._have_snappy: